@@ -0,0 +1,51 @@
+""" Compares two benchmark result files (see `run`), reporting the cases slower than `--threshold` times
+the baseline. Exits with status 1 if there are regressions.
+
+    python -m benchmarks.compare baseline.json results.json
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        return dict((result['name'], result) for result in json.load(f)['results'])
+
+
+def compare(baseline, current, threshold=1.2, metric='best'):
+    """ Returns the (name, baseline value, current value, ratio) of the cases present in both results, and the
+    names of the regressions (ratio above `threshold`). """
+    rows = []
+    regressions = []
+    for name in sorted(set(baseline) & set(current)):
+        old, new = baseline[name][metric], current[name][metric]
+        if old is None or new is None:
+            continue
+        ratio = new / old if old else float('inf') if new else 1.0
+        rows.append((name, old, new, ratio))
+        if ratio > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='compare xlorm benchmark results')
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=1.2, help='slowdown ratio reported as a regression')
+    parser.add_argument('--metric', default='best', choices=('best', 'median', 'peak_memory'))
+    args = parser.parse_args(argv)
+
+    rows, regressions = compare(load(args.baseline), load(args.current), args.threshold, args.metric)
+    out = sys.stdout
+    out.write('%-40s %14s %14s %8s\n' % ('case', 'baseline', 'current', 'ratio'))
+    for name, old, new, ratio in rows:
+        flag = '  <-- regression' if name in regressions else ''
+        out.write('%-40s %14.6g %14.6g %8.2f%s\n' % (name, old, new, ratio, flag))
+    out.write('%d regression(s)\n' % len(regressions))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
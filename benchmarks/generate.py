@@ -0,0 +1,87 @@
+""" Synthetic workbook generator: .xlsx files are written directly (see `xlorm.export.write_xlsx_sheets`, no
+dependency) and .xls files with xlwt, if installed. """
+import datetime
+import random
+
+from xlorm.export import write_xlsx_sheets
+
+try:
+    import xlwt
+except ImportError:
+    xlwt = None
+
+
+XLS__MAX_ROWS = 65536
+
+WORDS = (u'lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore '
+         u'et dolore magna aliqua \xe1gua p\xe3o ma\xe7\xe3 caf\xe9').split()
+
+
+def text(rnd, words):
+    return u' '.join(rnd.choice(WORDS) for _ in range(words))
+
+
+def messy_text(rnd, words):
+    """ Text needing cleaning: repeated spaces, tabs, line breaks and control characters. """
+    parts = []
+    for i in range(words):
+        parts.append(rnd.choice(WORDS))
+        parts.append(rnd.choice((u' ', u'  ', u'\t', u'\n', u' \r\n ', u'\x07 ')))
+    return u''.join(parts)
+
+
+def date(rnd):
+    return datetime.datetime(2000, 1, 1) + datetime.timedelta(days=rnd.randint(0, 9000),
+                                                              seconds=rnd.randint(0, 86399))
+
+
+# column kinds: {kind: value factory(rnd, rowx)}
+KINDS = {
+    'id': lambda rnd, rowx: float(rowx + 1),
+    'name': lambda rnd, rowx: text(rnd, 2).title(),
+    'text': lambda rnd, rowx: text(rnd, rnd.randint(5, 40)),
+    'messy': lambda rnd, rowx: messy_text(rnd, rnd.randint(5, 40)),
+    'date': lambda rnd, rowx: date(rnd),
+    'number': lambda rnd, rowx: round(rnd.uniform(-1000, 1000), 2),
+    'integer': lambda rnd, rowx: float(rnd.randint(0, 100000)),
+    'boolean': lambda rnd, rowx: rnd.random() < 0.5,
+}
+
+
+def generate_rows(kinds, nrows, seed=0, first_id=1, empty_ratio=0.05):
+    """ Yields `nrows` rows of values of the given column kinds (see `KINDS`), with ids from `first_id`;
+    about `empty_ratio` of the non id cells are left empty (None). """
+    rnd = random.Random(seed)
+    factories = [KINDS[kind] for kind in kinds]
+    for rowx in range(first_id - 1, first_id - 1 + nrows):
+        yield [factory(rnd, rowx) if kind == 'id' or rnd.random() >= empty_ratio else None
+               for kind, factory in zip(kinds, factories)]
+
+
+def write_xls(path, sheets):
+    """ Writes an .xls workbook (requires xlwt) with the given sheets: [(sheet name, header, rows)]. """
+    if xlwt is None:
+        raise ImportError('xlwt is required to write .xls files')
+    book = xlwt.Workbook(encoding='utf-8')
+    date_style = xlwt.easyxf(num_format_str='yyyy-mm-dd hh:mm:ss')
+    for name, header, rows in sheets:
+        sheet = book.add_sheet(name)
+        for colx, h in enumerate(header):
+            sheet.write(0, colx, h)
+        for rowx, row in enumerate(rows):
+            if rowx + 1 >= XLS__MAX_ROWS:
+                break
+            for colx, value in enumerate(row):
+                if isinstance(value, datetime.datetime):
+                    sheet.write(rowx + 1, colx, value, date_style)
+                elif value is not None:
+                    sheet.write(rowx + 1, colx, value)
+    book.save(path)
+
+
+def write_workbook(path, sheets):
+    """ Writes the workbook in the format of the `path` extension (.xlsx or .xls). """
+    if path.endswith('.xls'):
+        write_xls(path, sheets)
+    else:
+        write_xlsx_sheets(path, sheets)
@@ -0,0 +1,53 @@
+""" Models of the synthetic benchmark workbooks (see `run.WORKLOADS`). """
+from xlorm import BooleanColumn, DateColumn, IntegerColumn, NumberColumn, TextColumn, XLSSheetModel
+
+
+# column kinds (see `generate.KINDS`) of the `Row` model sheets
+ROW_KINDS = ('id', 'name', 'text', 'date', 'number', 'integer', 'boolean')
+
+
+class Row(XLSSheetModel):
+    id = IntegerColumn(column_index=0, column_name='Id', is_primary_key=True)
+    name = TextColumn(column_index=1, column_name='Name', strip=True, multiline=False)
+    text = TextColumn(column_index=2, column_name='Text')
+    created = DateColumn(column_index=3, column_name='Created')
+    amount = NumberColumn(column_index=4, column_name='Amount')
+    quantity = IntegerColumn(column_index=5, column_name='Quantity')
+    active = BooleanColumn(column_index=6, column_name='Active')
+
+
+MESSY_KINDS = ('id', 'messy', 'messy', 'messy')
+
+
+class MessyRow(XLSSheetModel):
+    """Text heavy: cells with repeated spaces, line breaks and control characters to clean."""
+    id = IntegerColumn(column_index=0, column_name='Id', is_primary_key=True)
+    title = TextColumn(column_index=1, column_name='Title', strip=True, multiline=False)
+    body = TextColumn(column_index=2, column_name='Body')
+    notes = TextColumn(column_index=3, column_name='Notes', strip=True)
+
+
+DATES_KINDS = ('id',) + ('date',) * 8
+
+
+class DatesRow(XLSSheetModel):
+    """Date heavy."""
+    id = IntegerColumn(column_index=0, column_name='Id', is_primary_key=True)
+
+
+for _colx in range(1, len(DATES_KINDS)):
+    setattr(DatesRow, 'date%d' % _colx, DateColumn(column_index=_colx, column_name='Date %d' % _colx))
+
+
+WIDE_COLUMNS = 100
+WIDE_KINDS = ('id',) + ('number', 'name', 'integer', 'date') * ((WIDE_COLUMNS - 1) // 4)
+
+
+class WideRow(XLSSheetModel):
+    """Wide sheets: many (mixed type) columns."""
+    id = IntegerColumn(column_index=0, column_name='Id', is_primary_key=True)
+
+
+_COLUMN_CLASSES = {'number': NumberColumn, 'name': TextColumn, 'integer': IntegerColumn, 'date': DateColumn}
+for _colx, _kind in enumerate(WIDE_KINDS[1:], 1):
+    setattr(WideRow, 'c%d' % _colx, _COLUMN_CLASSES[_kind](column_index=_colx, column_name='C%d' % _colx))
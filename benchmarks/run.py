@@ -0,0 +1,229 @@
+""" Runs the benchmarks on synthetic workbooks, writing the results as JSON (see `compare` to compare runs).
+
+    python -m benchmarks.run --rows 20000 --output results.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+import xlorm
+from xlorm import util
+from xlorm.info import __version__
+from xlorm.util import Workbook, get_cell_value, get_xls_sheet_names
+
+import xlrd
+
+from . import generate
+from .models import DATES_KINDS, DatesRow, MESSY_KINDS, MessyRow, ROW_KINDS, Row, WIDE_KINDS, WideRow
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+
+RESULTS__FORMAT = 1
+
+timer = getattr(time, 'perf_counter', time.time)
+
+LOOKUPS = 1000  # primary key lookups of the `get` benchmark
+
+
+class Workload(object):
+    """ A synthetic workbook: `nsheets` sheets of `model` rows, `nrows` rows in all. """
+
+    def __init__(self, name, model, kinds, row_factor=1.0, nsheets=1):
+        self.name = name
+        self.model = model
+        self.kinds = kinds
+        self.row_factor = row_factor
+        self.nsheets = nsheets
+
+    def nrows(self, rows):
+        return max(int(rows * self.row_factor) // self.nsheets, 1) * self.nsheets
+
+    def sheets(self, rows):
+        header = [col.column_name for col in self.model.read_plan()]
+        per_sheet = self.nrows(rows) // self.nsheets
+        return [('Sheet%d' % (i + 1), header,
+                 generate.generate_rows(self.kinds, per_sheet, seed=i, first_id=i * per_sheet + 1))
+                for i in range(self.nsheets)]
+
+    def path(self, workdir, rows, fmt):
+        return os.path.join(workdir, '%s-%d.%s' % (self.name, self.nrows(rows), fmt))
+
+    def sheetnames(self):
+        return ['Sheet%d' % (i + 1) for i in range(self.nsheets)]
+
+
+WORKLOADS = (
+    Workload('rows', Row, ROW_KINDS),
+    Workload('wide', WideRow, WIDE_KINDS, row_factor=0.1),
+    Workload('text', MessyRow, MESSY_KINDS, row_factor=0.5),
+    Workload('dates', DatesRow, DATES_KINDS),
+    Workload('sheets', Row, ROW_KINDS, nsheets=50),
+)
+
+
+def clear_caches():
+    xlorm.XLSSheetModel.rows_all_cache.clear()
+    util._sheet_names_cache.clear()
+
+
+def measure(func, setup=None, repeat=3):
+    """ Times `func(setup())` `repeat` times and then measures its peak (traced) memory allocation, once.
+    Returns the result dictionary (times in seconds, memory in bytes). """
+
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        gc.collect()
+        start = timer()
+        func(arg)
+        times.append(timer() - start)
+    peak = None
+    if tracemalloc is not None:
+        arg = setup() if setup is not None else None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func(arg)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    ordered = sorted(times)
+    return {
+        'times': times,
+        'best': ordered[0],
+        'median': ordered[len(ordered) // 2],
+        'peak_memory': peak,
+    }
+
+
+def cases(workload, path, rows):
+    """ Yields the (case name, func, setup) of the benchmarks of a workload file. """
+    model = workload.model
+    params = {'filename': path, 'sheetnames': workload.sheetnames()}
+
+    def loaded(arg=None):
+        clear_caches()
+        return model.all(cache=False, **params)
+
+    yield 'all', lambda arg: model.all(cache=False, **params), clear_caches
+    yield 'all_cached', lambda arg: model.all(**params), lambda: model.all(**params) and None
+    yield 'iter', lambda arg: sum(1 for _ in model.iter(**params)), clear_caches
+    yield 'to_columns', lambda arg: model.to_columns(**params), clear_caches
+    if path.endswith('.xlsx'):
+        yield 'all_xlrd_backend', lambda arg: model.all(cache=False, workbook=Workbook(path, backend='xlrd'),
+                                                        **params), clear_caches
+    yield 'sheet_names', lambda arg: get_xls_sheet_names(path), clear_caches
+
+    nrows = workload.nrows(rows)
+    keys = [float(1 + i * nrows // LOOKUPS) for i in range(LOOKUPS)]
+    yield 'get', lambda arg: [model.get(key, **params) for key in keys], lambda: model.all(**params) and None
+    yield 'to_dicts', lambda rows: model.to_dicts(rows), loaded
+
+    text_columns = [name for name, col in model._columns().items() if isinstance(col, xlorm.TextColumn)]
+    if text_columns:
+        yield 'text_cleaning', lambda rows: [getattr(row, name) for row in rows for name in text_columns], loaded
+
+    date_colxs = [col.column_index for col in model.read_plan() if col.ctype == xlrd.XL_CELL_DATE]
+    if date_colxs:
+        def date_sheet():
+            try:
+                book = xlrd.open_workbook(path)
+            except xlrd.XLRDError:  # xlrd 2 reads .xls only
+                return None
+            return book.sheet_by_index(0), book.datemode
+
+        def convert_dates(arg):
+            if arg is not None:
+                sheet, datemode = arg
+                for rowx in range(1, sheet.nrows):
+                    for colx in date_colxs:
+                        get_cell_value(sheet, rowx, colx, datemode)
+        yield 'get_cell_value_dates', convert_dates, date_sheet
+
+
+def run(rows=20000, repeat=3, formats=('xlsx',), only=None, workdir=None, log=sys.stderr):
+    """ Generates the workbooks (if not already in `workdir`) and runs the benchmarks.
+    Returns the results document. """
+
+    results = []
+    for workload in WORKLOADS:
+        for fmt in formats:
+            if fmt == 'xls' and generate.xlwt is None:
+                log.write('skipping .xls workbooks: xlwt is not installed\n')
+                continue
+            path = workload.path(workdir, rows, fmt)
+            if not os.path.exists(path):
+                log.write('generating %s\n' % path)
+                generate.write_workbook(path, workload.sheets(rows))
+            for case, func, setup in cases(workload, path, rows):
+                name = '%s/%s/%s' % (workload.name, fmt, case)
+                if only and not re.search(only, name):
+                    continue
+                log.write('%s... ' % name)
+                result = measure(func, setup, repeat)
+                log.write('%.4fs\n' % result['best'])
+                result.update({
+                    'name': name,
+                    'workload': workload.name,
+                    'format': fmt,
+                    'case': case,
+                    'rows': workload.nrows(rows),
+                    'sheets': workload.nsheets,
+                    'file_size': os.path.getsize(path),
+                })
+                results.append(result)
+    clear_caches()
+    return {
+        'format': RESULTS__FORMAT,
+        'xlorm': __version__,
+        'xlrd': getattr(xlrd, '__VERSION__', None) or getattr(xlrd, '__version__', None),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'params': {'rows': rows, 'repeat': repeat, 'formats': list(formats)},
+        'results': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='xlorm benchmarks')
+    parser.add_argument('--rows', type=int, default=20000, help='rows per workbook (scaled per workload)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--formats', default='xlsx', help='comma separated: xlsx, xls (requires xlwt)')
+    parser.add_argument('--only', help='regular expression the workload/format/case names must match')
+    parser.add_argument('--workdir', help='directory of the generated workbooks (kept and reused)')
+    parser.add_argument('--output', help='JSON results file (standard output by default)')
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='xlorm-bench-')
+    if not os.path.isdir(workdir):
+        os.makedirs(workdir)
+    try:
+        document = run(rows=args.rows, repeat=args.repeat, formats=args.formats.split(','), only=args.only,
+                       workdir=workdir)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir)
+    text = json.dumps(document, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+    return document
+
+
+if __name__ == '__main__':
+    main()
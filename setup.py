@@ -38,5 +38,8 @@ setup(
     python_requires=">=2.7, !=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*, !=3.4.*, !=3.5.*",
     install_requires=[
         'xlrd == 1.2.0'  # IMPORTANT: any update needs to be reflected in `tox.ini`
-    ]
+    ],
+    extras_require={
+        'benchmarks': ['xlwt'],  # .xls workbooks, skipped if not installed
+    }
 )
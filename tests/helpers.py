@@ -1,5 +1,17 @@
 import os
 
+from xlorm.export import write_xlsx_sheets
+
 
 def from_sample(filename):
     return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'samples', filename)
+
+
+def write_xlsx(path, header, sheets, mtime=None):
+    """Writes the given [(sheet name, rows)], all under the same header, to an .xlsx file (see
+    `xlorm.export.write_xlsx_sheets`), with the given modification time if any. Returns the path."""
+    path = str(path)
+    write_xlsx_sheets(path, [(name, header, rows) for name, rows in sheets])
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
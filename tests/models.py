@@ -0,0 +1,42 @@
+from xlorm import BooleanColumn, DateColumn, IntegerColumn, NumberColumn, TextColumn, XLSSheetModel
+
+
+class Person(XLSSheetModel):
+    active = BooleanColumn(column_index=0, column_name='Active')
+    name = TextColumn(column_index=1, strip=True, multiline=False, column_name='Name')
+    birthday = DateColumn(column_index=2, column_name='Birthday')
+    age = IntegerColumn(column_index=3, column_name='Age')
+    bio = TextColumn(column_index=4, column_name='Bio')
+    weight = NumberColumn(column_index=5, column_name='Weight')
+    rating = NumberColumn(column_index=6, column_name='Rating')
+    wakeup_at = DateColumn(column_index=7, column_name='Wake-up time')
+    event = DateColumn(column_index=8, column_name='Event')
+
+
+class Employee(Person):
+    """Model subclass: inherits all the `Person` columns."""
+    salary = NumberColumn(column_index=9, column_name='Salary', optional=True)
+
+
+class CachedPerson(Person):
+    """Cleaned text values cached in the instances."""
+    name = TextColumn(column_index=1, strip=True, multiline=False, column_name='Name', cache=True)
+    bio = TextColumn(column_index=4, column_name='Bio', cache=True)
+
+
+class PersonByName(XLSSheetModel):
+    name = TextColumn(column_index=1, column_name='Name', is_primary_key=True)
+    age = IntegerColumn(column_index=3, column_name='Age')
+    active = BooleanColumn(column_index=0, column_name='Active')
+
+
+class CleanPerson(XLSSheetModel):
+    name = TextColumn(column_index=1, strip=True, multiline=False, clean_on_load=True)
+    bio = TextColumn(column_index=4, strip=True, multiline=False)
+
+
+class IndexedPerson(XLSSheetModel):
+    """Secondary indexes on non unique columns."""
+    active = BooleanColumn(column_index=0, column_name='Active', indexed=True)
+    name = TextColumn(column_index=1, strip=True, multiline=False, column_name='Name')
+    age = IntegerColumn(column_index=3, column_name='Age', indexed=True)
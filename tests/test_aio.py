@@ -0,0 +1,138 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from xlorm import XLSSheetModel
+
+from .helpers import from_sample
+from .models import Person, PersonByName
+
+
+pytestmark = pytest.mark.skipif(sys.version_info[0] < 3, reason='asyncio requires Python 3')
+
+
+def run(func, steps=None):
+    """ Runs the awaitable returned by `func()` (called with a current event loop) to completion. With `steps`,
+    `func()` returns an asynchronous iterator (`async for`), read to the end. """
+    import asyncio
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        if not steps:
+            return loop.run_until_complete(func())
+        iterator = func()
+        rows = []
+        while True:
+            try:
+                rows.append(loop.run_until_complete(iterator.__anext__()))
+            except StopAsyncIteration:  # noqa: F821 (Python 3)
+                return rows
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def gather(*funcs):
+    import asyncio
+    return run(lambda: asyncio.gather(*[func() for func in funcs]))
+
+
+class TestAsyncLoads(object):
+
+    def setup_method(self, method):
+        XLSSheetModel.rows_all_cache.clear()
+
+    def test_all_and_get(self):
+        rows = run(lambda: Person.aall(filename=from_sample('people.xlsx')))
+        assert Person.to_dicts(rows) == Person.to_dicts(Person.all(filename=from_sample('people.xlsx')))
+        rows = run(lambda: Person.aall(filename=from_sample('people.xlsx'), compact=True))
+        assert [r.row for r in rows] == list(range(2, 9))
+        p = run(lambda: PersonByName.aget('Marta Fernandes', filename=from_sample('people.xlsx')))
+        assert p.age == 21
+        q = run(lambda: PersonByName.aget_many(['Nobody', 'Pedro Duarte'], filename=from_sample('people.xlsx')))
+        assert [p and p.age for p in q] == [None, 41]
+
+    def test_coroutines(self):
+        import asyncio
+        if not hasattr(asyncio, 'run'):
+            pytest.skip('asyncio.run requires Python 3.7')
+        # no current event loop: the loads use the running one
+        rows = asyncio.run(Person.aall(filename=from_sample('people.xlsx'), cache=False))
+        assert [p.row for p in rows] == list(range(2, 9))
+        p = asyncio.run(PersonByName.aget('Marta Fernandes', filename=from_sample('people.xlsx')))
+        assert p.age == 21
+
+    def test_errors(self):
+        with pytest.raises(IOError):
+            run(lambda: Person.aall(filename=from_sample('missing.xlsx')))
+
+    def test_iter(self):
+        rows = run(lambda: Person.aiter(filename=from_sample('people.xlsx'), chunk_size=3), steps=True)
+        assert [p.row for p in rows] == list(range(2, 9))
+
+    def test_shared_in_flight_loads(self, monkeypatch):
+        from xlorm.aio import AsyncLoader
+        calls = []
+        load_sheets = Person.load_sheets.__func__
+
+        def slow_load_sheets(cls, **params):
+            calls.append(params)
+            time.sleep(0.05)
+            return load_sheets(cls, **params)
+
+        monkeypatch.setattr(Person, 'load_sheets', classmethod(slow_load_sheets))
+        loader = AsyncLoader(max_concurrency=4)
+        results = gather(*[lambda: loader.all(Person, filename=from_sample('people.xlsx'))] * 3)
+        assert len(calls) == 1
+        assert Person.to_dicts(results[0]) == Person.to_dicts(results[1]) == Person.to_dicts(results[2])
+        assert results[0][0] is not results[1][0]  # the rows are shared, not the models
+
+    def test_concurrency_bound(self, monkeypatch):
+        from xlorm.aio import AsyncLoader
+        lock = threading.Lock()
+        running = [0, 0]  # current, max
+
+        def slow_all(cls, **params):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return [params['sheetnames']]
+
+        monkeypatch.setattr(Person, 'all', classmethod(slow_all))
+        loader = AsyncLoader(max_concurrency=2)
+        funcs = [(lambda i: lambda: loader.all(Person, filename='x', sheetnames=[str(i)], cache=False))(i)
+                 for i in range(6)]
+        assert gather(*funcs) == [[[str(i)]] for i in range(6)]
+        assert running[1] == 2
+        assert loader.running == 0
+
+    def test_process_executor(self, monkeypatch):
+        from concurrent.futures import ProcessPoolExecutor
+        from xlorm.aio import AsyncLoader
+        built_in = []
+        loaded_sheet = Person._loaded_sheet
+
+        def record(*args):
+            built_in.append(threading.current_thread())
+            return loaded_sheet(*args)
+        monkeypatch.setattr(Person, '_loaded_sheet', record)
+        Person.rows_all_cache.invalidate(model=Person)
+        with ProcessPoolExecutor(1) as executor:
+            loader = AsyncLoader(executor)
+            params = {'filename': from_sample('people.xlsx'), 'sheetnames': ['Sheet1']}
+            rows = run(lambda: loader.all(Person, **params))
+            # indexed off the event loop (thread)
+            assert len(built_in) == 1 and built_in[0] is not threading.current_thread()
+            assert Person.to_dicts(rows) == Person.to_dicts(Person.all(cache=False, **params))
+            # cached in this process
+            hits = Person.rows_all_cache.hits
+            assert Person.to_dicts(run(lambda: loader.all(Person, **params))) == Person.to_dicts(rows)
+            assert Person.to_dicts(Person.all(**params)) == Person.to_dicts(rows)
+            assert Person.rows_all_cache.hits == hits + 2
+            rows = run(lambda: loader.iter(Person, chunk_size=5, **params), steps=True)
+            assert [p.row for p in rows] == list(range(2, 9))
@@ -0,0 +1,175 @@
+import io
+import mmap
+import zipfile
+from io import BytesIO
+
+import pytest
+
+from xlorm import backends, util
+from xlorm.util import (BufferReader, Workbook, buffer_bytes, contents_buffer, file_fingerprint, iter_rows,
+                        read_xls_sheet)
+from xlorm.xlsx import ZIP_MAGIC
+
+import xlrd
+
+from .helpers import from_sample
+from .models import Person
+
+
+WORKBOOK = '''<?xml version="1.0" encoding="UTF-8"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+    xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<workbookPr date1904="1"/><sheets><sheet name="Data" sheetId="1" r:id="rId1"/></sheets></workbook>'''
+
+RELS = '''<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"
+    Target="worksheets/sheet1.xml"/></Relationships>'''
+
+STYLES = '''<?xml version="1.0" encoding="UTF-8"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<numFmts><numFmt numFmtId="164" formatCode="yyyy\\-mm\\-dd hh:mm"/><numFmt numFmtId="165" formatCode="0.00"/></numFmts>
+<cellXfs><xf numFmtId="0"/><xf numFmtId="164"/><xf numFmtId="165"/><xf numFmtId="14"/></cellXfs></styleSheet>'''
+
+SHARED_STRINGS = '''<?xml version="1.0" encoding="UTF-8"?>
+<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<si><t>Name</t></si><si><r><t>Rich</t></r><r><t xml:space="preserve"> text_x000D_</t></r></si></sst>'''
+
+SHEET = '''<?xml version="1.0" encoding="UTF-8"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><dimension ref="A1:E5"/><sheetData>
+<row r="1"><c r="A1" t="s"><v>0</v></c><c r="C1" t="inlineStr"><is><t>inline</t></is></c></row>
+<row r="2"><c r="A2" t="s"><v>1</v></c><c r="B2" s="1"><v>40000.5</v></c><c r="C2" s="2"><v>1.5</v></c>
+    <c r="D2" s="3"><v>40001</v></c><c r="E2" t="b"><v>1</v></c></row>
+<row r="4"><c r="A4" t="str"><f>A1</f><v>Name</v></c><c r="B4" t="e"><v>#DIV/0!</v></c><c r="D4"/></row>
+</sheetData></worksheet>'''
+
+
+def make_xlsx():
+    f = BytesIO()
+    with zipfile.ZipFile(f, 'w') as z:
+        z.writestr('xl/workbook.xml', WORKBOOK)
+        z.writestr('xl/_rels/workbook.xml.rels', RELS)
+        z.writestr('xl/styles.xml', STYLES)
+        z.writestr('xl/sharedStrings.xml', SHARED_STRINGS)
+        z.writestr('xl/worksheets/sheet1.xml', SHEET)
+    return f.getvalue()
+
+
+def xlrd_rows(file_contents, sheetname, width=None):
+    sheet = xlrd.open_workbook(file_contents=file_contents).sheet_by_name(sheetname)
+    return [(rx, list(sheet.row_types(rx, 0, width)), sheet.row_values(rx, 0, width)) for rx in range(sheet.nrows)]
+
+
+class TestXlsxBackend(object):
+
+    def test_detection(self):
+        assert backends.detect_backend(from_sample('people.xlsx')) == 'xlsx'
+        assert backends.detect_backend(file_contents=b'\xd0\xcf\x11\xe0') == 'xlrd'
+        assert backends.detect_backend('missing.xls') == 'xlrd'
+        with pytest.raises(ValueError):
+            backends.open_book(from_sample('people.xlsx'), backend='unknown')
+
+    def test_same_cells_as_xlrd(self):
+        with open(from_sample('people.xlsx'), 'rb') as f:
+            people = f.read()
+        for file_contents, sheetname in ((people, 'Sheet1'), (make_xlsx(), 'Data')):
+            book = backends.open_book(file_contents=file_contents, backend='xlsx')
+            assert book.sheet_names() == [sheetname]
+            assert book.datemode == xlrd.open_workbook(file_contents=file_contents).datemode
+            sheet = book.sheet_by_name(sheetname)
+            assert list(iter_rows(sheet)) == xlrd_rows(file_contents, sheetname)
+            assert list(iter_rows(sheet, 1, 3)) == xlrd_rows(file_contents, sheetname, 3)[1:]
+
+    def test_cell_values(self):
+        rows = list(backends.open_book(file_contents=make_xlsx()).sheet_by_name('Data').iter_rows())
+        assert rows[1][1] == [xlrd.XL_CELL_TEXT, xlrd.XL_CELL_DATE, xlrd.XL_CELL_NUMBER, xlrd.XL_CELL_DATE,
+                              xlrd.XL_CELL_BOOLEAN]
+        assert rows[1][2][0] == u'Rich text\r'
+        assert rows[2] == (2, [xlrd.XL_CELL_EMPTY] * 5, [u''] * 5)  # missing row
+        assert rows[3][1][:2] == [xlrd.XL_CELL_TEXT, xlrd.XL_CELL_ERROR]
+
+    def test_same_models_as_xlrd(self):
+        filename = from_sample('people.xlsx')
+        plan = Person.read_plan()
+        assert read_xls_sheet(filename, 'Sheet1', plan, 1) == \
+            read_xls_sheet(filename, 'Sheet1', plan, 1, backend='xlrd')
+        streamed = Person.to_columns(filename=filename)
+        read = Person.to_columns(filename=filename, workbook=Workbook(filename, backend='xlrd'))
+        for name in read:
+            assert list(streamed[name].values) == list(read[name].values)
+            assert list(streamed[name].null_mask) == list(read[name].null_mask)
+
+
+class Stream(object):
+    """Non seekable binary stream."""
+
+    def __init__(self, data):
+        self.read = BytesIO(data).read
+
+
+class TestInputs(object):
+
+    def setup_method(self, method):
+        with open(from_sample('people.xlsx'), 'rb') as f:
+            self.data = f.read()
+
+    def inputs(self, f):
+        f.seek(3)  # read whole in any case
+        return [self.data, bytearray(self.data), memoryview(self.data), memoryview(bytearray(self.data))[10:],
+                BytesIO(self.data), f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), Stream(self.data)]
+
+    def test_buffers(self):
+        with open(from_sample('people.xlsx'), 'rb') as f:
+            assert isinstance(contents_buffer(f), mmap.mmap)
+            assert isinstance(contents_buffer(BytesIO(self.data)), memoryview)
+            assert contents_buffer(self.data) is self.data
+            fingerprints = set(file_fingerprint(file_contents=contents) for contents in self.inputs(f)[:-1])
+        assert len(fingerprints) == 2  # all but the truncated view
+
+    def test_mapped_files_are_closed(self, monkeypatch):
+        mapped = []
+
+        def mapping(file_contents, contents_buffer=util.contents_buffer):
+            contents = contents_buffer(file_contents)
+            if isinstance(contents, mmap.mmap) and contents is not file_contents:
+                mapped.append(contents)
+            return contents
+
+        def is_closed(contents):
+            try:
+                len(contents)
+            except ValueError:
+                return True
+            return False
+        monkeypatch.setattr(util, 'contents_buffer', mapping)
+        with open(from_sample('people.xlsx'), 'rb') as f:
+            assert len(Person.all(file_contents=f)) == 7
+            for backend in ('xlsx', 'xlrd'):
+                assert len(Person.all(file_contents=f, cache=False, workbook=Workbook(
+                    file_contents=f, backend=backend))) == 7
+            assert len(list(Person.iter(file_contents=f))) == 7
+            assert Person.invalidate_cache(file_contents=f) == 1
+        assert len(mapped) == 5 and all(is_closed(contents) for contents in mapped)
+
+    def test_buffer_reader(self):
+        reader = BufferReader(memoryview(self.data))
+        assert reader.read(4) == self.data[:4]
+        assert reader.seek(-2, io.SEEK_END) == len(self.data) - 2
+        assert reader.read() == self.data[-2:]
+        assert reader.read(10) == b''
+        reader.seek(1)
+        assert reader.read(3) == self.data[1:4]
+        assert type(reader.read(1)) is bytes
+        assert buffer_bytes(memoryview(self.data)[:4]) == buffer_bytes(bytearray(self.data[:4])) == ZIP_MAGIC
+        assert backends.detect_backend(file_contents=memoryview(self.data)) == 'xlsx'
+
+    def test_loads(self):
+        expected = Person.to_dicts(Person.all(file_contents=self.data, cache=False))
+        with open(from_sample('people.xlsx'), 'rb') as f:
+            for backend in ('xlsx', 'xlrd'):
+                for contents in self.inputs(f)[:3] + self.inputs(f)[4:]:
+                    rows = Person.all(file_contents=contents, cache=False, workbook=Workbook(
+                        file_contents=contents, backend=backend))
+                    assert Person.to_dicts(rows) == expected
+        with pytest.raises(TypeError):
+            Person.all(file_contents=u'people.xlsx')
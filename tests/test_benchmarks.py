@@ -0,0 +1,42 @@
+import datetime
+import json
+
+from benchmarks import compare, generate, run
+from benchmarks.models import ROW_KINDS, Row
+
+import pytest
+
+
+class TestBenchmarks(object):
+
+    def test_generated_workbook(self, tmpdir):
+        path = str(tmpdir.join('rows.xlsx'))
+        generate.write_workbook(path, [('Data', ['Id', 'Name', 'Text', 'Created', 'Amount', 'Quantity', 'Active'],
+                                        generate.generate_rows(ROW_KINDS, 50, empty_ratio=0))])
+        rows = Row.all(filename=path, cache=False)
+        assert [row.id for row in rows] == list(range(1, 51))
+        assert isinstance(rows[0].created, datetime.datetime)
+        assert rows[0].active in (True, False)
+        assert rows[0].name and rows[0].text
+
+    def test_generated_xls_workbook(self, tmpdir):
+        if generate.xlwt is None:
+            pytest.skip('xlwt is not installed')
+        path = str(tmpdir.join('rows.xls'))
+        generate.write_xls(path, [('Data', ['Id', 'Name', 'Text', 'Created', 'Amount', 'Quantity', 'Active'],
+                                   generate.generate_rows(ROW_KINDS, 50, empty_ratio=0))])
+        rows = Row.all(filename=path, cache=False)
+        assert [row.id for row in rows] == list(range(1, 51))
+        assert isinstance(rows[0].created, datetime.datetime)
+
+    def test_run_and_compare(self, tmpdir):
+        output = str(tmpdir.join('results.json'))
+        run.main(['--rows', '50', '--repeat', '1', '--only', '^rows/', '--workdir', str(tmpdir),
+                  '--output', output])
+        with open(output) as f:
+            document = json.load(f)
+        names = [result['name'] for result in document['results']]
+        assert 'rows/xlsx/all' in names and 'rows/xlsx/get' in names
+        assert all(result['best'] >= 0 for result in document['results'])
+        rows, regressions = compare.compare(compare.load(output), compare.load(output))
+        assert len(rows) == len(names) and not regressions
@@ -0,0 +1,149 @@
+import os
+import shutil
+
+from xlorm import XLSSheetModel, backends, util
+from xlorm.cache import DiskCache, LoadedSheet, SheetCache
+
+from .helpers import from_sample
+from .models import Employee, Person, PersonByName
+
+
+class TestSheetCache(object):
+
+    def test_lru_eviction_and_counters(self):
+        cache = SheetCache(max_entries=2)
+        for name in 'abc':
+            cache.put((Person, 'fp', name), LoadedSheet(Person, 'f', 'S', []))
+        assert len(cache) == 2
+        assert cache.evictions == 1
+        assert cache.get((Person, 'fp', 'a')) is None
+        assert cache.get((Person, 'fp', 'b')) is not None
+        cache.put((Person, 'fp', 'd'), LoadedSheet(Person, 'f', 'S', []))
+        assert (Person, 'fp', 'b') in cache and (Person, 'fp', 'c') not in cache
+        assert cache.info()['hits'] == 1 and cache.info()['misses'] == 1
+
+    def test_bytes_bound(self):
+        values = Person.load_sheets(filename=from_sample('people.xlsx'))[0].values
+        sheet = LoadedSheet(Person, 'f', 'S', values)
+        cache = SheetCache(max_bytes=sheet.approx_size() * 2 - 1)
+        cache.put((Person, 'fp', 'a'), sheet)
+        cache.put((Person, 'fp', 'b'), sheet)
+        assert len(cache) == 1 and cache.nbytes == sheet.approx_size()
+        cache.put((Person, 'fp', 'huge'), LoadedSheet(Person, 'f', 'S', values * 3))
+        assert (Person, 'fp', 'huge') not in cache
+
+    def test_invalidate(self):
+        cache = SheetCache()
+        cache.put((Person, ('/tmp/a.xls', 1, 1), 'S1'), LoadedSheet(Person, 'f', 'S', []))
+        cache.put((Person, ('/tmp/a.xls', 1, 1), 'S2'), LoadedSheet(Person, 'f', 'S', []))
+        cache.put((XLSSheetModel, ('/tmp/b.xls', 1, 1), 'S1'), LoadedSheet(Person, 'f', 'S', []))
+        assert cache.invalidate(sheetname='S2') == 1
+        assert cache.invalidate(model=Person) == 1
+        cache.clear()
+        assert len(cache) == 0 and cache.nbytes == 0
+
+
+class TestModelCache(object):
+
+    def test_all_is_cached_per_file_version(self, tmpdir):
+        filename = str(tmpdir.join('people.xlsx'))
+        shutil.copy(from_sample('people.xlsx'), filename)
+        cache = Person.rows_all_cache
+        hits, misses = cache.hits, cache.misses
+        q = Person.all(filename=filename)
+        assert Person.to_dicts(Person.all(filename=filename)) == Person.to_dicts(q)
+        Person.all(filename=filename, cache=False)
+        assert (cache.hits, cache.misses) == (hits + 1, misses + 1)
+
+        st = os.stat(filename)
+        os.utime(filename, (st.st_atime, st.st_mtime + 10))
+        Person.all(filename=filename)
+        assert (cache.hits, cache.misses) == (hits + 1, misses + 2)
+
+    def test_cached_rows_are_new_models(self):
+        q = Person.all(filename=from_sample('people.xlsx'))
+        q[0].name = 'changed'
+        again = Person.all(filename=from_sample('people.xlsx'))
+        assert again[0] is not q[0] and again[0].name == 'Pedro Duarte'
+        assert [p.row for p in again] == [p.row for p in q]
+
+    def test_file_contents_are_hashed(self):
+        with open(from_sample('people.xlsx'), 'rb') as f:
+            contents = f.read()
+        q = Person.all(file_contents=contents)
+        assert len(q) == 7
+        hits = Person.rows_all_cache.hits
+        assert Person.to_dicts(Person.all(file_contents=contents)) == Person.to_dicts(q)
+        assert Person.rows_all_cache.hits == hits + 1
+        assert Person.invalidate_cache(file_contents=contents) == 1
+        Person.all(file_contents=contents)
+        assert Person.rows_all_cache.hits == hits + 1
+
+    def test_file_contents_are_hashed_once(self, monkeypatch):
+        with open(from_sample('people.xlsx'), 'rb') as f:
+            contents = f.read()
+        hashes = []
+
+        def sha1(data, sha1=util.hashlib.sha1):
+            hashes.append(len(data))
+            return sha1(data)
+        monkeypatch.setattr(util.hashlib, 'sha1', sha1)
+        for _ in range(3):
+            assert PersonByName.get('Daniel Duarte', file_contents=contents).row == 3
+        assert len(hashes) == 1
+        # mutable contents: hashed per load, unless the lookups share a workbook
+        contents = bytearray(contents)
+        workbook = PersonByName.open_workbook(file_contents=contents)
+        for _ in range(3):
+            assert PersonByName.get('Daniel Duarte', file_contents=contents, workbook=workbook).row == 3
+        assert len(hashes) == 2
+
+
+class TestDiskCache(object):
+
+    def _load(self, filename):
+        XLSSheetModel.rows_all_cache.clear()
+        util._sheet_names_cache.clear()
+        return Person.all(filename=filename)
+
+    def test_persisted_rows_skip_reading_the_file(self, tmpdir, monkeypatch):
+        disk_cache = DiskCache(str(tmpdir.join('cache')))
+        monkeypatch.setattr(Person, 'disk_cache', disk_cache)
+        filename = str(tmpdir.join('people.xlsx'))
+        shutil.copy(from_sample('people.xlsx'), filename)
+        q = self._load(filename)
+        assert disk_cache.info()['writes'] == 2  # sheet names and rows
+
+        def fail(*args, **kwargs):
+            raise AssertionError('file opened')
+        monkeypatch.setattr(backends, 'open_book', fail)
+        cached = self._load(filename)
+        assert Person.to_dicts(cached) == Person.to_dicts(q)
+        assert [p.row for p in cached] == [p.row for p in q]
+        assert disk_cache.hits == 2
+
+        # a new file version is a miss and replaces the stale entries
+        monkeypatch.undo()
+        monkeypatch.setattr(Person, 'disk_cache', disk_cache)
+        st = os.stat(filename)
+        os.utime(filename, (st.st_atime, st.st_mtime + 10))
+        assert len(self._load(filename)) == 7
+        assert disk_cache.info()['writes'] == 4 and disk_cache.info()['entries'] == 2
+
+    def test_file_contents_entries_are_bounded(self, tmpdir, monkeypatch):
+        disk_cache = DiskCache(str(tmpdir.join('cache')), max_entries=3)
+        monkeypatch.setattr(Person, 'disk_cache', disk_cache)
+        with open(from_sample('people.xlsx'), 'rb') as f:
+            contents = f.read()
+        for i in range(3):  # new contents each time (sheet names and rows entries)
+            XLSSheetModel.rows_all_cache.clear()
+            assert len(Person.all(file_contents=contents + b'\0' * i)) == 7
+        assert disk_cache.info()['writes'] == 6 and disk_cache.info()['entries'] == 3
+        # the latest ones kept
+        XLSSheetModel.rows_all_cache.clear()
+        Person.all(file_contents=contents + b'\0' * 2)
+        assert disk_cache.info()['writes'] == 6
+
+    def test_model_columns_are_part_of_the_key(self):
+        assert Person.read_plan().fingerprint() == Person.read_plan().fingerprint()
+        assert Person.read_plan().fingerprint() != Employee.read_plan().fingerprint()
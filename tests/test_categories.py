@@ -0,0 +1,99 @@
+import pytest
+
+from xlorm import IntegerColumn, TextColumn, XLSSheetModel
+from xlorm.categories import Categories
+
+from .helpers import write_xlsx
+
+
+class Order(XLSSheetModel):
+    id = IntegerColumn(column_index=0, column_name='Id', is_primary_key=True)
+    status = TextColumn(column_index=1, column_name='Status', strip=True, categorical=True)
+    country = TextColumn(column_index=2, column_name='Country', categorical=True)
+
+    @classmethod
+    def sheetnames(cls, **params):
+        return ['A', 'B']
+
+
+class PlainOrder(Order):
+    status = TextColumn(column_index=1, column_name='Status', strip=True)
+    country = TextColumn(column_index=2, column_name='Country')
+
+
+STATUSES = [u'open', u' open ', u'closed', None, 1.0]
+
+
+def write_orders(path):
+    rows = [[float(i), STATUSES[i % 5], u'PT' if i % 2 else u'ES'] for i in range(20)]
+    return write_xlsx(path, ['Id', 'Status', 'Country'], [('A', rows[:12]), ('B', rows[12:])])
+
+
+class TestCategorical(object):
+
+    def setup_method(self, method):
+        XLSSheetModel.rows_all_cache.clear()
+
+    def test_shared_values(self, tmpdir):
+        path = write_orders(str(tmpdir.join('orders.xlsx')))
+        orders = Order.all(filename=path)
+        assert Order.to_dicts(orders) == PlainOrder.to_dicts(PlainOrder.all(filename=path))
+        assert len(set(id(order.status) for order in orders if order.status == u'open')) == 1
+        assert len(set(id(order.__dict__['country']) for order in orders)) == 2
+        records = Order.all(filename=path, compact=True)
+        assert [r.to_dict() for r in records] == Order.to_dicts(orders)
+        assert Order.where(status=u'open').count(filename=path) == 8
+        # also when built from the rows read by `load_many` workers
+        loaded = Order.load_many([path], workers=1)[0].rows
+        assert Order.to_dicts(loaded) == Order.to_dicts(orders)
+        assert len(set(id(order.status) for order in loaded + orders if order.status == u'open')) == 1
+
+    def test_query_shared_values(self, tmpdir):
+        path = write_orders(str(tmpdir.join('orders.xlsx')))
+        orders = Order.all(filename=path)
+        q = Order.where(country=u'PT').all(filename=path)
+        assert Order.to_dicts(q) == Order.to_dicts([order for order in orders if order.country == u'PT'])
+        assert [order.row for order in q] == [order.row for order in orders if order.country == u'PT']
+        opened = [order.status for order in q + orders if order.status == u'open']
+        assert len(opened) == 12 and len(set(id(status) for status in opened)) == 1
+        assert set(id(order.__dict__['country']) for order in q) == set(id(order.__dict__['country'])
+                                                                        for order in orders if order.country == u'PT')
+        records = Order.where(country=u'PT').only('status').all(filename=path, compact=True)
+        assert [r.status for r in records] == [order.status for order in q]
+        assert set(id(r.status) for r in records if r.status == u'open') == set(id(status) for status in opened)
+
+    def test_categories(self, tmpdir):
+        path = write_orders(str(tmpdir.join('orders.xlsx')))
+        categories = Order.categories('status', filename=path)
+        assert categories.values == [u'open', u'closed', None, u'1']
+        assert categories.decode() == [order.status for order in Order.all(filename=path)]
+        assert Order.load_sheets(filename=path)[1].categories['status'].values == [u'closed', None, u'1', u'open']
+        for attr_name in ('id', 'unknown'):
+            with pytest.raises(AttributeError):
+                Order.categories(attr_name, filename=path)
+
+    def test_group_and_filter(self, tmpdir):
+        path = write_orders(str(tmpdir.join('orders.xlsx')))
+        groups = Order.group_by('status', filename=path)
+        assert list(groups) == [u'open', u'closed', None, u'1']
+        assert [o.id for o in groups[u'open']] == [0, 1, 5, 6, 10, 11, 15, 16]
+        plain = PlainOrder.group_by('status', filename=path)
+        assert [(value, [o.id for o in rows]) for value, rows in groups.items()] == \
+            [(value, [o.id for o in rows]) for value, rows in plain.items()]
+        assert [o.id for o in Order.filter_by(status=u'open', country=u'ES', filename=path)] == [0, 6, 10, 16]
+        assert Order.filter_by(status=u'unknown', filename=path) == []
+
+    def test_categories_merge(self):
+        a = Categories('x', [u'a', u'b', u'a'])
+        b = Categories('x', [u'c', u'a'])
+        a.merge(b)
+        assert a.values == [u'a', u'b', u'c']
+        assert list(a.codes) == [0, 1, 0, 2, 0]
+        assert a.code(u'b') == 1 and a.code(u'z') is None
+
+    def test_export(self, tmpdir):
+        path = write_orders(str(tmpdir.join('orders.xlsx')))
+        out = str(tmpdir.join('out.xlsx'))
+        Order.export(Order.all(filename=path), out)
+        assert [o.status for o in PlainOrder.all(filename=out, sheetnames=['Sheet1'])] == \
+            [o.status for o in Order.all(filename=path)]
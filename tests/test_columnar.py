@@ -0,0 +1,60 @@
+import datetime
+
+import pytest
+
+from xlorm.columnar import Bitmap, KIND__BOOLEAN, KIND__DATE, KIND__INTEGER, KIND__NUMBER, KIND__TEXT
+from xlorm.columnar import date_to_microseconds
+
+from .helpers import from_sample
+from .models import Employee, Person
+
+
+class TestColumnar(object):
+
+    def test_same_values_as_models(self):
+        table = Person.to_columns(filename=from_sample('people.xlsx'))
+        q = Person.all(filename=from_sample('people.xlsx'), cache=False)
+        assert len(table) == len(q) == 7
+        assert list(table.rows) == [p.row for p in q]
+        assert table.sheets == [('Sheet1', 0)]
+        assert table['name'].kind == KIND__TEXT
+        assert table['weight'].kind == KIND__NUMBER
+        assert table['age'].kind == KIND__INTEGER
+        assert table['birthday'].kind == KIND__DATE
+        assert table['active'].kind == KIND__BOOLEAN
+        for attr in ['name', 'bio', 'weight', 'rating', 'age']:
+            assert [table[attr][i] for i in range(len(q))] == [getattr(p, attr) for p in q]
+        assert [table['birthday'][i] for i in range(len(q))] == [date_to_microseconds(p.birthday) for p in q]
+        assert list(table['active'].values) == [p.active for p in q]
+        assert list(table['active'].null_mask) == [p.__dict__['active'] is None for p in q]
+
+    def test_dates_and_times(self):
+        assert date_to_microseconds(datetime.datetime(1970, 1, 2, 0, 0, 1)) == 86401000000
+        assert date_to_microseconds(datetime.date(1969, 12, 31)) == -86400000000
+        assert date_to_microseconds(datetime.time(0, 1, 0, 5)) == 60000005
+        assert date_to_microseconds('04/05/1600 15:00') is None
+
+    def test_missing_optional_column(self):
+        table = Employee.to_columns(filename=from_sample('people.xlsx'))
+        assert len(table['salary']) == 7
+        assert table['salary'].null_mask.count() == 7
+
+    def test_bitmap(self):
+        bitmap = Bitmap()
+        bitmap.extend([True, False] * 5)
+        assert len(bitmap) == 10 and len(bitmap.bits) == 2
+        assert bitmap[8] and not bitmap[-1]
+        assert bitmap.count() == 5
+
+    def test_numpy(self):
+        numpy = pytest.importorskip('numpy')
+        arrays = Person.to_columns(filename=from_sample('people.xlsx')).to_numpy()
+        assert arrays['weight'].dtype == numpy.float64
+        assert arrays['weight'].mask.tolist() == [False] * 5 + [True] * 2
+        assert str(arrays['birthday'][0]) == '1979-11-14T00:00:00.000000'
+
+    def test_pandas(self):
+        pytest.importorskip('pandas')
+        df = Person.to_columns(filename=from_sample('people.xlsx')).to_pandas()
+        assert list(df.index) == list(range(2, 9))
+        assert df['name'].tolist()[:2] == ['Pedro Duarte', 'Daniel Duarte']
@@ -0,0 +1,84 @@
+import csv
+import io
+import zipfile
+
+import pytest
+
+from xlorm import NumberColumn, TextColumn, XLSSheetModel
+from xlorm.export import xml_text
+
+from .helpers import from_sample
+from .models import Person
+
+
+class Sparse(XLSSheetModel):
+    """Unmapped columns between the mapped ones."""
+    name = TextColumn(column_index=1, column_name='Name')
+    amount = NumberColumn(column_index=4, column_name='Amount')
+
+
+class TestExport(object):
+
+    def setup_method(self, method):
+        self.people = Person.all(filename=from_sample('people.xlsx'), cache=False)
+
+    def test_xlsx_round_trip(self, tmpdir):
+        path = str(tmpdir.join('people.xlsx'))
+        assert Person.export(iter(self.people), path) == 7
+        assert Person.to_dicts(Person.all(filename=path, cache=False)) == Person.to_dicts(self.people)
+        compact = Person.all(filename=from_sample('people.xlsx'), compact=True)
+        assert Person.export(compact, path) == 7
+        assert Person.to_dicts(Person.all(filename=path, cache=False)) == Person.to_dicts(self.people)
+
+    def test_csv(self, tmpdir):
+        path = str(tmpdir.join('people.csv'))
+        assert Person.export(self.people, path) == 7
+        with io.open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == [col.column_name for col in Person.read_plan()]
+        assert rows[1][:4] == ['TRUE', 'Pedro Duarte', '1979-11-14T00:00:00', '41']
+        assert rows[1][4] == 'Some multiline\nvery nice bio'
+        assert rows[7] == ['FALSE'] + [''] * 8
+
+    def test_column_positions(self, tmpdir):
+        rows = [{'name': u'a & <b>', 'amount': 1.5}, {'name': u'_x0041_\x01', 'amount': None}]
+        path = str(tmpdir.join('sparse.xlsx'))
+        assert Sparse.export(rows, path) == 2
+        assert [row.__dict__['name'] for row in Sparse.all(filename=path, cache=False)] == [
+            u'a & <b>', u'_x0041_\x01']
+        f = io.StringIO() if str is not bytes else io.BytesIO()
+        Sparse.export(rows, f, format='csv', header=False)
+        assert f.getvalue().splitlines()[0] == ',a & <b>,,,1.5'
+
+    def test_short_rows(self, tmpdir):
+        # no header: the first rows are narrower than the sheet
+        rows = [{'name': u'header'}, {'name': u'a'}, {'name': u'b', 'amount': 2.0}]
+        path = str(tmpdir.join('short.xlsx'))
+        assert Sparse.export(rows, path, header=False) == 3
+        assert [(row.name, row.amount) for row in Sparse.all(filename=path, cache=False)] == [
+            (u'a', None), (u'b', 2.0)]
+
+    def test_destinations(self, tmpdir):
+        path = tmpdir.join('people.xlsx')  # os.PathLike
+        assert Person.export(self.people, path) == 7
+        with zipfile.ZipFile(str(path)) as z:
+            assert b'<dimension ref="A1:I8"/>' in z.read('xl/worksheets/sheet1.xml')
+        f = io.BytesIO()
+        assert Person.export(self.people, f, format='xlsx') == 7
+        assert Person.to_dicts(Person.all(file_contents=f.getvalue(), cache=False)) == Person.to_dicts(self.people)
+        f = io.BytesIO()
+        assert Sparse.export([{'name': u'a\r\nb'}], f, format='csv') == 1
+        assert f.getvalue().decode('utf-8').splitlines()[1] == ',"a'
+        assert not f.closed
+
+    def test_carriage_returns(self, tmpdir):
+        path = str(tmpdir.join('cr.xlsx'))
+        Sparse.export([{'name': u'a\r\nb'}], path)
+        assert Sparse.all(filename=path, cache=False)[0].__dict__['name'] == u'a\r\nb'
+
+    def test_formats(self, tmpdir):
+        with pytest.raises(ValueError):
+            Person.export(self.people, str(tmpdir.join('people.txt')))
+        with pytest.raises(ValueError):
+            Person.export(self.people, io.BytesIO())
+        assert xml_text(u'_x0041_') == u'_x005F_x0041_'
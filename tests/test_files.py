@@ -1,20 +1,7 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
-from xlorm import BooleanColumn, DateColumn, IntegerColumn, NumberColumn, TextColumn, XLSSheetModel
-
 from .helpers import from_sample
-
-
-class Person(XLSSheetModel):
-    active = BooleanColumn(column_index=0, column_name='Active')
-    name = TextColumn(column_index=1, strip=True, multiline=False, column_name='Name')
-    birthday = DateColumn(column_index=2, column_name='Birthday')
-    age = IntegerColumn(column_index=3, column_name='Age')
-    bio = TextColumn(column_index=4, column_name='Bio')
-    weight = NumberColumn(column_index=5, column_name='Weight')
-    rating = NumberColumn(column_index=6, column_name='Rating')
-    wakeup_at = DateColumn(column_index=7, column_name='Wake-up time')
-    event = DateColumn(column_index=8, column_name='Event')
+from .models import Employee, Person
 
 
 class TestOpen(object):
@@ -32,3 +19,49 @@ class TestOpen(object):
         assert q[4].name == 'Marta Fernandes'
         assert q[5].name == 'Empty'
         assert q[6].name is None
+
+
+class TestIter(object):
+
+    def test_iter_yields_same_models_as_all(self):
+        it = Person.iter(filename=from_sample('people.xlsx'))
+        assert not isinstance(it, list)
+        first = next(it)
+        assert first.name == 'Pedro Duarte'
+        assert first.row == 2
+
+        rest = list(it)
+        q = Person.all(filename=from_sample('people.xlsx'))
+        assert [p.to_dict() for p in [first] + rest] == Person.to_dicts(q)
+        assert [p.row for p in q] == list(range(2, 9))
+
+    def test_file_opened_on_first_row(self, monkeypatch):
+        opened = []
+        open_workbook = Person.open_workbook
+        monkeypatch.setattr(Person, 'open_workbook', lambda *args, **kwargs: opened.append(args) or
+                            open_workbook(*args, **kwargs))
+        it = Person.iter(filename=from_sample('people.xlsx'))
+        query = Person.where(age__gt=20).iter(filename=from_sample('people.xlsx'))
+        missing = Person.iter(filename=from_sample('missing.xlsx'))
+        assert opened == []
+        assert next(it).row == 2 and next(query).row == 2
+        assert len(opened) == 2
+        it.close()
+        query.close()
+        del missing  # never started: nothing to close
+
+
+class TestSubclass(object):
+
+    def test_inherited_columns(self):
+        q = Employee.all(filename=from_sample('people.xlsx'))
+        assert len(q) == 7
+        assert q[0].name == 'Pedro Duarte'
+        assert q[0].salary is None
+        assert 'salary' not in q[0].to_dict()
+
+        q[0].salary = 1000.0
+        q[0].name = 'Pedro'
+        assert q[0].to_dict()['salary'] == 1000.0
+        assert q[0].name == 'Pedro'
+        assert Person.all(filename=from_sample('people.xlsx'))[0].name == 'Pedro Duarte'
@@ -0,0 +1,35 @@
+import pytest
+
+from xlorm import TextColumn, XLSSheetModel
+
+from .helpers import from_sample
+from .models import Person, PersonByName
+
+
+class TestGet(object):
+
+    def test_get(self):
+        p = PersonByName.get('Marta Fernandes', filename=from_sample('people.xlsx'))
+        assert p.age == 21
+        assert PersonByName.get('Nobody', filename=from_sample('people.xlsx')) is None
+        # primary key index reused, a new model built
+        p.age = 99
+        again = PersonByName.get('Marta Fernandes', filename=from_sample('people.xlsx'))
+        assert again is not p and again.age == 21
+
+    def test_get_many(self):
+        q = PersonByName.get_many(['Daniel Duarte', 'Nobody', 'Pedro Duarte'], filename=from_sample('people.xlsx'))
+        assert [p and p.age for p in q] == [39, None, 41]
+
+    def test_duplicate_key(self):
+        with pytest.raises(ValueError):
+            PersonByName.get('Pedro Duarte', filename=from_sample('people.xlsx'), sheetnames=['Sheet1', 'Sheet1'])
+
+    def test_no_primary_key(self):
+        with pytest.raises(AttributeError):
+            Person.get('Pedro Duarte', filename=from_sample('people.xlsx'))
+
+    def test_cache_per_model(self):
+        class Other(XLSSheetModel):
+            name = TextColumn(column_index=1, is_primary_key=True)
+        assert Other.get('Pedro Duarte', filename=from_sample('people.xlsx')).__class__ is Other
@@ -0,0 +1,70 @@
+import pytest
+
+from xlorm import IntegerColumn, XLSSheetModel
+
+from .helpers import from_sample
+from .models import IndexedPerson, Person, PersonByName
+
+
+class Age(XLSSheetModel):
+    age = IntegerColumn(column_index=3, column_name='Age')
+    weight = IntegerColumn(column_index=5, column_name='Weight')
+
+
+class TestIndexes(object):
+
+    def test_indexes_built_on_load(self):
+        sheet, = IndexedPerson.load_sheets(filename=from_sample('people.xlsx'))
+        assert sorted(sheet.indexes) == ['active', 'age']
+        active = sheet.models(sheet.indexes['active'][True])
+        assert [p.name for p in active] == ['Pedro Duarte', 'Daniel Duarte', 'Fernanda Ribeiro']
+        # attribute values: raw 41.0 indexed as 41
+        assert [p.name for p in sheet.models(sheet.indexes['age'][41])] == ['Pedro Duarte']
+        assert len(sheet.indexes['age'][None]) == 2
+
+    def test_filter_by(self):
+        people = IndexedPerson.all(filename=from_sample('people.xlsx'))
+        q = IndexedPerson.filter_by(active=False, filename=from_sample('people.xlsx'))
+        assert IndexedPerson.to_dicts(q) == IndexedPerson.to_dicts([p for p in people if not p.active])
+        assert [p.row for p in q] == [p.row for p in people if not p.active]
+        q = IndexedPerson.filter_by(active=True, name='Daniel Duarte', filename=from_sample('people.xlsx'))
+        assert [p.row for p in q] == [3]
+        assert IndexedPerson.filter_by(age=100, filename=from_sample('people.xlsx')) == []
+        # not indexed: scan
+        q = Person.filter_by(name='Marta Fernandes', filename=from_sample('people.xlsx'))
+        assert [p.age for p in q] == [21]
+        with pytest.raises(ValueError):
+            Person.filter_by(filename=from_sample('people.xlsx'))
+
+    def test_indexes_ignore_changed_models(self):
+        for p in IndexedPerson.all(filename=from_sample('people.xlsx')):
+            p.active = not p.active
+            p.age = 100
+        q = IndexedPerson.filter_by(active=True, filename=from_sample('people.xlsx'))
+        assert [p.name for p in q] == ['Pedro Duarte', 'Daniel Duarte', 'Fernanda Ribeiro']
+        assert [p.age for p in q] == [41, 39, 18]
+        assert IndexedPerson.filter_by(age=100, filename=from_sample('people.xlsx')) == []
+        sheet, = IndexedPerson.load_sheets(filename=from_sample('people.xlsx'))
+        assert list(sheet.indexes['active']) == [True, False]
+        assert list(IndexedPerson.group_by('age', filename=from_sample('people.xlsx'))) == [41, 39, 19, 18, 21, None]
+
+    def test_group_by(self):
+        groups = IndexedPerson.group_by('active', filename=from_sample('people.xlsx'),
+                                        sheetnames=['Sheet1', 'Sheet1'])
+        assert list(groups) == [True, False]
+        assert [p.row for p in groups[True]] == [2, 3, 5, 2, 3, 5]
+        assert Person.group_by('active', filename=from_sample('people.xlsx')).keys() == groups.keys()
+        with pytest.raises(AttributeError):
+            Person.group_by('nope', filename=from_sample('people.xlsx'))
+
+    def test_join(self):
+        pairs = Person.join(PersonByName, 'name', filename=from_sample('people.xlsx'))
+        assert [(p.row, o.row) for p, o in pairs] == [(2, 2), (3, 3), (4, 4), (5, 5), (6, 6), (7, 7)]
+
+        pairs = IndexedPerson.join(Age, 'age', outer=True, filename=from_sample('people.xlsx'))
+        assert [(p.name, a and a.age) for p, a in pairs] == [
+            ('Pedro Duarte', 41), ('Daniel Duarte', 39), ('Francisco Martins', 19), ('Fernanda Ribeiro', 18),
+            ('Marta Fernandes', 21), ('Empty', None), (None, None)]
+
+        pairs = Age.join(IndexedPerson, ('weight', 'age'), filename=from_sample('people.xlsx'))
+        assert all(a.weight == p.age for a, p in pairs)
@@ -0,0 +1,33 @@
+from xlorm.parallel import LoadError
+from xlorm.records import CompactRecord
+
+from .helpers import from_sample
+from .models import CleanPerson, Person
+
+
+class TestLoadMany(object):
+
+    def test_ordered_results_and_errors(self):
+        files = [from_sample('people.xlsx'), from_sample('missing.xlsx'), from_sample('people.xlsx')]
+        results = Person.load_many(files, workers=2)
+        assert [r.filename for r in results] == files
+        assert [r.ok for r in results] == [True, False, True]
+        assert isinstance(results[1].error, LoadError)
+        assert results[1].rows == []
+        expected = Person.to_dicts(Person.all(filename=from_sample('people.xlsx'), cache=False))
+        assert Person.to_dicts(results[0].rows) == expected
+        assert [p.row for p in results[2].rows] == list(range(2, 9))
+
+    def test_per_sheet_tasks(self):
+        results = Person.load_many([from_sample('people.xlsx')], sheetnames=['Sheet1', 'Missing'], workers=2)
+        assert not results[0].ok
+        results = Person.load_many([from_sample('people.xlsx')], sheetnames=['Sheet1', 'Sheet1'], workers=1,
+                                   compact=True)
+        assert len(results[0].rows) == 14
+        assert isinstance(results[0].rows[0], CompactRecord)
+        assert results[0].rows[7].row == 2
+
+    def test_built_by_the_model(self):
+        # cleaned on load, as by `all`
+        p = CleanPerson.load_many([from_sample('people.xlsx')], workers=1)[0].rows[0]
+        assert p.__dict__['name__cleaned'] == 'Pedro Duarte'
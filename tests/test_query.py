@@ -0,0 +1,64 @@
+import pytest
+
+from xlorm import NumberColumn, TextColumn, XLSSheetModel
+from xlorm.records import CompactRecord
+
+from .helpers import from_sample, write_xlsx
+from .models import Person
+
+
+class Line(XLSSheetModel):
+    name = TextColumn(column_index=0, column_name='Name', not_null=True)
+    amount = NumberColumn(column_index=1, column_name='Amount')
+
+
+class TestQuery(object):
+
+    def setup_method(self, method):
+        self.people = Person.all(filename=from_sample('people.xlsx'), cache=False)
+
+    def test_filters(self):
+        q = Person.where(active=True, age__gt=20).all(filename=from_sample('people.xlsx'))
+        assert [p.name for p in q] == ['Pedro Duarte', 'Daniel Duarte']
+        assert [p.to_dict() for p in q] == [p.to_dict() for p in self.people if p.active and p.age > 20]
+
+        q = Person.where(name__startswith='F').where(weight__lte=60).all(filename=from_sample('people.xlsx'))
+        assert [p.name for p in q] == ['Francisco Martins']
+        q = Person.where(name__in=['Empty', 'Marta Fernandes']).all(filename=from_sample('people.xlsx'))
+        assert [p.row for p in q] == [6, 7]
+        q = Person.where(age__isnull=True).all(filename=from_sample('people.xlsx'))
+        assert [p.name for p in q] == ['Empty', None]
+        assert Person.where(name='Nobody').first(filename=from_sample('people.xlsx')) is None
+        assert Person.where(name__contains='Duarte').count(filename=from_sample('people.xlsx')) == 2
+
+    def test_projection(self):
+        q = Person.where(bio__contains='multiline').only('name').all(filename=from_sample('people.xlsx'))
+        assert [p.to_dict() for p in q] == [{'name': 'Pedro Duarte', 'active': False},
+                                            {'name': 'Francisco Martins', 'active': False}]
+        # same rows as without projection (rows without data are still skipped)
+        q = Person.only('bio').all(filename=from_sample('people.xlsx'))
+        assert len(q) == len(self.people)
+        assert [p.bio for p in q] == [p.bio for p in self.people]
+
+    def test_compact(self):
+        r = Person.where(age=19).first(filename=from_sample('people.xlsx'), compact=True)
+        assert isinstance(r, CompactRecord)
+        assert (r.name, r.row) == ('Francisco Martins', 4)
+
+    def test_row_numbers(self, tmpdir):
+        # rows skipped (no data, null name) before the matching ones: numbered as by `all`
+        path = write_xlsx(tmpdir.join('lines.xlsx'), ['Name', 'Amount'], [
+            ('Sheet1', [[u'a', 1.0], [None, None], [None, 2.0], [u'b', 3.0], [u'c', 4.0]])])
+        rows = dict((line.name, line.row) for line in Line.all(filename=path, cache=False))
+        assert rows == {u'a': 2, u'b': 3, u'c': 4}
+        q = Line.where(amount__gte=3).all(filename=path)
+        assert [(line.name, line.row) for line in q] == [(u'b', 3), (u'c', 4)]
+        assert Line.where(name=u'c').first(filename=path, compact=True).row == 4
+
+    def test_unknown_columns(self):
+        with pytest.raises(AttributeError):
+            Person.where(nope=1)
+        with pytest.raises(AttributeError):
+            Person.where(age__between=1)
+        with pytest.raises(AttributeError):
+            Person.only('nope')
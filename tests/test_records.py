@@ -0,0 +1,36 @@
+from xlorm.records import CompactRecord
+
+from .helpers import from_sample
+from .models import CachedPerson, Employee, Person
+
+
+class TestCompactRecords(object):
+
+    def test_same_attributes_as_models(self):
+        q = Person.all(filename=from_sample('people.xlsx'), cache=False)
+        records = Person.all(filename=from_sample('people.xlsx'), compact=True)
+        assert len(records) == len(q) == 7
+        for p, r in zip(q, records):
+            assert isinstance(r, CompactRecord)
+            assert r.to_dict() == p.to_dict()
+            assert r.to_dict(include_none=True) == p.to_dict(include_none=True)
+            assert (r.row, r.filename, r.sheetname, r.sheetname__) == (p.row, p.filename, p.sheetname, p.sheetname__)
+            assert str(r) == str(p)
+            assert r.to_model().to_dict() == p.to_dict()
+
+    def test_slots_and_shared_sheet_metadata(self):
+        records = list(Employee.iter(filename=from_sample('people.xlsx'), compact=True))
+        assert not hasattr(records[0], '__dict__')
+        assert records[0]._sheet is records[1]._sheet
+        assert Employee.record_class() is records[0].__class__
+        assert Employee.record_class().__name__ == 'EmployeeRecord'
+
+    def test_set_and_text_cache(self):
+        r = CachedPerson.all(filename=from_sample('people.xlsx'), compact=True)[0]
+        assert r.name == 'Pedro Duarte'
+        assert r._c_name == 'Pedro Duarte'
+        assert not hasattr(Person.record_class(), '_c_name')
+        r.name = '  Pedro  '
+        assert r.name == 'Pedro'
+        r.age = 42.0
+        assert r.age == 42
@@ -0,0 +1,100 @@
+from xlorm import IntegerColumn, NumberColumn, TextColumn, XLSSheetModel
+from xlorm import reload, xlsx
+
+from .helpers import write_xlsx
+
+
+HEADER = ['Id', 'Name', 'Amount']
+
+
+class Item(XLSSheetModel):
+    id = IntegerColumn(column_index=0, column_name='Id', is_primary_key=True)
+    name = TextColumn(column_index=1, column_name='Name')
+    amount = NumberColumn(column_index=2, column_name='Amount')
+
+    @classmethod
+    def sheetnames(cls, **params):
+        return ['A', 'B', 'C']
+
+
+class Value(XLSSheetModel):
+    """No primary key."""
+    name = TextColumn(column_index=1, column_name='Name')
+
+    @classmethod
+    def sheetnames(cls, **params):
+        return ['A', 'B', 'C']
+
+
+def sheets(b_rows=None, b_name=u'b', c_sheet=True):
+    result = [
+        ('A', [[float(i), u'a%d' % i, 1.5] for i in range(1, 4)]),
+        ('B', b_rows or [[float(i), b_name, 2.0] for i in range(4, 7)]),
+    ]
+    if c_sheet:
+        result.append(('C', [[7.0, u'c', 3.0]]))
+    return result
+
+
+class TestReload(object):
+
+    def test_first_load(self, tmpdir):
+        path = write_xlsx(tmpdir.join('v1.xlsx'), HEADER, sheets())
+        snapshot = Item.reload(filename=path)
+        assert snapshot.changed_sheets == ['A', 'B', 'C']
+        with Item.open_workbook(path) as workbook:
+            assert snapshot.sheets['B'].content_hash == reload.sheet_content_hash(
+                workbook.sheet('B'), Item.HEADER__NUM_ROWS_SKIP, Item.read_plan().width)
+        assert [row.id for row in snapshot.rows] == list(range(1, 8))
+        assert [row.id for row in snapshot.diff.added] == list(range(1, 8))
+
+    def test_only_changed_sheets_are_read(self, tmpdir, monkeypatch):
+        parsed = []
+        iter_rows = xlsx.XlsxSheet.iter_rows
+
+        def parse(sheet, *args):
+            parsed.append(sheet.name)
+            return iter_rows(sheet, *args)
+        monkeypatch.setattr(xlsx.XlsxSheet, 'iter_rows', parse)
+        # each sheet parsed once, hashed while loaded
+        v1 = Item.reload(filename=write_xlsx(tmpdir.join('v1.xlsx'), HEADER, sheets()))
+        assert parsed == ['A', 'B', 'C']
+        del parsed[:]
+
+        # same shared strings: only the edited sheet is parsed
+        rows = [[4.0, u'b', 2.0], [5.0, u'b', 20.0], [8.0, u'b', 2.0]]
+        v2 = Item.reload(v1, filename=write_xlsx(tmpdir.join('v2.xlsx'), HEADER, sheets(b_rows=rows)))
+        assert parsed == ['B']
+        assert v2.changed_sheets == ['B']
+        assert v2.sheets['A'].sheet is v1.sheets['A'].sheet
+        assert [row.id for row in v2.diff.added] == [8]
+        assert [row.id for row in v2.diff.removed] == [6]
+        assert [(old.amount, new.amount) for old, new in v2.diff.changed] == [(2.0, 20.0)]
+
+        # new shared strings: the sheets are read (hashed) again, only the changed one kept
+        del parsed[:]
+        path = write_xlsx(tmpdir.join('v3.xlsx'), HEADER,
+                          sheets(b_rows=rows, c_sheet=False) + [('C', [[7.0, u'new', 3.0]])])
+        v3 = Item.reload(v2, filename=path)
+        assert parsed == ['A', 'B', 'C']
+        assert v3.changed_sheets == ['C']
+        assert [(old.name, new.name) for old, new in v3.diff.changed] == [(u'c', u'new')]
+        # unchanged sheets served from the cache
+        hits = Item.rows_all_cache.hits
+        assert Item.all(filename=path)[0].to_dict() == v1.rows[0].to_dict()
+        assert Item.rows_all_cache.hits == hits + 3  # A, B and C
+
+    def test_no_changes(self, tmpdir):
+        v1 = Item.reload(filename=write_xlsx(tmpdir.join('v1.xlsx'), HEADER, sheets()))
+        v2 = Item.reload(v1, filename=write_xlsx(tmpdir.join('v2.xlsx'), HEADER, sheets()))
+        assert v2.changed_sheets == [] and not v2.diff
+        assert Item.to_dicts(v2.rows) == Item.to_dicts(v1.rows)
+
+    def test_removed_sheet_and_no_primary_key(self, tmpdir):
+        v1 = Value.reload(filename=write_xlsx(tmpdir.join('v1.xlsx'), HEADER, sheets()))
+        v2 = Value.reload(v1, filename=write_xlsx(tmpdir.join('v2.xlsx'), HEADER, sheets(b_name=u'x')),
+                          sheetnames=['A', 'B'])
+        assert v2.removed_sheets == ['C']
+        assert sorted(row.name for row in v2.diff.removed) == [u'b', u'b', u'b', u'c']
+        assert [row.name for row in v2.diff.added] == [u'x', u'x', u'x']
+        assert v2.diff.changed == []
@@ -0,0 +1,112 @@
+import os
+import sqlite3
+
+import pytest
+
+from xlorm import IntegerColumn, TextColumn, XLSSheetModel
+
+from .helpers import from_sample, write_xlsx
+from .models import IndexedPerson, Person, PersonByName
+
+
+class Item(XLSSheetModel):
+    id = IntegerColumn(column_index=0, column_name='Id', is_primary_key=True)
+    name = TextColumn(column_index=1, column_name='Name')
+
+    @classmethod
+    def sheetnames(cls, **params):
+        return params.get('sheetnames') or ['A', 'B']
+
+
+class ItemName(XLSSheetModel):
+    """Another read plan for the same table."""
+    name = TextColumn(column_index=1, column_name='Name')
+
+    @classmethod
+    def sheetnames(cls, **params):
+        return ['A', 'B']
+
+
+def write_items(path, b_name=u'b', mtime=None):
+    return write_xlsx(path, ['Id', 'Name'], [('A', [[float(i), u'a%d' % i] for i in range(1, 4)]),
+                                             ('B', [[float(i), b_name] for i in range(4, 6)])], mtime=mtime)
+
+
+def indexes(conn, table):
+    return sorted(name for name, in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,)))
+
+
+class TestToSqlite(object):
+
+    def setup_method(self, method):
+        self.conn = sqlite3.connect(':memory:')
+
+    def test_types_and_values(self):
+        assert Person.to_sqlite(self.conn, filename=from_sample('people.xlsx')) == 7
+        types = [(name, sql_type) for _, name, sql_type, _, _, _ in self.conn.execute('PRAGMA table_info(Person)')]
+        assert types == [('source', 'TEXT'), ('sheetname', 'TEXT'), ('row', 'INTEGER'), ('active', 'INTEGER'),
+                         ('name', 'TEXT'), ('birthday', 'TEXT'), ('age', 'INTEGER'), ('bio', 'TEXT'),
+                         ('weight', 'REAL'), ('rating', 'REAL'), ('wakeup_at', 'TEXT'), ('event', 'TEXT')]
+        assert self.conn.execute('SELECT DISTINCT source FROM Person').fetchall() == [
+            (os.path.abspath(from_sample('people.xlsx')),)]
+        rows = self.conn.execute('SELECT row, active, name, birthday, age, wakeup_at FROM Person ORDER BY row')
+        assert list(rows)[0] == (2, 1, u'Pedro Duarte', u'1979-11-14 00:00:00', 41, u'08:00:00')
+        people = Person.all(filename=from_sample('people.xlsx'))
+        expected = [(p.row, p.name, p.age) for p in people if (p.age or 0) > 30]
+        assert self.conn.execute('SELECT row, name, age FROM Person WHERE age > 30 ORDER BY row').fetchall() == \
+            expected
+
+    def test_indexes(self):
+        PersonByName.to_sqlite(self.conn, table='people', filename=from_sample('people.xlsx'))
+        assert indexes(self.conn, 'people') == ['people__name', 'people__sheet_row']
+        IndexedPerson.to_sqlite(self.conn, filename=from_sample('people.xlsx'))
+        assert indexes(self.conn, 'IndexedPerson') == [
+            'IndexedPerson__active', 'IndexedPerson__age', 'IndexedPerson__sheet_row']
+        plan = self.conn.execute('EXPLAIN QUERY PLAN SELECT * FROM people WHERE name = ?', ('x',)).fetchall()
+        assert 'people__name' in plan[0][-1]
+
+    def test_resync(self, tmpdir):
+        path = write_items(str(tmpdir.join('items.xlsx')), mtime=1000000000)
+        assert Item.to_sqlite(self.conn, filename=path) == 5
+        assert Item.to_sqlite(self.conn, filename=path) == 0
+
+        write_items(path, b_name=u'changed', mtime=1000000100)
+        assert Item.to_sqlite(self.conn, filename=path) == 5
+        assert self.conn.execute('SELECT DISTINCT name FROM Item WHERE sheetname = ?', ('B',)).fetchall() == [
+            (u'changed',)]
+        assert self.conn.execute('SELECT count(*) FROM Item').fetchone() == (5,)
+
+        # sheets not loaded anymore are removed
+        assert Item.to_sqlite(self.conn, filename=path, sheetnames=['A']) == 0
+        assert self.conn.execute('SELECT DISTINCT sheetname FROM Item').fetchall() == [(u'A',)]
+
+        # other columns: the table is rebuilt
+        assert ItemName.to_sqlite(self.conn, table='Item', filename=path) == 5
+        assert [col[1] for col in self.conn.execute('PRAGMA table_info(Item)')] == [
+            'source', 'sheetname', 'row', 'name']
+
+    def test_sources(self, tmpdir):
+        first = write_items(str(tmpdir.join('first.xlsx')))
+        second = write_items(str(tmpdir.join('second.xlsx')), b_name=u'second')
+        assert Item.to_sqlite(self.conn, filename=first) == 5
+        assert Item.to_sqlite(self.conn, filename=second) == 5
+        assert Item.to_sqlite(self.conn, filename=first) == 0
+        assert self.conn.execute('SELECT count(*) FROM Item').fetchone() == (10,)
+        assert Item.to_sqlite(self.conn, filename=second, sheetnames=['B']) == 0
+        assert self.conn.execute('SELECT source, count(*) FROM Item GROUP BY source ORDER BY source').fetchall() == [
+            (first, 5), (second, 2)]
+        with open(first, 'rb') as f:
+            assert Item.to_sqlite(self.conn, file_contents=f.read(), filename='upload.xlsx') == 5
+        assert self.conn.execute("SELECT count(*) FROM Item WHERE source = 'upload.xlsx'").fetchone() == (5,)
+
+    def test_existing_tables(self, tmpdir):
+        path = write_items(str(tmpdir.join('items.xlsx')))
+        # same columns, no synced sources: used as is
+        self.conn.execute('CREATE TABLE Item (source TEXT, sheetname TEXT, row INTEGER, id INTEGER, name TEXT)')
+        assert Item.to_sqlite(self.conn, filename=path) == 5
+        # other columns: not replaced
+        self.conn.execute('CREATE TABLE Other (id INTEGER)')
+        with pytest.raises(ValueError):
+            Item.to_sqlite(self.conn, table='Other', filename=path)
+        assert self.conn.execute('SELECT count(*) FROM Other').fetchone() == (0,)
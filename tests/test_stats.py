@@ -0,0 +1,67 @@
+import logging
+
+from xlorm import IntegerColumn, LoadStats, TextColumn, XLSSheetModel
+from xlorm.stats import PHASES
+
+from .helpers import from_sample
+from .models import Person
+
+
+class AdultName(XLSSheetModel):
+    name = TextColumn(column_index=1, column_name='Name', not_null=True,
+                      values=['Pedro Duarte', 'Daniel Duarte', 'Marta Fernandes'])
+    age = IntegerColumn(column_index=3, column_name='Age', excludes=[18])
+
+
+class TestLoadStats(object):
+
+    def test_counts_and_timings(self):
+        stats = LoadStats()
+        rows = Person.all(filename=from_sample('people.xlsx'), cache=False, stats=stats)
+        assert stats.sheets == 1
+        assert stats.rows_scanned == 7
+        assert stats.rows_returned == len(rows) == 7
+        assert sum(stats.rows_skipped.values()) == 0
+        assert list(stats.timings) == list(PHASES)
+        assert all(seconds >= 0 for seconds in stats.timings.values())
+        assert stats.timings['parse'] > 0 and stats.timings['convert'] > 0
+        assert '1 sheet(s)' in str(stats)
+
+    def test_cached_sheets(self):
+        Person.all(filename=from_sample('people.xlsx'))
+        stats = LoadStats()
+        Person.all(filename=from_sample('people.xlsx'), stats=stats)
+        assert (stats.sheets, stats.cached_sheets, stats.rows_scanned) == (0, 1, 0)
+
+    def test_skipped_and_invalid(self, caplog):
+        invalid = []
+        sheets = []
+        stats = LoadStats(max_samples=1, on_invalid=lambda *args: invalid.append(args), on_sheet=sheets.append)
+        with caplog.at_level(logging.WARNING):
+            rows = AdultName.all(filename=from_sample('people.xlsx'), cache=False, stats=stats)
+        assert [r.name for r in rows] == ['Pedro Duarte', 'Daniel Duarte', None, 'Marta Fernandes']
+        assert (stats.rows_scanned, stats.rows_returned) == (7, 4)
+        assert stats.rows_skipped['excluded'] == 1
+        assert stats.rows_skipped['not_null'] == 1
+        assert stats.rows_skipped['no_data'] == 1  # invalid name and no age
+        # values are validated before the row is excluded (age 18)
+        assert stats.invalid_count == 3
+        assert [args[2:] for args in invalid] == [(4, 2, 'Francisco Martins'), (5, 2, 'Fernanda Ribeiro'),
+                                                  (7, 2, 'Empty')]
+        assert stats.invalid['Name'].samples == [('Sheet1', 4, 2, 'Francisco Martins')]
+        assert [s.sheetname for s in sheets] == ['Sheet1']
+        # a single warning per sheet
+        warnings = [r for r in caplog.records if 'invalid' in r.getMessage()]
+        assert len(warnings) == 1
+        assert 'Column "Name" has 3 invalid value(s)' in warnings[0].getMessage()
+
+    def test_query_and_columns(self):
+        stats = LoadStats()
+        rows = Person.where(active=True).all(filename=from_sample('people.xlsx'), stats=stats)
+        assert (stats.rows_scanned, stats.rows_returned, stats.rows_skipped['filtered']) == (7, len(rows), 4)
+
+        stats = LoadStats()
+        table = AdultName.to_columns(filename=from_sample('people.xlsx'), stats=stats)
+        assert (stats.rows_scanned, stats.rows_returned) == (7, len(table))
+        assert stats.invalid_count == 3
+        assert stats.to_dict()['rows_skipped']['excluded'] == 1
@@ -0,0 +1,177 @@
+import datetime
+
+import pytest
+
+import xlorm
+from xlorm import backends, util
+from xlorm.stats import LoadStats, SKIP__EXCLUDED, SKIP__NOT_NULL
+from xlorm.util import ColumnPlan, DateError, ReadPlan, Workbook, compile_read_plan, convert_cell_value
+from xlorm.util import convert_date_values, get_row_as_dict, get_xls_sheet_names, remove_control_chars
+
+import xlrd
+
+from .helpers import from_sample
+from .models import CachedPerson, CleanPerson, Person
+
+
+class TestReadPlan(object):
+
+    def test_plan_is_compiled_once_per_class(self):
+        plan = Person.read_plan()
+        assert isinstance(plan, ReadPlan)
+        assert Person.read_plan() is plan
+        assert [col.column_index for col in plan] == list(range(9))
+        assert plan.width == 9
+
+    def test_legacy_conf_tuples(self):
+        sheet = xlrd.open_workbook(from_sample('people.xlsx')).sheet_by_index(0)
+        legacy = {
+            'name': (1, xlrd.XL_CELL_TEXT, 'Name'),
+            'age': (3, xlrd.XL_CELL_NUMBER, 'Age', False, True),
+            'missing': (20, xlrd.XL_CELL_TEXT, 'Missing', True),
+        }
+        assert compile_read_plan(legacy).width == 21
+        assert get_row_as_dict(sheet, 1, legacy) == {'name': 'Pedro Duarte', 'age': 41.0}
+        # not null `age`
+        assert get_row_as_dict(sheet, 6, legacy) is None
+
+    def test_column_checks(self):
+        col = ColumnPlan('status', 0, not_null=True, excludes=['x'], values=['a', 'b'])
+        assert col.check('a') == ('a', None)
+        assert col.check('x') == ('x', SKIP__EXCLUDED)
+        assert col.check(None) == (None, SKIP__NOT_NULL)
+        stats = LoadStats().sheet('Sheet1')
+        assert col.check('c', 'Sheet1', 3, stats) == (None, None)
+        assert list(stats.invalid) == ['status'] and stats.rows_skipped[SKIP__EXCLUDED] == 0
+        col = ColumnPlan('created', 0, ignore_data_error=True)
+        assert col.read_cell(xlrd.XL_CELL_DATE, -1.0) == (None, None)
+        assert not col.has_data(xlrd.XL_CELL_DATE, -1.0) and col.has_data(xlrd.XL_CELL_TEXT, 'a')
+        col = ColumnPlan('created', 0)
+        with pytest.raises(xlrd.xldate.XLDateError):
+            col.read_cell(xlrd.XL_CELL_DATE, -1.0)
+
+
+class TestWorkbook(object):
+
+    def _count_opens(self, monkeypatch):
+        opens = []
+        open_book = backends.open_book
+
+        def counting_open_book(*args, **kwargs):
+            book = open_book(*args, **kwargs)
+            opens.append(book.__class__.__name__)
+            return book
+        monkeypatch.setattr(backends, 'open_book', counting_open_book)
+        return opens
+
+    def test_single_open_per_load(self, monkeypatch):
+        opens = self._count_opens(monkeypatch)
+        q = Person.all(filename=from_sample('people.xlsx'), cache=False)
+        assert len(q) == 7
+        assert opens == ['XlsxBook']
+
+    def test_xlrd_backend_opens_on_demand(self, monkeypatch):
+        opens = []
+        open_workbook = xlrd.open_workbook
+
+        def counting_open_workbook(*args, **kwargs):
+            opens.append(kwargs.get('on_demand'))
+            return open_workbook(*args, **kwargs)
+        monkeypatch.setattr(xlrd, 'open_workbook', counting_open_workbook)
+        with Workbook(from_sample('people.xlsx'), backend='xlrd') as workbook:
+            assert len(list(workbook.iter_sheet('Sheet1', Person.read_plan(), 1))) == 7
+        assert opens == [True]
+
+    def test_no_open_when_cached(self, monkeypatch):
+        Person.all(filename=from_sample('people.xlsx'))
+        opens = self._count_opens(monkeypatch)
+        Person.all(filename=from_sample('people.xlsx'))
+        assert opens == []
+
+    def test_workbook_session(self):
+        with Workbook(from_sample('people.xlsx')) as workbook:
+            assert not workbook.is_open
+            assert get_xls_sheet_names(workbook=workbook) == ['Sheet1']
+            rows = list(workbook.iter_sheet('Sheet1', Person.read_plan(), 1))
+            assert len(rows) == 7
+        assert not workbook.is_open
+
+
+class TestTextCleaning(object):
+
+    def test_remove_control_chars(self):
+        assert remove_control_chars(u'abc') == u'abc'
+        assert remove_control_chars(u'a\x00b\u200bc\td\xa0e') == u'abcd\xa0e'
+        assert remove_control_chars(u'') == u''
+
+    def test_cleaned_value_cache(self, monkeypatch):
+        p = CachedPerson.all(filename=from_sample('people.xlsx'), cache=False)[0]
+        assert p.bio == 'Some multiline\nvery nice bio'
+        calls = []
+        monkeypatch.setattr(xlorm, 'str_clean_value', lambda value, **kwargs: calls.append(value) or value)
+        assert p.bio == 'Some multiline\nvery nice bio'
+        assert calls == []
+        p.bio = ' new bio '
+        assert p.bio == ' new bio '
+        assert calls == [' new bio ']
+
+    def test_not_cached_by_default(self):
+        p = Person.all(filename=from_sample('people.xlsx'), cache=False)[0]
+        attrs = dict(vars(p))
+        assert p.name == 'Pedro Duarte' and p.bio == 'Some multiline\nvery nice bio'
+        assert vars(p) == attrs
+
+    def test_clean_on_load(self):
+        p = CleanPerson.all(filename=from_sample('people.xlsx'), cache=False)[0]
+        assert p.__dict__['name__cleaned'] == 'Pedro Duarte'
+        assert 'bio__cleaned' not in p.__dict__
+        assert p.bio == 'Some multiline very nice bio'
+        assert 'bio__cleaned' not in p.__dict__
+
+
+class TestDateConversion(object):
+
+    def test_values(self):
+        assert convert_cell_value(xlrd.XL_CELL_DATE, 43831.5, 0) == datetime.datetime(2020, 1, 1, 12)
+        assert convert_cell_value(xlrd.XL_CELL_DATE, 0.395833333, 0) == datetime.time(9, 30)
+        assert convert_cell_value(xlrd.XL_CELL_DATE, 0.0, 1) == datetime.time(0, 0)
+        # google spreadsheets negative times
+        assert convert_cell_value(xlrd.XL_CELL_DATE, -0.604166667, 0) == datetime.time(9, 30)
+        assert convert_cell_value(xlrd.XL_CELL_DATE, -0.604166667, 1) == datetime.datetime(1904, 1, 3, 9, 30)
+        assert convert_cell_value(xlrd.XL_CELL_DATE, -5.0, 0) == -5.0
+        with pytest.raises(xlrd.xldate.XLDateAmbiguous):
+            convert_cell_value(xlrd.XL_CELL_DATE, 30.0, 0)
+
+    def test_same_values_as_xlrd(self):
+        for datemode in (0, 1):
+            for value in [0.5, 1.0, 59.99999999, 60.0, 61.0, 61.00000579, 43831.999999999, 2957003.5, 2958465.99999999]:
+                try:
+                    dt_ = xlrd.xldate_as_tuple(value, datemode)
+                except xlrd.xldate.XLDateError as e:
+                    with pytest.raises(e.__class__):
+                        convert_cell_value(xlrd.XL_CELL_DATE, value, datemode)
+                    continue
+                expected = datetime.time(*dt_[3:]) if dt_[:3] == (0, 0, 0) else datetime.datetime(*dt_)
+                assert convert_cell_value(xlrd.XL_CELL_DATE, value, datemode) == expected
+
+    def test_memoized(self, monkeypatch):
+        calls = []
+        xldate_value = util._xldate_value
+        monkeypatch.setattr(util, '_xldate_value', lambda *args: calls.append(args) or xldate_value(*args))
+        monkeypatch.setattr(util, '_date_caches', {})
+        values = [convert_cell_value(xlrd.XL_CELL_DATE, 43000.25, 0) for _ in range(3)]
+        assert values == [datetime.datetime(2017, 9, 22, 6)] * 3
+        assert len(calls) == 1
+        for _ in range(2):  # errors are memoized too, and raised every time
+            with pytest.raises(xlrd.xldate.XLDateAmbiguous):
+                convert_cell_value(xlrd.XL_CELL_DATE, 30.0, 0)
+        assert len(calls) == 2
+
+    def test_batch(self):
+        ctypes = [xlrd.XL_CELL_DATE, xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_TEXT, xlrd.XL_CELL_DATE, xlrd.XL_CELL_DATE]
+        values = [43831.0, u'', u'x', 43831.0, 30.0]
+        result = convert_date_values(ctypes, values, 0)
+        assert result[:4] == [datetime.datetime(2020, 1, 1), None, u'x', datetime.datetime(2020, 1, 1)]
+        assert isinstance(result[4], DateError)
+        with pytest.raises(xlrd.xldate.XLDateAmbiguous):
+            result[4].raise_error()
@@ -1,11 +1,42 @@
+import itertools
 import logging
+import os
 
 import xlrd
 import xlrd.xldate
 
+from .cache import DiskCache  # noqa: F401
+from .cache import LoadedSheet
+from .cache import SheetCache
+from .categories import CATEGORY_CACHE__MAX_SIZE
+from .categories import Categories
+from .categories import categorical_columns
+from .columnar import load_columns
+from .export import export_models
+from .indexes import attribute_getter
+from .indexes import filter_sheets
+from .indexes import group_sheets
+from .indexes import hash_join
+from .indexes import index_columns
+from .parallel import load_many
+from .query import Query
+from .records import SheetInfo
+from .records import build_record_class
+from .reload import reload_sheets
+from .sqlite import sync_sheets
+from .stats import LoadStats  # noqa: F401
+from .stats import PHASE__BUILD
+from .stats import timer
+from .util import ColumnPlan
+from .util import ReadPlan
+from .util import Workbook
+from .util import compile_read_plan
+from .util import file_fingerprint
 from .util import get_xls_sheet_names
-from .util import read_xls_sheet
+from .util import iter_xls_sheet  # noqa: F401
+from .util import read_xls_sheet  # noqa: F401
 from .util import str_clean_value
+from .util import string_types
 from .util import text_type
 
 
@@ -13,7 +44,7 @@ class Column(object):
 
     def __init__(self, column_index, column_name=None, default_value=None,
                  optional=False, not_null=False, excludes=[], is_primary_key=False,
-                 ignore_data_error=False, values=None, **params):
+                 ignore_data_error=False, values=None, indexed=False, **params):
         self.column_index = column_index
         self.column_name = column_name if column_name is not None else 'column' + str(column_index)
         # TODO: validate default value against column type
@@ -26,44 +57,105 @@ class Column(object):
         self.is_primary_key = is_primary_key
         self.ignore_data_error = ignore_data_error
         self.values = values
+        # secondary index on the attribute values, built when a sheet is loaded (see `XLSSheetModel.filter_by`)
+        self.indexed = indexed
+
+    # name of the model attribute holding the column (set by `__set_name__` or `XLSSheetModel._columns`)
+    attr_name = None
+
+    def __set_name__(self, owner, name):
+        self.attr_name = name
 
     def __get__(self, instance, owner):
         if instance is None:
             raise AttributeError(u'Instance level access only')
 
-        cls = instance.__class__
-        for att_name in cls.__dict__.keys():
-            if self is cls.__dict__[att_name]:
-                return instance.__dict__[att_name]
-        raise AttributeError(self.var)
+        try:
+            return self.python_value(instance.__dict__[self.attr_name])
+        except KeyError:
+            raise AttributeError(self.attr_name)
 
     def __set__(self, instance, value):
         if instance is None:
             raise AttributeError(u'Instance level access only')
 
-        cls = instance.__class__
-        for att_name in cls.__dict__.keys():
-            if self is cls.__dict__[att_name]:
-                instance.__dict__[att_name] = value
-                return
-        raise AttributeError(self.var)
+        instance.__dict__[self.attr_name] = value
+
+    def python_value(self, value):
+        """Returns the attribute value for the given raw (stored) cell value."""
+        return value
 
 
 class TextColumn(Column):
+    """Text column: values are cleaned (see `str_clean_value`) when read, optionally cached in the instance (`cache`,
+    `clean_on_load`). A `categorical` column cleans each distinct value once, shared by all the rows."""
 
     def __init__(self, strip=False, multiline=True, line_joiner=' ',
-                 clean_multi_spaces=True, **params):
+                 clean_multi_spaces=True, cache=False, clean_on_load=False, categorical=False, **params):
 
         self.strip = strip
         self.clean_multi_spaces = clean_multi_spaces
         self.multiline = multiline
         self.line_joiner = line_joiner
+        self.cache = cache or clean_on_load or categorical
+        self.clean_on_load = clean_on_load
+        self.categorical = categorical
+        self._categories = {}  # {raw value: (raw value, cleaned value)} (see `category`)
+        self._cleaned = {}  # {cleaned value: cleaned value}: one string per distinct cleaned value
 
         super(TextColumn, self).__init__(**params)
 
+    def __set_name__(self, owner, name):
+        super(TextColumn, self).__set_name__(owner, name)
+        # instance attribute holding the cleaned value
+        self.cache_key = name + '__cleaned'
+
     def __get__(self, instance, owner):
-        val = super(TextColumn, self).__get__(instance, owner)
-        return str_clean_value(val, default=self.default_value,
+        if instance is None:
+            raise AttributeError(u'Instance level access only')
+
+        d = instance.__dict__
+        try:
+            return d[self.cache_key]
+        except KeyError:
+            pass
+        try:
+            value = self.python_value(d[self.attr_name])
+        except KeyError:
+            raise AttributeError(self.attr_name)
+        if self.cache:
+            d[self.cache_key] = value
+        return value
+
+    def __set__(self, instance, value):
+        if instance is None:
+            raise AttributeError(u'Instance level access only')
+
+        d = instance.__dict__
+        d[self.attr_name] = value
+        d.pop(self.cache_key, None)
+
+    def category(self, value):
+        """Returns the shared (raw value, cleaned value) strings of a raw value of a `categorical` column."""
+        key = value if value.__class__ is text_type else (value.__class__, value)  # 1.0 == True
+        categories = self._categories
+        try:
+            return categories[key]
+        except KeyError:
+            if len(categories) >= CATEGORY_CACHE__MAX_SIZE:
+                categories.clear()
+                self._cleaned.clear()
+            cleaned = self.clean_value(value)
+            entry = categories[key] = (value, self._cleaned.setdefault(cleaned, cleaned))
+            return entry
+
+    def python_value(self, value):
+        if self.categorical:
+            return self.category(value)[1]
+        return self.clean_value(value)
+
+    def clean_value(self, value):
+        return str_clean_value(value, default=self.default_value,
                                strip=self.strip,
                                clean_multi_spaces=True,
                                clean_line_breaks=not self.multiline,
@@ -75,15 +167,15 @@ class NumberColumn(Column):
 
 
 class IntegerColumn(NumberColumn):
-    def __get__(self, instance, owner):
-        val = super(IntegerColumn, self).__get__(instance, owner)
+
+    def python_value(self, value):
         try:
-            val = int(val)
+            value = int(value)
         except ValueError:
-            val = None
+            value = None
         except TypeError:
-            val = None
-        return val
+            value = None
+        return value
 
 
 class DateColumn(Column):
@@ -92,8 +184,8 @@ class DateColumn(Column):
 
 class BooleanColumn(Column):
 
-    def __get__(self, instance, owner):
-        return bool(super(BooleanColumn, self).__get__(instance, owner))
+    def python_value(self, value):
+        return bool(value)
 
 
 class TextListColumn(Column):
@@ -105,29 +197,34 @@ class XLSSheetModel(object):
     HEADER__NUM_ROWS_SKIP = 1
     conf = None
     gae_fs = False  # set to True if using excel files in the models.File filesystem
+    backend = None  # reader backend name (see `backends.BACKENDS`), detected from the file if None
+    disk_cache = None  # `cache.DiskCache` persisting the loaded sheets across processes (see `load_sheets`)
+    async_loader = None  # `aio.AsyncLoader` running the asyncio loads (see `aall`), a shared default one if None
 
     def __init__(self, filename, sheetname, **params):
         # initialize column in instance scope
-        cls = self.__class__
-        for attribute in cls.__dict__.keys():
-            if isinstance(cls.__dict__[attribute], Column):
-                cls.__dict__[attribute].attr_name = attribute
-                self.__dict__[attribute] = None
-        if self.conf is None:
-            self.set_header_conf()
-        self.__dict__['filename'] = filename
-        self.__dict__['sheetname'] = sheetname
-        self.sheetname__ = sheetname
-        for field in params.keys():
-            self.__dict__[field] = params[field]
+        d = self.__dict__
+        for attribute in self.__class__._columns():
+            d[attribute] = None
+        d['filename'] = filename
+        d['sheetname'] = sheetname
+        d['sheetname__'] = sheetname
+        d.update(params)
 
     @classmethod
     def _columns(cls):
-        d = {}
-        for attr in cls.__dict__.keys():
-            col = cls.__dict__[attr]
-            if isinstance(col, Column):
-                d[attr] = col
+        """Returns the {attribute name: Column} of the model, including the ones inherited from parent
+        models. Computed once per class."""
+        d = cls.__dict__.get('_columns_cache')
+        if d is None:
+            d = {}
+            for klass in reversed(cls.__mro__):
+                for attr, col in klass.__dict__.items():
+                    if isinstance(col, Column):
+                        # Python 2 has no `__set_name__`
+                        col.__set_name__(klass, attr)
+                        d[attr] = col
+            cls._columns_cache = d
         return d
 
     def to_dict(self, include_none=False):
@@ -143,38 +240,26 @@ class XLSSheetModel(object):
         return [m.to_dict(include_none=include_none) for m in models]
 
     def plain_row(self):
-        cls = self.__class__
-        d = {}
-        for col_name in cls.conf.keys():
-            col_value = self.__dict__[col_name]
-            if col_value:
-                d[cls.conf[col_name][0]] = col_value
-            else:
-                d[cls.conf[col_name][0]] = ''
-        # order columns
-        cols = d.keys()
-        cols.sort()
         row = []
-        for col_index in cols:
-            row.append(d[col_index])
+        for col in self.__class__.read_plan():
+            col_value = self.__dict__[col.attr_name]
+            row.append(col_value if col_value else '')
         return row
 
     @classmethod
     def headers(cls):
-        dict = {}
-        for col_name in cls.conf.keys():
-            dict[cls.conf[col_name][0]] = col_name
-        # order columns
-        cols = dict.keys()
-        cols.sort()
-        row = []
-        for col_index in cols:
-            row.append(dict[col_index])
-        return row
+        return [col.attr_name for col in cls.read_plan()]
+
+    @classmethod
+    def export(cls, rows, path, format=None, sheetname='Sheet1', header=True, **fmtparams):
+        """Streams the given models, records or dicts to a CSV or .xlsx file (`format`, from the `path` extension by
+        default), under the model column headers. Returns the number of rows written."""
+        return export_models(cls, rows, path, format=format, sheetname=sheetname, header=header, **fmtparams)
 
     @classmethod
     def sheetnames(cls, filename=None, file_contents=None, **params):
-        sheet_names = get_xls_sheet_names(filename=filename, file_contents=file_contents)
+        sheet_names = get_xls_sheet_names(filename=filename, file_contents=file_contents,
+                                          workbook=params.get('workbook'))
         if len(sheet_names) > 0:
             return [sheet_names[0]]
         else:
@@ -182,71 +267,316 @@ class XLSSheetModel(object):
 
     @classmethod
     def set_header_conf(cls):
-        cls.conf = {}
-        for col_name in cls.__dict__:
-            col = cls.__dict__[col_name]
-            if isinstance(col, Column):
-                if isinstance(col, TextColumn):
-                    xlrd_type = xlrd.XL_CELL_TEXT
-                elif isinstance(col, NumberColumn):
-                    xlrd_type = xlrd.XL_CELL_NUMBER
-                elif isinstance(col, DateColumn):
-                    xlrd_type = xlrd.XL_CELL_DATE
-                elif isinstance(col, BooleanColumn):
-                    xlrd_type = xlrd.XL_CELL_BOOLEAN
-                else:
-                    raise AttributeError('Column type not supported (yet!): %s' + str())
-                cls.conf[col_name] = (col.column_index, xlrd_type, col.column_name, col.optional,
-                                      col.not_null, col.excludes, col.ignore_data_error, col.values)
+        columns = []
+        for col_name, col in cls._columns().items():
+            if isinstance(col, TextColumn):
+                xlrd_type = xlrd.XL_CELL_TEXT
+            elif isinstance(col, NumberColumn):
+                xlrd_type = xlrd.XL_CELL_NUMBER
+            elif isinstance(col, DateColumn):
+                xlrd_type = xlrd.XL_CELL_DATE
+            elif isinstance(col, BooleanColumn):
+                xlrd_type = xlrd.XL_CELL_BOOLEAN
+            else:
+                raise AttributeError('Column type not supported (yet!): %s' % (col_name))
+            columns.append(ColumnPlan(col_name, col.column_index, xlrd_type, col.column_name, col.optional,
+                                      col.not_null, col.excludes, col.ignore_data_error, col.values))
+        cls.conf = ReadPlan(columns)
+
+    @classmethod
+    def read_plan(cls):
+        """Returns the compiled `ReadPlan` of the model, built once per class. A `conf` dictionary
+        explicitly set in the class (legacy positional tuples) is compiled instead of the columns."""
+        conf = cls.__dict__.get('conf')
+        if conf is None:
+            cls.set_header_conf()
+        elif not isinstance(conf, ReadPlan):
+            cls.conf = compile_read_plan(conf)
+        return cls.conf
+
+    @classmethod
+    def iter(cls, file_contents=None, **params):
+        """Yields the models of the matching sheets one row at a time, without building the whole list
+        (see `all`)."""
+        filename, workbook, sheetnames = cls._load_args(file_contents, params)
+        for obj in cls.iter_for_sheetnames(filename, sheetnames, file_contents=file_contents, workbook=workbook,
+                                           compact=params.get('compact', False)):
+            yield obj
 
     @classmethod
     def all(cls, file_contents=None, **params):
+        """Returns new models of the matching sheets, read from `rows_all_cache` while the file doesn't change
+        (unless `cache=False`), or compact records with `compact=True` (see `record_class`)."""
+        if not params.pop('cache', True) or params.get('compact'):
+            filename, workbook, sheetnames = cls._load_args(file_contents, params)
+            build = cls.iter_records_from_dic_list if params.get('compact') else cls.iter_from_dic_list
+            result = []
+            with workbook:
+                for sheetname in sheetnames:
+                    result += cls._build_sheet(build, cls._iter_sheet_dics(sheetname, workbook), filename,
+                                               sheetname, workbook.stats)
+            return result
+        stats = params.get('stats')
+        sheets = cls.load_sheets(file_contents=file_contents, **params)
+        start = timer()
+        result = []
+        for sheet in sheets:
+            result += sheet.models()
+        if stats is not None and stats.timed:
+            stats.add_time(PHASE__BUILD, timer() - start)
+        return result
+
+    # cached sheets (row values, see `cache.LoadedSheet`) indexed: {(model, file fingerprint, sheetname): LoadedSheet},
+    # shared by all models
+    rows_all_cache = SheetCache()
+
+    @classmethod
+    def invalidate_cache(cls, filename=None, file_contents=None, sheetname=None):
+        """Removes the cached sheets of the model (and its subclasses), optionally only the ones of the given
+        file and/or sheet name. Returns the number of removed sheets."""
+        fingerprint = file_fingerprint(file_contents=file_contents) if file_contents else None
+        if filename is not None:
+            filename = cls._xls_filename(filename)
+        return cls.rows_all_cache.invalidate(model=cls, filename=filename, fingerprint=fingerprint,
+                                             sheetname=sheetname)
+
+    @classmethod
+    def _xls_filename(cls, filename):
+        if filename.endswith('.xls') or filename.endswith('.xlsx'):
+            return filename
+        else:
+            return filename + '.xls'
+
+    @classmethod
+    def open_workbook(cls, filename='dummy', file_contents=None, stats=None):
+        """Returns a (lazily opened) `Workbook` to share between the sheet name discovery and the sheet reads of
+        a load, so that the file is opened once. The reads are instrumented by the given `stats.LoadStats`."""
+        fname = cls._xls_filename(filename)
+        if not file_contents and not os.path.exists(fname) and hasattr(cls, 'filename_alternative'):
+            # try alternative xls filename TODO: 2 b abandoned
+            logging.warn('%s not found. Trying alternative filename.' % (fname))
+            fname = cls.filename_alternative() + '.xls'
+        return Workbook(fname, file_contents=file_contents, backend=cls.backend, disk_cache=cls.disk_cache,
+                        stats=stats)
+
+    @classmethod
+    def where(cls, **filters):
+        """Returns a `query.Query` selecting the rows matching the given `<attr>[__<lookup>]=<value>` filters,
+        e.g. `Model.where(status='open', amount__gt=100).only('id', 'amount').all(filename=...)`."""
+        return Query(cls).where(**filters)
+
+    @classmethod
+    def only(cls, *fields):
+        """Returns a `query.Query` reading only the given attributes (see `where`)."""
+        return Query(cls).only(*fields)
+
+    @classmethod
+    def load_many(cls, files, sheetnames=None, workers=None, compact=False):
+        """Loads many files (or `sheetnames`) in parallel over a pool of `workers` processes. Returns a
+        `parallel.LoadResult` (filename, rows and error) per file, in the given order."""
+        return load_many(cls, files, sheetnames=sheetnames, workers=workers, compact=compact)
+
+    @classmethod
+    def _async_loader(cls):
+        if cls.async_loader is not None:
+            return cls.async_loader
+        from .aio import default_loader
+        return default_loader()
+
+    @classmethod
+    def aall(cls, file_contents=None, **params):
+        """asyncio `all`: returns an awaitable of the models, loaded off the event loop by the `async_loader`
+        executor (see `aio.AsyncLoader`): `rows = await Model.aall(filename=...)`. Python 3 only."""
+        return cls._async_loader().all(cls, file_contents=file_contents, **params)
+
+    @classmethod
+    def aget(cls, value, **params):
+        """asyncio `get`: returns an awaitable of the model with the given primary key value (see `aall`)."""
+        return cls._async_loader().get(cls, value, **params)
+
+    @classmethod
+    def aget_many(cls, values, **params):
+        """asyncio `get_many`: returns an awaitable of the models with the given primary key values (see `aall`)."""
+        return cls._async_loader().get_many(cls, values, **params)
+
+    @classmethod
+    def aiter(cls, file_contents=None, chunk_size=1000, **params):
+        """asyncio `iter`: returns an asynchronous iterator over the models, read `chunk_size` rows at a time off
+        the event loop (see `aall`): `async for row in Model.aiter(filename=...)`."""
+        return cls._async_loader().iter(cls, chunk_size=chunk_size, file_contents=file_contents, **params)
+
+    @classmethod
+    def _load_args(cls, file_contents, params):
+        """Returns the (filename, workbook, sheetnames) of a load, given the parameters of `all`."""
         filename = params.get('filename', 'dummy')
-        sheetnames = params.get('sheetnames', cls.sheetnames(file_contents=file_contents, **params))
-        return cls.all_for_sheetnames(filename, sheetnames, file_contents=file_contents)
+        stats = params.pop('stats', None)
+        if params.get('workbook') is None:
+            params['workbook'] = cls.open_workbook(filename, file_contents=file_contents, stats=stats)
+        elif stats is not None:
+            params['workbook'].stats = stats
+        sheetnames = params.get('sheetnames')
+        if sheetnames is None:
+            try:
+                sheetnames = cls.sheetnames(file_contents=file_contents, **params)
+            except Exception:
+                params['workbook'].close()
+                raise
+        return filename, params['workbook'], sheetnames
 
-    rows_all_cache = {}  # cached rows indexed: {filename: {sheetname: [row]}}
+    @classmethod
+    def _iter_sheet_dics(cls, sheetname, workbook):
+        return workbook.iter_sheet(sheetname, cls.read_plan(), cls.HEADER__NUM_ROWS_SKIP)
 
     @classmethod
-    def all_for_sheetnames(cls, filename, sheetnames, filename_alternative=None, file_contents=None, **params):
+    def load_sheets(cls, file_contents=None, **params):
+        """Returns the `LoadedSheet`s (row values, primary key and secondary indexes) of the matching sheets,
+        read once per file version (see `rows_all_cache` and `disk_cache`)."""
+        filename, workbook, sheetnames = cls._load_args(file_contents, params)
+        with workbook:
+            return [cls._load_sheet(filename, sheetname, workbook) for sheetname in sheetnames]
 
-        if cls.conf is None:
-            cls.set_header_conf()
+    @classmethod
+    def reload(cls, previous=None, file_contents=None, **params):
+        """Incremental load: returns a `reload.Snapshot` of the matching sheets, reading again only the sheets
+        changed since the `previous` snapshot. `Snapshot.diff` holds the changed rows."""
+        filename, workbook, sheetnames = cls._load_args(file_contents, params)
+        with workbook:
+            return reload_sheets(cls, filename, sheetnames, workbook, previous)
+
+    @classmethod
+    def to_columns(cls, file_contents=None, **params):
+        """Returns the matching sheets as a column oriented `columnar.ColumnTable` ({attribute name:
+        `ColumnArray`}), without building any model instance."""
+        filename, workbook, sheetnames = cls._load_args(file_contents, params)
+        with workbook:
+            return load_columns(cls, sheetnames, workbook)
+
+    @classmethod
+    def to_sqlite(cls, conn, table=None, file_contents=None, **params):
+        """Bulk loads (or re-syncs, if the file changed) the matching sheets into the given SQLite connection
+        `table` (the model name by default). Returns the number of rows inserted."""
+        filename, workbook, sheetnames = cls._load_args(file_contents, params)
+        source = filename if file_contents is not None else os.path.abspath(filename)
+        with workbook:
+            return sync_sheets(cls, conn, table or cls.__name__, source, sheetnames, workbook)
+
+    @classmethod
+    def _load_sheet(cls, filename, sheetname, workbook):
+        key = (cls, workbook.fingerprint, sheetname)
+        sheet = cls.rows_all_cache.get(key)
+        if sheet is None:
+            sheet = cls._loaded_sheet(filename, sheetname, cls._cached_sheet_values(sheetname, workbook))
+            cls.rows_all_cache.put(key, sheet)
+        elif workbook.stats is not None:
+            workbook.stats.cached_sheets += 1
+        return sheet
+
+    @classmethod
+    def _loaded_sheet(cls, filename, sheetname, values):
+        """Returns the `LoadedSheet` of the given row values of a sheet (see `_sheet_values`), indexed."""
+        try:
+            primary_key = cls.get_primary_key().attr_name
+        except AttributeError:
+            primary_key = None
+        categorical = dict((attr_name, col.python_value) for attr_name, col in categorical_columns(cls).items())
+        return LoadedSheet(cls, filename, sheetname, values, primary_key, index_columns(cls), categorical)
+
+    @classmethod
+    def _row_attrs(cls):
+        """Returns the attribute names of the row values (see `cache.LoadedSheet`): the read plan ones, in order."""
+        plan = cls.read_plan()
+        cached = cls.__dict__.get('_row_attrs_cache')
+        if cached is None or cached[0] is not plan:
+            cached = cls._row_attrs_cache = (plan, tuple([col.attr_name for col in plan]))
+        return cached[1]
+
+    @classmethod
+    def _dics_values(cls, dics):
+        """Yields the row values (tuples of raw values, in `_row_attrs` order) of the given row dictionaries."""
+        attrs = cls._row_attrs()
+        for dic in dics:
+            yield tuple([dic.get(attr) for attr in attrs])
+
+    @classmethod
+    def _sheet_values(cls, rows):
+        """Returns the list of the given row values, the raw values of the `categorical` columns shared (see
+        `TextColumn.category`)."""
+        attrs = cls._row_attrs()
+        categorical = [(attrs.index(attr_name), col) for attr_name, col in categorical_columns(cls).items()]
+        if not categorical:
+            return list(rows)
         result = []
-        for sheetname in sheetnames:
-            if filename.endswith('.xls') or filename.endswith('.xlsx'):
-                fname = filename
-            else:
-                fname = filename + '.xls'
-            try:
-                dics = read_xls_sheet(fname, sheetname, cls.conf, cls.HEADER__NUM_ROWS_SKIP,
-                                      file_contents=file_contents)
-            except IOError:  # try alternative xls filename TODO: 2 b abandoned
-                logging.warn('%s not found. Trying alternative filename.' % (fname))
-                dics = read_xls_sheet(cls.filename_alternative() + '.xls', sheetname, cls.conf,
-                                      cls.HEADER__NUM_ROWS_SKIP, file_contents=file_contents)
-
-            rows = cls.build_from_dic_list(dics, filename, sheetname)
-            # store all rows from for current sheetname in class namespace
-            # cache
-            if filename not in cls.rows_all_cache.keys():
-                cls.rows_all_cache[filename] = {}
-            cls.rows_all_cache[filename][sheetname] = rows
-            result += rows
+        for values in rows:
+            values = list(values)
+            for i, col in categorical:
+                values[i] = col.category(values[i])[0]
+            result.append(tuple(values))
         return result
 
+    @classmethod
+    def _models_from_values(cls, filename, sheetname, values, positions=None, compact=False):
+        """Returns new models (or compact records) of the row values at the given positions (all by default)."""
+        if positions is None:
+            positions = range(len(values))
+        attrs = cls._row_attrs()
+        first_row = cls.HEADER__NUM_ROWS_SKIP + 1
+        dics = (dict(zip(attrs, values[i])) for i in positions)
+        build = cls.iter_records_from_dic_list if compact else cls.iter_from_dic_list
+        return list(build(dics, filename, sheetname, [i + first_row for i in positions]))
+
+    @classmethod
+    def _build_sheet(cls, build, dics, filename, sheetname, stats=None):
+        """Returns the list of the models built by `build` from the (lazily read) row dictionaries, adding the
+        time spent building them (not reading the rows) to the given `stats.LoadStats`."""
+        if stats is None or not stats.timed:
+            return list(build(dics, filename, sheetname))
+        read_time = stats.total_time
+        start = timer()
+        rows = list(build(dics, filename, sheetname))
+        stats.add_time(PHASE__BUILD, timer() - start - (stats.total_time - read_time))
+        return rows
+
+    @classmethod
+    def _cached_sheet_values(cls, sheetname, workbook):
+        """Returns the row values of the sheet (see `_sheet_values`), read from the `disk_cache` if set (and stored
+        there when not cached yet)."""
+        disk_cache = cls.disk_cache
+        if disk_cache is None:
+            return cls._sheet_values(cls._dics_values(cls._iter_sheet_dics(sheetname, workbook)))
+        plan = cls.read_plan()
+        rows = disk_cache.get_rows(cls, plan, workbook.fingerprint, sheetname)
+        if rows is not None and workbook.stats is not None:
+            workbook.stats.cached_sheets += 1
+        if rows is None:
+            rows = list(cls._dics_values(cls._iter_sheet_dics(sheetname, workbook)))
+            disk_cache.put_rows(cls, plan, workbook.fingerprint, sheetname, rows)
+        return cls._sheet_values(rows)
+
+    @classmethod
+    def iter_for_sheetnames(cls, filename, sheetnames, file_contents=None, **params):
+        workbook = params.get('workbook') or cls.open_workbook(filename, file_contents=file_contents,
+                                                               stats=params.get('stats'))
+        build = cls.iter_records_from_dic_list if params.get('compact') else cls.iter_from_dic_list
+        with workbook:
+            for sheetname in sheetnames:
+                for obj in build(cls._iter_sheet_dics(sheetname, workbook), filename, sheetname):
+                    yield obj
+
+    @classmethod
+    def all_for_sheetnames(cls, filename, sheetnames, filename_alternative=None, file_contents=None, **params):
+
+        return cls.all(filename=filename, sheetnames=sheetnames, file_contents=file_contents, **params)
+
     @classmethod
     def get_primary_key(cls):
         """Returns the primary key column, if exists"""
         prim_key_field = None
-        for col_name in cls.__dict__:
-            if isinstance(cls.__dict__[col_name], Column):
-                field = cls.__dict__[col_name]
-                if field.is_primary_key:
-                    if prim_key_field:
-                        raise AttributeError('XLSSheetModel doesn\'t support more than one field as primary key.')
-                    else:
-                        prim_key_field = field
+        for field in cls._columns().values():
+            if field.is_primary_key:
+                if prim_key_field:
+                    raise AttributeError('XLSSheetModel doesn\'t support more than one field as primary key.')
+                else:
+                    prim_key_field = field
         if prim_key_field:
             return prim_key_field
         else:
@@ -254,35 +584,124 @@ class XLSSheetModel(object):
 
     @classmethod
     def get(cls, value, **params):
-        """"""
-        field = cls.get_primary_key()
-        # TODO: to be optimized (use xlrd directly)
-        rows = cls.all(**params)
-        aa = None
-        for row in rows:
-            if row.__dict__[field.attr_name] == value:
-                if aa:
+        """Returns the model with the given primary key value (None if not found), using the primary key
+        index of the (cached) loaded sheets. Raises ValueError if the key is not unique."""
+        return cls.get_many([value], **params)[0]
+
+    @classmethod
+    def get_many(cls, values, **params):
+        """Returns the models with the given primary key values, in the same order (None for the keys not
+        found). Raises ValueError if any of the keys is not unique."""
+        cls.get_primary_key()
+        return cls._lookup_many(cls.load_sheets(**params), values)
+
+    @classmethod
+    def _lookup_many(cls, sheets, values):
+        result = []
+        for value in values:
+            found = None
+            for sheet in sheets:
+                try:
+                    position = sheet.lookup(value)
+                    if position is not None and found is not None:  # found in more than one sheet
+                        raise KeyError(value)
+                except KeyError:
                     raise ValueError(str(cls) + ': Duplicate key: ' + str(value))
-                else:
-                    aa = row
-        return aa
+                if position is not None:
+                    found = (sheet, position)
+            result.append(found[0].models([found[1]])[0] if found is not None else None)
+        return result
 
     @classmethod
-    def build_from_dic_list(cls, dics, filename, sheetname):
-        objs = []
-        for row, dic in enumerate(dics):
+    def filter_by(cls, file_contents=None, **params):
+        """Returns the models whose attribute values equal the given `<attr>=<value>` filters (using the secondary
+        index of `indexed` columns), e.g. `Order.filter_by(status='open', filename=...)`."""
+        columns = cls._columns()
+        filters = dict((name, params.pop(name)) for name in list(params) if name in columns)
+        if not filters:
+            raise ValueError('%s.filter_by needs at least one column filter' % (cls.__name__))
+        return filter_sheets(cls, cls.load_sheets(file_contents=file_contents, **params), filters)
+
+    @classmethod
+    def group_by(cls, attr_name, **params):
+        """Returns the models grouped by the given attribute value: {value: [models]}, ordered by first
+        occurrence (using the secondary index of an `indexed` column). The parameters are the ones of `all`."""
+        return group_sheets(cls, cls.load_sheets(**params), attr_name)
+
+    @classmethod
+    def categories(cls, attr_name, **params):
+        """Returns the dictionary encoding (`categories.Categories`: distinct values and row codes) of a
+        `categorical` column over the models of a load, in `all` order. The parameters are the ones of `all`."""
+        if attr_name not in categorical_columns(cls):
+            raise AttributeError('"%s" is not a categorical column' % (attr_name))
+        result = Categories(attr_name)
+        for sheet in cls.load_sheets(**params):
+            result.merge(sheet.categories[attr_name])
+        return result
+
+    @classmethod
+    def join(cls, other, on, other_params=None, outer=False, **params):
+        """Hash join: returns the (model, other model) pairs with the same `on` attribute value (a name or an
+        (attribute, other attribute) pair), e.g. `Order.join(Customer, ('customer_id', 'id'), filename=...)`."""
+        attr_name, other_attr_name = (on, on) if isinstance(on, string_types) else on
+        get = attribute_getter(cls, attr_name)
+        if other_params is None:
+            other_params = dict(params)
+        groups = group_sheets(other, other.load_sheets(**other_params), other_attr_name)
+        groups.pop(None, None)
+        rows = [row for sheet in cls.load_sheets(**params) for row in sheet.models()]
+        return hash_join(rows, get, groups, outer=outer)
+
+    @classmethod
+    def iter_from_dic_list(cls, dics, filename, sheetname, row_numbers=None):
+        """Yields the models of the given row dictionaries, numbered by the given `row_numbers` (the sheet rows
+        from the first one after the header by default)."""
+        row_numbers = iter(row_numbers) if row_numbers is not None else itertools.count(cls.HEADER__NUM_ROWS_SKIP + 1)
+        categorical = list(categorical_columns(cls).values())
+        clean_on_load = [col for col in cls._columns().values()
+                         if getattr(col, 'clean_on_load', False) and col not in categorical]
+        for dic in dics:
             obj = cls(filename, sheetname, **dic)
             # TODO: store filename, sheetname, row and col values (for saving,
             # etc.)
-            obj.row = row + cls.HEADER__NUM_ROWS_SKIP + 1
-            objs.append(obj)
-        return objs
+            obj.row = next(row_numbers)
+            d = obj.__dict__
+            for col in clean_on_load:
+                d[col.cache_key] = col.python_value(d[col.attr_name])
+            for col in categorical:
+                d[col.attr_name], d[col.cache_key] = col.category(d[col.attr_name])
+            yield obj
+
+    @classmethod
+    def record_class(cls):
+        """Returns the compact (slotted) record class of the model (`records.CompactRecord` subclass, generated
+        once per model), with the same attributes, `row` and `to_dict()`."""
+        record_class = cls.__dict__.get('_record_class')
+        if record_class is None:
+            record_class = cls._record_class = build_record_class(cls)
+        return record_class
+
+    @classmethod
+    def iter_records_from_dic_list(cls, dics, filename, sheetname, row_numbers=None):
+        row_numbers = iter(row_numbers) if row_numbers is not None else itertools.count(cls.HEADER__NUM_ROWS_SKIP + 1)
+        record_class = cls.record_class()
+        sheet = SheetInfo(filename, sheetname)
+        attrs = record_class._attrs
+        categorical = [(attrs.index(attr_name), col) for attr_name, col in categorical_columns(cls).items()]
+        for dic in dics:
+            values = [dic.get(attr) for attr in attrs]
+            for i, col in categorical:
+                values[i] = col.category(values[i])[0]
+            yield record_class(sheet, next(row_numbers), values)
+
+    @classmethod
+    def build_from_dic_list(cls, dics, filename, sheetname):
+        return list(cls.iter_from_dic_list(dics, filename, sheetname))
 
     def __str__(self):
         s = '['
-        for attr_name in self.__class__.__dict__:
-            if isinstance(self.__class__.__dict__[attr_name], Column):
-                value = self.__dict__[attr_name]
-                s += attr_name + ': ' + text_type(value) + '; '
+        for attr_name in self.__class__._columns():
+            value = self.__dict__[attr_name]
+            s += attr_name + ': ' + text_type(value) + '; '
         s += ']'
         return s
@@ -0,0 +1,233 @@
+""" asyncio API: the blocking (CPU bound) loads run off the event loop in an executor (see `AsyncLoader`).
+Python 3 only. """
+import asyncio
+import collections
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+# the loop running the calling coroutine (`get_event_loop` returns it in coroutines before Python 3.7)
+_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+
+def _read_sheets(model, file_contents, params):
+    """ Worker (process executor): reads the sheets of a load, returning the file fingerprint and the
+    [(sheetname, [row values])] (tuples of raw values, see `XLSSheetModel._row_attrs`). """
+    filename, workbook, sheetnames = model._load_args(file_contents, params)
+    with workbook:
+        sheets = []
+        for sheetname in sheetnames:
+            sheets.append((sheetname, list(model._dics_values(model._iter_sheet_dics(sheetname, workbook)))))
+        return workbook.fingerprint, sheets
+
+
+def _sheets_models(sheets):
+    return [row for sheet in sheets for row in sheet.models()]
+
+
+def _read_chunk(rows, size):
+    """ Returns the next (up to) `size` items of the given iterator. """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            break
+    return chunk
+
+
+class AsyncRowIterator(object):
+    """ Asynchronous iterator (`async for`) over the models of a load (see `AsyncLoader.iter`): the `rows` are
+    read `chunk_size` at a time in the executor, or all of them by the given `load` coroutine function. """
+
+    def __init__(self, loader, rows=None, chunk_size=1000, load=None):
+        self.loader = loader
+        self.rows = rows  # iterator (thread executor)
+        self.load = load  # or the whole load (process executor)
+        self.chunk_size = chunk_size
+        self._buffer = collections.deque()
+        self._chunk = None  # future of the chunk being read, kept if the waiting task is cancelled
+        self._exhausted = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._buffer and not self._exhausted:
+            try:
+                if self.load is not None:
+                    load, self.load = self.load, None
+                    self._exhausted = True
+                    rows = await load()
+                else:
+                    if self._chunk is None:
+                        self._chunk = self.loader._submit(_running_loop(), _read_chunk, self.rows, self.chunk_size)
+                    rows = await asyncio.shield(self._chunk)
+                    self._chunk = None
+                    self._exhausted = len(rows) < self.chunk_size
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._exhausted = True
+                raise
+            self._buffer.extend(rows)
+        if self._buffer:
+            return self._buffer.popleft()
+        raise StopAsyncIteration
+
+
+class AsyncLoader(object):
+    """ Runs the model loads in the given `executor` (the event loop default thread pool if None), at most
+    `max_concurrency` at a time (the others wait in line, without blocking the loop). Concurrent identical loads
+    (same model, file and parameters) share a single in-flight load.
+    With a `concurrent.futures.ProcessPoolExecutor` the sheets are parsed in the worker processes (the model
+    classes must be importable, see `XLSSheetModel.load_many`) and the rows indexed and cached in this one, in
+    the event loop default executor (as are the models built from cached rows).
+    Meant to be used by a single event loop. """
+
+    def __init__(self, executor=None, max_concurrency=None):
+        self.executor = executor
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self.running = 0
+        self._pending = collections.deque()  # [(loop, func, args, future)]
+        self._inflight = {}  # {load key: future}
+
+    @property
+    def in_process(self):
+        return isinstance(self.executor, ProcessPoolExecutor)
+
+    def _submit(self, loop, func, *args):
+        """ Returns a future of `func(*args)`, run in the executor once there is a free slot. """
+        future = loop.create_future()
+        self._pending.append((loop, func, args, future))
+        self._start_pending()
+        return future
+
+    def _start_pending(self):
+        while self._pending and self.running < self.max_concurrency:
+            loop, func, args, future = self._pending.popleft()
+            if future.cancelled():
+                continue
+            self.running += 1
+            job = loop.run_in_executor(self.executor, func, *args)
+            job.add_done_callback(functools.partial(self._job_done, future))
+
+    def _job_done(self, future, job):
+        self.running -= 1
+        if not future.cancelled():
+            if job.cancelled():
+                future.cancel()
+            elif job.exception() is not None:
+                future.set_exception(job.exception())
+            else:
+                future.set_result(job.result())
+        self._start_pending()
+
+    def _shared(self, key, start):
+        """ Returns an awaitable of the in-flight load with the given key, started by `start()` (a future)
+        if there is none. Cancelling a waiter doesn't cancel the shared load. """
+        if key is None:
+            return start()
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._inflight[key] = start()
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return asyncio.shield(future)
+
+    @staticmethod
+    def _load_key(model, operation, file_contents, params):
+        """ Returns the key identifying a load, None if it can't be shared (file contents, workbook or stats
+        given). """
+        if file_contents is not None or params.get('workbook') is not None or params.get('stats') is not None:
+            return None
+        try:
+            return (model, operation, os.path.abspath(params.get('filename', 'dummy')),
+                    tuple(params['sheetnames']) if params.get('sheetnames') is not None else None,
+                    tuple(sorted(item for item in params.items() if item[0] != 'sheetnames')))
+        except TypeError:  # unhashable parameters
+            return None
+
+    async def load_sheets(self, model, file_contents=None, **params):
+        """ Returns the `LoadedSheet`s of the load (see `XLSSheetModel.load_sheets`). """
+        loop = _running_loop()
+        key = self._load_key(model, 'sheets', file_contents, params)
+        if not self.in_process:
+            return await self._shared(key, lambda: self._submit(loop, functools.partial(
+                model.load_sheets, file_contents=file_contents, **params)))
+
+        # sheets already cached in this process (only known without opening the file if `sheetnames` are given)
+        if params.get('sheetnames') is not None and params.get('workbook') is None:
+            workbook = model.open_workbook(params.get('filename', 'dummy'), file_contents=file_contents)
+            try:
+                fingerprint = workbook.fingerprint
+                sheets = [model.rows_all_cache.get((model, fingerprint, name)) for name in params['sheetnames']]
+            except (IOError, OSError):
+                sheets = [None]
+            finally:
+                workbook.close()
+            if None not in sheets:
+                return sheets
+
+        def loaded(result):
+            filename = params.get('filename', 'dummy')
+            fingerprint, sheets = result
+            loaded_sheets = []
+            for sheetname, rows in sheets:
+                sheet = model._loaded_sheet(filename, sheetname, model._sheet_values(rows))
+                model.rows_all_cache.put((model, fingerprint, sheetname), sheet)
+                loaded_sheets.append(sheet)
+            return loaded_sheets
+
+        async def load():
+            result = await self._submit(loop, _read_sheets, model, file_contents, dict(params))
+            return await loop.run_in_executor(None, loaded, result)  # indexed off the event loop
+
+        return await self._shared(key, lambda: asyncio.ensure_future(load()))
+
+    async def all(self, model, file_contents=None, **params):
+        """ Returns the models of the load (see `XLSSheetModel.all`). """
+        loop = _running_loop()
+        if params.get('cache', True) and not params.get('compact'):
+            sheets = await self.load_sheets(model, file_contents=file_contents, **params)
+            return await loop.run_in_executor(None, _sheets_models, sheets)
+        if not self.in_process:
+            return await self._shared(self._load_key(model, 'all', file_contents, params),
+                                      lambda: self._submit(loop, functools.partial(
+                                          model.all, file_contents=file_contents, **params)))
+        compact = params.pop('compact', False)
+        params.pop('cache', None)
+        filename = params.get('filename', 'dummy')
+        fingerprint, sheets = await self._submit(loop, _read_sheets, model, file_contents, params)
+        return await loop.run_in_executor(None, lambda: [
+            row for sheetname, rows in sheets
+            for row in model._models_from_values(filename, sheetname, rows, compact=compact)])
+
+    async def get(self, model, value, **params):
+        """ Returns the model with the given primary key value (see `XLSSheetModel.get`). """
+        return (await self.get_many(model, [value], **params))[0]
+
+    async def get_many(self, model, values, **params):
+        """ Returns the models with the given primary key values (see `XLSSheetModel.get_many`). """
+        model.get_primary_key()
+        return model._lookup_many(await self.load_sheets(model, **params), values)
+
+    def iter(self, model, chunk_size=1000, file_contents=None, **params):
+        """ Returns an `AsyncRowIterator` over the models of the load (see `XLSSheetModel.iter`).
+        With a process executor, rows can't be streamed from a worker: the whole load is read (in a worker) and
+        built before the first row is yielded, so memory use grows with the load, not with `chunk_size`. """
+        if self.in_process:
+            return AsyncRowIterator(self, chunk_size=chunk_size, load=functools.partial(
+                self.all, model, file_contents=file_contents, cache=False, **params))
+        # started (the file opened) on the first chunk read, in the executor
+        return AsyncRowIterator(self, model.iter(file_contents=file_contents, **params), chunk_size)
+
+
+_default_loader = None
+
+
+def default_loader():
+    """ Returns the `AsyncLoader` shared by the models with no `async_loader` (loop default executor). """
+    global _default_loader
+    if _default_loader is None:
+        _default_loader = AsyncLoader()
+    return _default_loader
@@ -0,0 +1,80 @@
+import xlrd
+
+from .util import buffer_bytes, contents_bytes, iter_xlrd_rows
+from .xlsx import XlsxBook, ZIP_MAGIC
+
+
+class XlrdSheet(object):
+    """ xlrd sheet (all of its attributes are available) with the backend `iter_rows` interface. """
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+
+    def __getattr__(self, name):
+        return getattr(self.sheet, name)
+
+    def iter_rows(self, start_rowx=0, width=None):
+        return iter_xlrd_rows(self.sheet, start_rowx, width)
+
+
+class XlrdBook(object):
+    """ xlrd workbook opened with `on_demand`, so that only the requested sheets are parsed (.xls only:
+    xlrd parses all the sheets of an .xlsx file when opened). """
+
+    def __init__(self, filename=None, file_contents=None):
+        if file_contents:
+            # xlrd takes bytes or mmap contents only (and maps the files itself)
+            self.book = xlrd.open_workbook(file_contents=contents_bytes(file_contents), on_demand=True)
+        else:
+            self.book = xlrd.open_workbook(filename, on_demand=True)
+
+    def __getattr__(self, name):
+        return getattr(self.book, name)
+
+    def sheet_by_name(self, sheetname):
+        return XlrdSheet(self.book.sheet_by_name(sheetname))
+
+    def sheet_by_index(self, sheetx):
+        return XlrdSheet(self.book.sheet_by_index(sheetx))
+
+    def release_sheet(self, sheetname):
+        book = self.book
+        if book.on_demand and book.sheet_loaded(sheetname):
+            book.unload_sheet(sheetname)
+
+
+# reader backends: {name: workbook class}. Workbook classes are built with (filename, file_contents: a buffer as
+# returned by `util.contents_buffer`) and provide `datemode`, `sheet_names()`, `sheet_by_name()` (sheets with a
+# `name` and `iter_rows`), `release_sheet()` and `release_resources()`
+BACKENDS = {
+    'xlrd': XlrdBook,
+    'xlsx': XlsxBook,
+}
+
+
+def register_backend(name, book_class):
+    BACKENDS[name] = book_class
+
+
+def detect_backend(filename=None, file_contents=None):
+    """ Returns the backend for the given file: 'xlsx' for zip (.xlsx) files, 'xlrd' otherwise (.xls). """
+    if file_contents:
+        head = buffer_bytes(file_contents[:4])
+    else:
+        try:
+            with open(filename, 'rb') as f:
+                head = f.read(4)
+        except (IOError, OSError):
+            return 'xlrd'  # let xlrd report the error
+    return 'xlsx' if head == ZIP_MAGIC else 'xlrd'
+
+
+def open_book(filename=None, file_contents=None, backend=None):
+    """ Opens the workbook with the given backend (detected from the file contents by default). """
+    if backend is None:
+        backend = detect_backend(filename=filename, file_contents=file_contents)
+    try:
+        book_class = BACKENDS[backend]
+    except KeyError:
+        raise ValueError('Unknown reader backend "%s" (available: %s)' % (backend, ', '.join(sorted(BACKENDS))))
+    return book_class(filename=filename, file_contents=file_contents)
@@ -0,0 +1,328 @@
+import glob
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+
+from .categories import Categories
+from .info import __version__
+
+try:
+    import cPickle as pickle
+except ImportError:  # Python 3
+    import pickle
+
+
+class LoadedSheet(object):
+    """ The validated rows read from a single sheet, as tuples of raw cell values (in `model._row_attrs()`
+    order), along with the hash index on their primary key (raw values), the secondary indexes of the `indexed`
+    columns (attribute values) and the dictionary encoding of the `categorical` columns, built once when the
+    sheet is loaded. Indexes hold row positions in the (immutable) tuple of rows, so they can't get stale.
+    New models are built from the rows on each access (see `models`): the cached rows are never shared with
+    (nor changed by) the callers. """
+
+    __slots__ = ('model', 'filename', 'sheetname', 'values', 'pk_index', 'pk_duplicates', 'indexes', 'categories')
+
+    def __init__(self, model, filename, sheetname, values, primary_key=None, indexes=None, categorical=None):
+        self.model = model
+        self.filename = filename
+        self.sheetname = sheetname
+        self.values = tuple(values)
+        self.pk_index = {}  # {raw primary key value: row position}
+        self.pk_duplicates = set()
+        self.indexes = {}  # {attribute name: OrderedDict {attribute value: [row position]}, by first occurrence}
+        self.categories = {}  # {attribute name: `categories.Categories`}
+        if primary_key is not None:
+            self.build_pk_index(primary_key)
+        if indexes:
+            self.build_indexes(indexes)
+        if categorical:
+            self.build_categories(categorical)
+
+    def __len__(self):
+        return len(self.values)
+
+    def column(self, attr_name):
+        """ Returns the position of the given attribute in the row tuples. """
+        return self.model._row_attrs().index(attr_name)
+
+    def models(self, positions=None):
+        """ Returns new models of the rows at the given positions (all the rows by default). """
+        return self.model._models_from_values(self.filename, self.sheetname, self.values, positions)
+
+    def build_pk_index(self, attr_name):
+        index = self.pk_index
+        duplicates = self.pk_duplicates
+        i = self.column(attr_name)
+        for position, values in enumerate(self.values):
+            key = values[i]
+            if key in index:
+                duplicates.add(key)
+            else:
+                index[key] = position
+
+    def build_indexes(self, columns):
+        """ Builds the secondary indexes of the given {attribute name: `Column.python_value`}. """
+        for attr_name, python_value in columns.items():
+            index = self.indexes[attr_name] = OrderedDict()
+            i = self.column(attr_name)
+            for position, values in enumerate(self.values):
+                key = python_value(values[i])
+                try:
+                    index[key].append(position)
+                except KeyError:
+                    index[key] = [position]
+
+    def build_categories(self, columns):
+        """ Encodes the attribute values of the given {attribute name: `Column.python_value`}. """
+        for attr_name, python_value in columns.items():
+            i = self.column(attr_name)
+            self.categories[attr_name] = Categories(attr_name, (python_value(values[i]) for values in self.values))
+
+    def lookup(self, key):
+        """ Returns the position of the row with the given primary key (None if not found).
+        Raises KeyError if the key is not unique in the sheet. """
+        if key in self.pk_duplicates:
+            raise KeyError(key)
+        return self.pk_index.get(key)
+
+    def approx_size(self, sample=100):
+        """ Returns the approximate memory footprint, in bytes, estimated from the first `sample` rows. """
+        rows = self.values
+        size = sys.getsizeof(rows) + sys.getsizeof(self.pk_index)
+        for index in self.indexes.values():
+            size += sys.getsizeof(index) + sum(sys.getsizeof(matches) for matches in index.values())
+        for categories in self.categories.values():
+            size += sys.getsizeof(categories.codes) + sum(sys.getsizeof(value) for value in categories.values)
+        if rows:
+            sampled = rows[:sample]
+            row_size = 0
+            for values in sampled:
+                row_size += sys.getsizeof(values) + sum(sys.getsizeof(v) for v in values)
+            size += row_size * len(rows) // len(sampled)
+        return size
+
+
+class SheetCache(object):
+    """ LRU cache of `LoadedSheet`s, bounded by number of entries and by (approximate) size in bytes.
+    Keys are (model, file fingerprint, sheetname) tuples (see `util.file_fingerprint`).
+    Sheets larger than `max_bytes` on their own are not cached. """
+
+    def __init__(self, max_entries=64, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # {key: (LoadedSheet, size)}
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """ Returns the cached sheet (None if not cached), marking it as the most recently used. """
+        with self._lock:
+            try:
+                entry = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries[key] = entry
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, sheet):
+        size = sheet.approx_size()
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (sheet, size)
+            self.nbytes += size
+            while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        _, (_, size) = self._entries.popitem(last=False)
+        self.nbytes -= size
+        self.evictions += 1
+
+    def invalidate(self, model=None, filename=None, fingerprint=None, sheetname=None):
+        """ Removes the entries matching all the given criteria (a model, a file path, a file fingerprint
+        and/or a sheet name). Returns the number of removed entries. """
+        if filename is not None:
+            filename = os.path.abspath(filename)
+        with self._lock:
+            keys = [key for key in self._entries if self._matches(key, model, filename, fingerprint, sheetname)]
+            for key in keys:
+                self.nbytes -= self._entries.pop(key)[1]
+            return len(keys)
+
+    @staticmethod
+    def _matches(key, model, filename, fingerprint, sheetname):
+        key_model, key_fingerprint, key_sheetname = key
+        return ((model is None or issubclass(key_model, model))
+                and (filename is None or key_fingerprint[0] == filename)
+                and (fingerprint is None or key_fingerprint == fingerprint)
+                and (sheetname is None or key_sheetname == sheetname))
+
+    def clear(self):
+        """ Removes all the entries (counters are kept). """
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def info(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self.nbytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+DISK_CACHE__FORMAT = 1
+DISK_CACHE__MAX_ENTRIES = 1000  # entries kept by default, the oldest written removed first (see `DiskCache`)
+
+
+def _digest(value):
+    return hashlib.sha1(repr(value).encode('utf-8')).hexdigest()
+
+
+if hasattr(os, 'replace'):
+    _replace = os.replace
+else:  # Python 2: `os.rename` doesn't replace an existing file on Windows
+    def _replace(src, dst):
+        try:
+            os.rename(src, dst)
+        except OSError:
+            os.remove(dst)
+            os.rename(src, dst)
+
+
+class DiskCache(object):
+    """ Persistent cache, in the given directory, of the validated rows (raw values) of the loaded sheets
+    and of the workbook sheet names, so that a new process can skip reading the excel files.
+    Entries are keyed by the file fingerprint (see `util.file_fingerprint`), the model and its read plan
+    fingerprint (see `util.ReadPlan.fingerprint`), the sheet name and the xlorm version: any change to the
+    file or to the model columns is a cache miss, and writing the new entry removes the stale ones of the
+    same file, model and sheet. In-memory file contents have no previous versions: at most `max_entries` are
+    kept, the oldest written removed first.
+    Entries are pickled lists of row tuples: the cached rows are turned back into Python values (the tuples of
+    the `LoadedSheet`) as a whole, and the C unpickler is the fastest way to do it. The directory must only be
+    writable by trusted users (unpickling runs code). """
+
+    def __init__(self, directory, max_entries=DISK_CACHE__MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    @staticmethod
+    def _source(fingerprint):
+        """ The file path of a file fingerprint (the whole fingerprint for in-memory file contents). """
+        return fingerprint[0] if fingerprint[0] != 'sha1' else fingerprint
+
+    def _path(self, kind, identity, version):
+        return os.path.join(self.directory, '%s-%s-%s.pickle' % (kind, _digest(identity), _digest(version)))
+
+    def _read(self, path, key):
+        try:
+            with open(path, 'rb') as f:
+                entry_key, value = pickle.load(f)
+        except (IOError, OSError, EOFError, ValueError, pickle.UnpicklingError):
+            entry_key = value = None
+        if entry_key != key:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def _write(self, path, key, value):
+        """ Writes the entry atomically, removing the previous versions (same kind and identity) and the
+        oldest entries beyond `max_entries`. """
+        for stale in glob.glob(path.rsplit('-', 1)[0] + '-*.pickle'):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((key, value), f, pickle.HIGHEST_PROTOCOL)
+            _replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        self.writes += 1
+        self._prune(path)
+
+    def _prune(self, keep):
+        """ Removes the oldest entries (but `keep`, the one just written) beyond `max_entries`. """
+        paths = glob.glob(os.path.join(self.directory, '*.pickle'))
+        if self.max_entries is None or len(paths) <= self.max_entries:
+            return
+        mtimes = []
+        for path in paths:
+            if path == keep:
+                continue
+            try:
+                mtimes.append((os.path.getmtime(path), path))
+            except OSError:  # removed meanwhile
+                pass
+        mtimes.sort()
+        for _, path in mtimes[:len(mtimes) + 1 - max(self.max_entries, 1)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _rows_key(self, model, plan, fingerprint, sheetname):
+        model_name = '%s.%s' % (model.__module__, model.__name__)
+        identity = (model_name, self._source(fingerprint), sheetname)
+        version = (DISK_CACHE__FORMAT, __version__, fingerprint, plan.fingerprint(), model.HEADER__NUM_ROWS_SKIP)
+        return identity, version
+
+    def get_rows(self, model, plan, fingerprint, sheetname):
+        """ Returns the cached rows (tuples of raw values, in `plan` column order) of the given sheet, None if
+        not cached. """
+        identity, version = self._rows_key(model, plan, fingerprint, sheetname)
+        return self._read(self._path('rows', identity, version), (identity, version))
+
+    def put_rows(self, model, plan, fingerprint, sheetname, rows):
+        identity, version = self._rows_key(model, plan, fingerprint, sheetname)
+        self._write(self._path('rows', identity, version), (identity, version), rows)
+
+    def get_sheet_names(self, fingerprint):
+        identity, version = self._source(fingerprint), (DISK_CACHE__FORMAT, fingerprint)
+        return self._read(self._path('names', identity, version), (identity, version))
+
+    def put_sheet_names(self, fingerprint, names):
+        identity, version = self._source(fingerprint), (DISK_CACHE__FORMAT, fingerprint)
+        self._write(self._path('names', identity, version), (identity, version), list(names))
+
+    def clear(self):
+        """ Removes all the entries (counters are kept). """
+        for path in glob.glob(os.path.join(self.directory, '*.pickle')):
+            os.remove(path)
+
+    def info(self):
+        return {
+            'entries': len(glob.glob(os.path.join(self.directory, '*.pickle'))),
+            'hits': self.hits,
+            'misses': self.misses,
+            'writes': self.writes,
+        }
@@ -0,0 +1,79 @@
+from array import array
+
+
+CATEGORY_CACHE__MAX_SIZE = 10000  # memoized distinct raw values per categorical column (see `TextColumn.category`)
+
+
+class Categories(object):
+    """ Dictionary encoding of a `categorical` text column over the rows of a load: the distinct attribute
+    `values` (cleaned texts, None included), in order of first occurrence, and the `codes` of the rows (indexes
+    into `values`, an int array in row order). Built along with the `cache.LoadedSheet` of each sheet (see
+    `XLSSheetModel.categories` for a whole load). """
+
+    __slots__ = ('attr_name', 'values', 'codes', '_index')
+
+    def __init__(self, attr_name, values=None):
+        self.attr_name = attr_name
+        self.values = []
+        self.codes = array('i')
+        self._index = {}  # {value: code}
+        if values is not None:
+            self.extend(values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __getitem__(self, code):
+        return self.values[code]
+
+    def __repr__(self):
+        return '<Categories %s: %d value(s), %d row(s)>' % (self.attr_name, len(self.values), len(self.codes))
+
+    def code(self, value):
+        """ Returns the code of the given value, None if no row has it. """
+        return self._index.get(value)
+
+    def add(self, value):
+        """ Returns the code of the given value, added as a new category if needed. """
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def extend(self, values):
+        """ Appends the codes of the given (row) values. """
+        add = self.add
+        self.codes.extend(add(value) for value in values)
+
+    def decode(self, codes=None):
+        """ Returns the values of the given codes (all the rows by default). """
+        values = self.values
+        return [values[code] for code in (self.codes if codes is None else codes)]
+
+    def merge(self, other):
+        """ Appends the rows of another `Categories` (of the same attribute), re-encoding their codes. """
+        recode = [self.add(value) for value in other.values]
+        self.codes.extend(recode[code] for code in other.codes)
+
+    def groups(self, rows):
+        """ Returns the given rows (the encoded ones, in the same order) grouped by code: [[row]] per category. """
+        groups = [[] for _ in self.values]
+        for row, code in zip(rows, self.codes):
+            groups[code].append(row)
+        return groups
+
+    def select(self, rows, value):
+        """ Returns the given rows (the encoded ones, in the same order) having the given value. """
+        code = self._index.get(value)
+        if code is None:
+            return []
+        return [row for row, row_code in zip(rows, self.codes) if row_code == code]
+
+
+def categorical_columns(model):
+    """ Returns the `categorical` text columns of the model: {attribute name: column}. """
+    return dict((attr_name, col) for attr_name, col in model._columns().items() if getattr(col, 'categorical', False))
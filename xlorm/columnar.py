@@ -0,0 +1,340 @@
+import datetime
+from array import array
+from collections import OrderedDict
+
+import xlrd
+
+from .stats import PHASE__BUILD, PHASE__CONVERT, PHASE__PARSE, SKIP__NO_DATA, timer
+from .util import convert_cell_value, convert_date_values, integer_types, iter_rows
+
+
+try:
+    array('q')
+    INT64_TYPECODE = 'q'
+except ValueError:  # Python 2
+    INT64_TYPECODE = 'l'
+
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+KIND__TEXT = 'text'
+KIND__NUMBER = 'number'
+KIND__INTEGER = 'integer'
+KIND__DATE = 'date'
+KIND__BOOLEAN = 'boolean'
+
+
+def date_to_microseconds(value):
+    """ Returns the given date/datetime as microseconds since the Unix epoch (1970-01-01) and a time
+    as microseconds since midnight (numpy `datetime64[us]` like). None for any other value. """
+    if isinstance(value, datetime.datetime):
+        delta = value - EPOCH
+    elif isinstance(value, datetime.date):
+        delta = datetime.datetime(value.year, value.month, value.day) - EPOCH
+    elif isinstance(value, datetime.time):
+        delta = datetime.timedelta(hours=value.hour, minutes=value.minute, seconds=value.second,
+                                   microseconds=value.microsecond)
+    else:
+        return None
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+class Bitmap(object):
+    """ Packed sequence of booleans (1 bit per value, least significant bit first). """
+
+    __slots__ = ('bits', 'length')
+
+    def __init__(self):
+        self.bits = bytearray()
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError(i)
+        return bool(self.bits[i >> 3] >> (i & 7) & 1)
+
+    def __iter__(self):
+        for i in range(self.length):
+            yield self[i]
+
+    def extend(self, flags):
+        bits = self.bits
+        i = self.length
+        for flag in flags:
+            if not i & 7:
+                bits.append(0)
+            if flag:
+                bits[i >> 3] |= 1 << (i & 7)
+            i += 1
+        self.length = i
+
+    def count(self):
+        """ Returns the number of set bits. """
+        return sum(bin(byte).count('1') for byte in self.bits)
+
+    def to_numpy(self):
+        import numpy
+        bits = numpy.frombuffer(bytes(self.bits), dtype=numpy.uint8)
+        return numpy.unpackbits(bits, bitorder='little')[:self.length].astype(bool)
+
+
+class ColumnArray(object):
+    """ A mapped column read as a single contiguous array (`values`) along with a separate `null_mask`:
+    - text: list of (cleaned) strings
+    - number: array('d')
+    - integer: int64 array
+    - date: int64 array of microseconds since the epoch (see `date_to_microseconds`)
+    - boolean: `Bitmap`
+    Null entries hold a zero value (empty string for text). """
+
+    __slots__ = ('name', 'kind', 'values', 'null_mask')
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        if kind == KIND__TEXT:
+            self.values = []
+        elif kind == KIND__NUMBER:
+            self.values = array('d')
+        elif kind == KIND__BOOLEAN:
+            self.values = Bitmap()
+        else:
+            self.values = array(INT64_TYPECODE)
+        self.null_mask = Bitmap()
+
+    def __len__(self):
+        return len(self.null_mask)
+
+    def __getitem__(self, i):
+        """ Returns the stored value at the given position (None if null). """
+        if self.null_mask[i]:
+            return None
+        return self.values[i]
+
+    def extend(self, values, nulls=None):
+        """ Appends the given attribute values (see `Column.python_value`). Nulls are the None values
+        unless a sequence of `nulls` flags is given. """
+        zero = u'' if self.kind == KIND__TEXT else 0
+        self.null_mask.extend((value is None for value in values) if nulls is None else nulls)
+        self.values.extend(zero if value is None else value for value in values)
+
+    def to_numpy(self, masked=True):
+        """ Returns the column as a numpy (masked) array. Requires numpy. """
+        import numpy
+        if self.kind == KIND__TEXT:
+            data = numpy.array(self.values, dtype=object)
+        elif self.kind == KIND__NUMBER:
+            data = numpy.frombuffer(self.values, dtype=numpy.float64)
+        elif self.kind == KIND__BOOLEAN:
+            data = self.values.to_numpy()
+        else:
+            data = numpy.frombuffer(self.values, dtype=numpy.int64)
+            if self.kind == KIND__DATE:
+                data = data.view('datetime64[us]')
+        if masked:
+            return numpy.ma.MaskedArray(data, mask=self.null_mask.to_numpy())
+        return data
+
+
+def _number(value):
+    if isinstance(value, (float,) + integer_types) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+def _integer(value):
+    if value is not None and INT64_MIN <= value <= INT64_MAX:
+        return value
+    return None
+
+
+STORAGE_CONVERTERS = {
+    KIND__TEXT: lambda value: value,
+    KIND__NUMBER: _number,
+    KIND__INTEGER: _integer,
+    KIND__DATE: date_to_microseconds,
+    KIND__BOOLEAN: lambda value: value,
+}
+
+
+class ColumnTable(object):
+    """ Column oriented result of a load: {attribute name: `ColumnArray`} plus the `rows` numbers
+    (as in `XLSSheetModel.row`) and the (sheetname, first index) of each loaded sheet. """
+
+    def __init__(self, columns):
+        self.columns = OrderedDict((col.name, col) for col in columns)
+        self.rows = array(INT64_TYPECODE)
+        self.sheets = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def keys(self):
+        return self.columns.keys()
+
+    def to_numpy(self, masked=True):
+        """ Returns {attribute name: numpy array} (see `ColumnArray.to_numpy`). Requires numpy. """
+        return OrderedDict((name, col.to_numpy(masked=masked)) for name, col in self.columns.items())
+
+    def to_pandas(self):
+        """ Returns a pandas DataFrame (nulls as NaN/NaT/None), indexed by row number. Requires pandas. """
+        import pandas
+        index = pandas.Index(self.rows, name='row')
+        return pandas.DataFrame(OrderedDict(
+            (name, pandas.Series(col.to_numpy(), index=index)) for name, col in self.columns.items()))
+
+
+class RowColumns(object):
+    """ The mapped columns of a sheet with no whole column access (e.g. a streamed .xlsx sheet), gathered
+    in a single pass over its rows, with the xlrd `col_types`/`col_values` interface. """
+
+    def __init__(self, sheet, plan, skip_header_rows=0):
+        colxs = sorted(set(col.column_index for col in plan))
+        self.ctypes = dict((colx, []) for colx in colxs)
+        self.values = dict((colx, []) for colx in colxs)
+        self.nrows = skip_header_rows
+        self.ncols = 0
+        empty = xlrd.XL_CELL_EMPTY
+        for rx, ctypes, values in iter_rows(sheet, skip_header_rows, plan.width):
+            n = len(ctypes)
+            self.ncols = max(self.ncols, n)
+            for colx in colxs:
+                if colx < n:
+                    self.ctypes[colx].append(ctypes[colx])
+                    self.values[colx].append(values[colx])
+                else:
+                    self.ctypes[colx].append(empty)
+                    self.values[colx].append(u'')
+            self.nrows = rx + 1
+
+    def col_types(self, colx, start_rowx=0):
+        if colx >= self.ncols:
+            raise IndexError(colx)
+        return self.ctypes[colx]
+
+    def col_values(self, colx, start_rowx=0):
+        if colx >= self.ncols:
+            raise IndexError(colx)
+        return self.values[colx]
+
+
+def read_sheet_columns(sheet, plan, skip_header_rows=0, datemode=None, stats=None):
+    """ Reads whole columns (xlrd's `col_types`/`col_values`, see `RowColumns` for the other sheets) of the
+    given sheet, applying the same conversions and row rules as `ReadPlan.read_row` (counted in the given
+    `stats.LoadStats`, if any).
+    Returns ({attribute name: [raw python value] or None if missing optional column}, [kept row index]). """
+
+    start = timer()
+    columns_source = sheet if hasattr(sheet, 'col_types') else RowColumns(sheet, plan, skip_header_rows)
+    if stats is not None and stats.timed:
+        stats.add_time(PHASE__PARSE, timer() - start)
+    start = timer()
+    n = max(columns_source.nrows - skip_header_rows, 0)
+    keep = bytearray(b'\x01') * n
+    has_data = bytearray(n)  # any non optional value found
+    columns = {}
+    for col in plan:
+        colx = col.column_index
+        try:
+            ctypes = columns_source.col_types(colx, skip_header_rows)
+            raws = columns_source.col_values(colx, skip_header_rows)
+        except IndexError:
+            if col.optional:
+                columns[col.attr_name] = None
+                continue
+            raise
+        # default conversion: the whole column at once (memoized dates, errors raised for the kept rows only)
+        converted = convert_date_values(ctypes[:n], raws[:n], datemode) if col.convert is convert_cell_value else None
+        result = [None] * n
+        for i in range(n):
+            if not keep[i]:
+                continue
+            if converted is not None:
+                val, skip = col.check(converted[i], sheet.name, skip_header_rows + i, stats)
+            else:
+                val, skip = col.read_cell(ctypes[i], raws[i], datemode, sheet.name, skip_header_rows + i, stats)
+            if skip is not None:
+                keep[i] = 0
+                continue
+            if val is not None and not col.optional:
+                has_data[i] = 1
+            result[i] = val
+        columns[col.attr_name] = result
+    kept = [i for i in range(n) if keep[i] and has_data[i]]
+    if stats is not None:
+        if stats.timed:
+            stats.add_time(PHASE__CONVERT, timer() - start)
+        stats.rows_scanned += n
+        stats.rows_returned += len(kept)
+        stats.rows_skipped[SKIP__NO_DATA] += sum(1 for i in range(n) if keep[i] and not has_data[i])
+    return columns, kept
+
+
+def column_kind(column, ctype=None):
+    """ Returns the `ColumnArray` kind for the given model column (or xlrd cell type, for legacy confs). """
+    from . import BooleanColumn, DateColumn, IntegerColumn, NumberColumn
+    if isinstance(column, IntegerColumn):
+        return KIND__INTEGER
+    if isinstance(column, NumberColumn) or (column is None and ctype == xlrd.XL_CELL_NUMBER):
+        return KIND__NUMBER
+    if isinstance(column, DateColumn) or (column is None and ctype == xlrd.XL_CELL_DATE):
+        return KIND__DATE
+    if isinstance(column, BooleanColumn) or (column is None and ctype == xlrd.XL_CELL_BOOLEAN):
+        return KIND__BOOLEAN
+    return KIND__TEXT
+
+
+def load_columns(model, sheetnames, workbook):
+    """ Returns the `ColumnTable` of the given model sheets (see `XLSSheetModel.to_columns`). """
+
+    plan = model.read_plan()
+    model_columns = model._columns()
+    converters = []
+    arrays = []
+    for col in plan:
+        column = model_columns.get(col.attr_name)
+        kind = column_kind(column, col.ctype)
+        python_value = column.python_value if column is not None else None
+        converters.append((col.attr_name, python_value, STORAGE_CONVERTERS[kind]))
+        arrays.append(ColumnArray(col.attr_name, kind))
+    table = ColumnTable(arrays)
+
+    skip = model.HEADER__NUM_ROWS_SKIP
+    for sheetname in sheetnames:
+        stats = workbook.sheet_stats(sheetname)
+        sheet = workbook.sheet(sheetname, stats)
+        try:
+            columns, kept = read_sheet_columns(sheet, plan, skip, workbook.book.datemode, stats)
+        finally:
+            workbook.release_sheet(sheetname)
+            stats.finish()
+        start = timer()
+        table.sheets.append((sheetname, len(table)))
+        table.rows.extend(range(skip + 1, skip + 1 + len(kept)))
+        for (attr_name, python_value, to_storage), col_array in zip(converters, arrays):
+            raws = columns[attr_name]
+            if raws is None:
+                raws = [None] * (kept[-1] + 1 if kept else 0)
+            if python_value is None:
+                values = [to_storage(raws[i]) for i in kept]
+            else:
+                values = [to_storage(python_value(raws[i])) for i in kept]
+            # boolean attributes are never None: nulls are the empty cells
+            nulls = [raws[i] is None for i in kept] if col_array.kind == KIND__BOOLEAN else None
+            col_array.extend(values, nulls)
+        if stats.timed:
+            stats.parent.add_time(PHASE__BUILD, timer() - start)
+    return table
@@ -0,0 +1,406 @@
+import csv
+import datetime
+import io
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from itertools import chain
+from xml.sax.saxutils import escape
+
+from .categories import categorical_columns
+from .util import PY2, integer_types, text_type
+
+
+FORMAT__CSV = 'csv'
+FORMAT__XLSX = 'xlsx'
+
+FORMATS = (FORMAT__CSV, FORMAT__XLSX)
+
+EXCEL_EPOCH = datetime.datetime(1899, 12, 30)
+
+WRITE_BUFFER_ROWS = 1000  # rows written to the file at once
+
+# characters XML can't hold, and carriage returns (read back as line feeds otherwise): written `_xHHHH_`
+RE__XML_INVALID_CHARS = re.compile(u'[\x00-\x08\x0b-\x1f\ufffe\uffff]')
+# literal `_xHHHH_` texts, escaped (as Excel does) not to be read as escaped characters
+RE__XML_ESCAPE_LIKE = re.compile(u'_(x[0-9A-Fa-f]{4}_)')
+
+
+def export_columns(model):
+    """ Returns the (column index, header, attribute name) of the exported columns of the model, in column
+    index order (see `XLSSheetModel.read_plan`). """
+    return [(col.column_index, col.column_name, col.attr_name) for col in model.read_plan()]
+
+
+def iter_export_rows(columns, rows):
+    """ Yields the values of the given models, compact records or dictionaries (attribute values) laid out
+    by column index: lists of `width` values, None for the unmapped columns. """
+    width = columns[-1][0] + 1 if columns else 0
+    rows = iter(rows)
+    try:
+        first = next(rows)
+    except StopIteration:
+        return
+    if isinstance(first, dict):
+        def get(row, attr_name):
+            return row.get(attr_name)
+    else:
+        get = getattr
+    for row in chain((first,), rows):
+        values = [None] * width
+        for colx, _, attr_name in columns:
+            values[colx] = get(row, attr_name)
+        yield values
+
+
+def header_row(columns):
+    values = [None] * (columns[-1][0] + 1 if columns else 0)
+    for colx, header, _ in columns:
+        values[colx] = header
+    return values
+
+
+def excel_date(value):
+    """ Returns the (1900 datemode) serial number of a date, datetime or time. """
+    if isinstance(value, datetime.datetime):
+        delta = value - EXCEL_EPOCH
+    elif isinstance(value, datetime.date):
+        delta = datetime.datetime(value.year, value.month, value.day) - EXCEL_EPOCH
+    else:
+        delta = datetime.timedelta(hours=value.hour, minutes=value.minute, seconds=value.second,
+                                   microseconds=value.microsecond)
+    return delta.days + (delta.seconds + delta.microseconds / 1e6) / 86400.0
+
+
+def csv_value(value):
+    if value is None:
+        return u''
+    if isinstance(value, bool):
+        return u'TRUE' if value else u'FALSE'
+    if isinstance(value, float):
+        return text_type(repr(value))
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return text_type(value)
+
+
+def write_csv(f, columns, rows, header=True, **fmtparams):
+    """ Writes the rows (see `iter_export_rows`) as CSV to the given text file (binary on Python 2).
+    Returns the number of rows written. """
+    writer = csv.writer(f, **fmtparams)
+    if PY2:
+        def encoded(values):
+            return [value.encode('utf-8') for value in values]
+    else:
+        def encoded(values):
+            return values
+    if header:
+        writer.writerow(encoded([csv_value(value) for value in header_row(columns)]))
+    count = 0
+    for values in iter_export_rows(columns, rows):
+        writer.writerow(encoded([csv_value(value) for value in values]))
+        count += 1
+    return count
+
+
+def column_letters(colx):
+    letters = ''
+    colx += 1
+    while colx:
+        colx, remainder = divmod(colx - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def xml_text(s):
+    """ Escapes the text for SpreadsheetML: XML escapes and `_xHHHH_` for the characters XML can't hold. """
+    s = RE__XML_ESCAPE_LIKE.sub(u'_x005F_\\1', s)
+    return RE__XML_INVALID_CHARS.sub(lambda m: u'_x%04X_' % ord(m.group(0)), escape(s, {'"': '&quot;'}))
+
+
+# cell formats (`s`): 1 date and time, 2 date, 3 time (built-in number formats 22, 14 and 21)
+XF__DATETIME = 1
+XF__DATE = 2
+XF__TIME = 3
+
+
+def _text_cell(ref, value):
+    return u'<c r="%s" t="inlineStr"><is><t xml:space="preserve">%s</t></is></c>' % (ref, xml_text(text_type(value)))
+
+
+def _categorical_cell():
+    """ Returns a cell function (see `xlsx_cell`) escaping each distinct text only once, for the columns
+    repeating the same (shared, see `TextColumn.categorical`) texts. """
+    escaped = {}
+
+    def cell(ref, value):
+        if value.__class__ is not text_type:
+            return xlsx_cell(ref, value)
+        text = escaped.get(value)
+        if text is None:
+            text = escaped[value] = xml_text(value)
+        return u'<c r="%s" t="inlineStr"><is><t xml:space="preserve">%s</t></is></c>' % (ref, text)
+    return cell
+
+
+def _date_cell(xf):
+    return lambda ref, value: u'<c r="%s" s="%d"><v>%r</v></c>' % (ref, xf, excel_date(value))
+
+
+# {value type: cell function}, exact types (see `xlsx_cell`)
+XLSX__CELLS = {
+    bool: lambda ref, value: u'<c r="%s" t="b"><v>%d</v></c>' % (ref, value),
+    float: lambda ref, value: u'<c r="%s"><v>%r</v></c>' % (ref, value),
+    datetime.datetime: _date_cell(XF__DATETIME),
+    datetime.date: _date_cell(XF__DATE),
+    datetime.time: _date_cell(XF__TIME),
+    text_type: _text_cell,
+}
+for _type in integer_types:
+    XLSX__CELLS[_type] = lambda ref, value: u'<c r="%s"><v>%d</v></c>' % (ref, value)
+
+
+def xlsx_cell(ref, value):
+    """ Returns the SpreadsheetML cell of a value (texts inline, no shared strings to keep in memory). """
+    cell = XLSX__CELLS.get(value.__class__)
+    if cell is None:  # subclasses
+        for value_type in (bool, float) + integer_types + (datetime.datetime, datetime.date, datetime.time):
+            if isinstance(value, value_type):
+                cell = XLSX__CELLS[value_type]
+                break
+        else:
+            cell = _text_cell
+    return cell(ref, value)
+
+
+XLSX__CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>%s</Types>')
+
+XLSX__SHEET_CONTENT_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet%d.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>')
+
+XLSX__ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+    'officeDocument" Target="xl/workbook.xml"/></Relationships>')
+
+XLSX__WORKBOOK = (
+    u'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    u'<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    u'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>%s</sheets></workbook>')
+
+XLSX__WORKBOOK_SHEET = u'<sheet name="%s" sheetId="%d" r:id="rId%d"/>'
+
+XLSX__WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rIdStyles" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>%s</Relationships>')
+
+XLSX__SHEET_REL = (
+    '<Relationship Id="rId%d" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet%d.xml"/>')
+
+XLSX__STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font/></fonts><fills count="1"><fill/></fills><borders count="1"><border/></borders>'
+    '<cellXfs count="4"><xf numFmtId="0"/><xf numFmtId="22" applyNumberFormat="1"/>'
+    '<xf numFmtId="14" applyNumberFormat="1"/><xf numFmtId="21" applyNumberFormat="1"/></cellXfs></styleSheet>')
+
+XLSX__WORKSHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<dimension ref="%s"/><sheetData>')
+
+XLSX__WORKSHEET_END = b'</sheetData></worksheet>'
+
+
+def xlsx_dimension(ncols, nrows):
+    """ Returns the `<dimension>` reference of a sheet of the given size (A1 for an empty sheet). """
+    return 'A1:%s%d' % (column_letters(max(ncols, 1) - 1), max(nrows, 1))
+
+
+def write_xlsx_parts(z, sheetnames, content_types='', rels=''):
+    """ Writes the parts of a workbook of the given sheets to the zip file, but the worksheets themselves
+    (`xl/worksheets/sheet<n>.xml`, from 1): content types, relationships, workbook and styles. `content_types`
+    and `rels` are those of any other part (e.g. shared strings). """
+    numbers = range(1, len(sheetnames) + 1)
+    z.writestr('[Content_Types].xml',
+               XLSX__CONTENT_TYPES % (''.join(XLSX__SHEET_CONTENT_TYPE % i for i in numbers) + content_types))
+    z.writestr('_rels/.rels', XLSX__ROOT_RELS)
+    z.writestr('xl/workbook.xml', (XLSX__WORKBOOK % u''.join(
+        XLSX__WORKBOOK_SHEET % (xml_text(name), i, i) for i, name in zip(numbers, sheetnames))).encode('utf-8'))
+    z.writestr('xl/_rels/workbook.xml.rels',
+               XLSX__WORKBOOK_RELS % (''.join(XLSX__SHEET_REL % (i, i) for i in numbers) + rels))
+    z.writestr('xl/styles.xml', XLSX__STYLES)
+
+
+XLSX__SHARED_STRINGS_CONTENT_TYPE = (
+    '<Override PartName="/xl/sharedStrings.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>')
+
+XLSX__SHARED_STRINGS_REL = (
+    '<Relationship Id="rIdStrings" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" '
+    'Target="sharedStrings.xml"/>')
+
+
+def _xlsx_sheet(header, rows, strings):
+    """ Returns the worksheet XML, adding its texts to the shared `strings` ({text: index}). """
+
+    def string_cell(ref, value):
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return '<c r="%s" t="s"><v>%d</v></c>' % (ref, index)
+
+    letters = [column_letters(colx) for colx in range(len(header))]
+    parts = [XLSX__WORKSHEET_START % xlsx_dimension(len(header), len(rows) + 1)]
+    parts.append('<row r="1">%s</row>' % ''.join(string_cell(letter + '1', h) for letter, h in zip(letters, header)))
+    for rowx, row in enumerate(rows):
+        r = str(rowx + 2)
+        cells = []
+        for letter, value in zip(letters, row):
+            if value is None:
+                continue
+            if isinstance(value, text_type):
+                cells.append(string_cell(letter + r, value))
+            else:
+                cells.append(xlsx_cell(letter + r, value))
+        parts.append('<row r="%s">%s</row>' % (r, ''.join(cells)))
+    return u''.join(parts).encode('utf-8') + XLSX__WORKSHEET_END
+
+
+def write_xlsx_sheets(f, sheets):
+    """ Writes a (small) .xlsx workbook, held in memory, with the given sheets: [(sheet name, header, rows)], to
+    the given path or binary file. Texts are written in the shared strings, as Excel does. """
+    strings = {}
+    with zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as z:
+        for sheetx, (name, header, rows) in enumerate(sheets):
+            z.writestr('xl/worksheets/sheet%d.xml' % (sheetx + 1), _xlsx_sheet(header, list(rows), strings))
+        sst = sorted(strings, key=strings.get)
+        z.writestr('xl/sharedStrings.xml', (
+            u'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            u'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="%d" uniqueCount="%d">'
+            % (len(sst), len(sst)) +
+            u''.join(u'<si><t xml:space="preserve">%s</t></si>' % xml_text(s) for s in sst) +
+            u'</sst>').encode('utf-8'))
+        write_xlsx_parts(z, [name for name, _, _ in sheets], content_types=XLSX__SHARED_STRINGS_CONTENT_TYPE,
+                         rels=XLSX__SHARED_STRINGS_REL)
+
+
+def _write_sheet_data(stream, columns, rows, header=True, categorical=()):
+    """ Writes the `<row>` elements to the given binary stream, a buffer of rows at a time. Returns the number
+    of rows written (header included). """
+    letters = [column_letters(colx) for colx in range(columns[-1][0] + 1 if columns else 0)]
+    cells = [_categorical_cell() if colx in categorical else xlsx_cell for colx in range(len(letters))]
+    rows = iter_export_rows(columns, rows)
+    if header:
+        rows = chain((header_row(columns),), rows)
+    count = 0
+    buffer = []
+    for rowx, values in enumerate(rows):
+        r = text_type(rowx + 1)
+        buffer.append(u'<row r="%s">%s</row>' % (r, u''.join(
+            cell(letter + r, value) for letter, cell, value in zip(letters, cells, values) if value is not None)))
+        count += 1
+        if len(buffer) >= WRITE_BUFFER_ROWS:
+            stream.write(u''.join(buffer).encode('utf-8'))
+            del buffer[:]
+    stream.write(u''.join(buffer).encode('utf-8'))
+    return count
+
+
+def _write_sheet_xml(stream, columns, rows, header=True, categorical=()):
+    """ Writes the worksheet XML to the given binary stream. The rows go through a temporary file first: the
+    `<dimension>` element, before them, holds their number. Returns the number of rows written. """
+    with tempfile.TemporaryFile() as rows_file:
+        count = _write_sheet_data(rows_file, columns, rows, header, categorical)
+        stream.write((XLSX__WORKSHEET_START % xlsx_dimension(columns[-1][0] + 1 if columns else 0, count))
+                     .encode('utf-8'))
+        rows_file.seek(0)
+        shutil.copyfileobj(rows_file, stream)
+    stream.write(XLSX__WORKSHEET_END)
+    return count - 1 if header else count
+
+
+def write_xlsx(f, columns, rows, sheetname='Sheet1', header=True, categorical=()):
+    """ Writes the rows (see `iter_export_rows`) as a single sheet .xlsx workbook to the given path or binary
+    file. The sheet is streamed into the zip file through a temporary file (see `_write_sheet_xml`), so that
+    memory use doesn't depend on the number of rows. The texts of the `categorical` column indexes are escaped
+    once. Returns the number of rows written. """
+    with zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as z:
+        if PY2:  # no zip member streaming
+            fd, tmp_path = tempfile.mkstemp(suffix='.xml')
+            try:
+                with os.fdopen(fd, 'wb') as tmp:
+                    count = _write_sheet_xml(tmp, columns, rows, header, categorical)
+                z.write(tmp_path, 'xl/worksheets/sheet1.xml')
+            finally:
+                os.remove(tmp_path)
+        else:
+            with z.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as stream:
+                count = _write_sheet_xml(stream, columns, rows, header, categorical)
+        write_xlsx_parts(z, [sheetname])
+    return count
+
+
+def detect_format(path):
+    """ Returns the export format of a file name, from its extension. """
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    if ext not in FORMATS:
+        raise ValueError('Unknown export format for "%s" (available: %s)' % (path, ', '.join(FORMATS)))
+    return ext
+
+
+def fs_path(path):
+    """ Returns the file system path of a `str` or `os.PathLike` destination, None for file objects. """
+    if isinstance(path, (bytes, text_type)):
+        return path
+    if hasattr(path, '__fspath__'):
+        return path.__fspath__()
+    return None
+
+
+def export_models(model, rows, path, format=None, sheetname='Sheet1', header=True, **fmtparams):
+    """ Writes the given models (see `XLSSheetModel.export`) to a path (`str` or `os.PathLike`) or a file
+    object: binary for .xlsx, text or binary (UTF-8 encoded) for CSV. Returns the number of rows written. """
+    filename = fs_path(path)
+    if format is None:
+        if filename is None:
+            raise ValueError('The export format is required when writing to a file object')
+        format = detect_format(filename)
+    elif format not in FORMATS:
+        raise ValueError('Unknown export format "%s" (available: %s)' % (format, ', '.join(FORMATS)))
+    columns = export_columns(model)
+    if format == FORMAT__XLSX:
+        categorical = set(col.column_index for col in categorical_columns(model).values())
+        return write_xlsx(path if filename is None else filename, columns, rows, sheetname=sheetname, header=header,
+                          categorical=categorical)
+    if filename is None:
+        if PY2 or isinstance(path, io.TextIOBase):
+            return write_csv(path, columns, rows, header=header, **fmtparams)
+        f = io.TextIOWrapper(path, encoding='utf-8', newline='')
+        try:
+            return write_csv(f, columns, rows, header=header, **fmtparams)
+        finally:
+            f.flush()
+            f.detach()  # the caller's file stays open
+    if PY2:
+        f = open(filename, 'wb')
+    else:
+        f = io.open(filename, 'w', newline='', encoding='utf-8')
+    with f:
+        return write_csv(f, columns, rows, header=header, **fmtparams)
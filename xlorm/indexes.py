@@ -0,0 +1,94 @@
+from collections import OrderedDict
+
+
+def column_python_value(model, attr_name):
+    """ Returns the `Column.python_value` of the given attribute. Raises AttributeError for unknown attributes. """
+    column = model._columns().get(attr_name)
+    if column is None:
+        raise AttributeError('Unknown column "%s"' % (attr_name))
+    return column.python_value
+
+
+def attribute_getter(model, attr_name):
+    """ Returns a function returning the attribute value (see `Column.python_value`) of a loaded model row,
+    without caching it in the instance. Raises AttributeError for unknown attributes. """
+    python_value = column_python_value(model, attr_name)
+    return lambda row: python_value(row.__dict__[attr_name])
+
+
+def index_columns(model):
+    """ Returns the {attribute name: `Column.python_value`} of the `indexed` columns of the model. """
+    return dict((attr_name, col.python_value) for attr_name, col in model._columns().items() if col.indexed)
+
+
+def filter_sheets(model, sheets, filters):
+    """ Returns new models of the rows of the given `LoadedSheet`s whose attribute values equal all the given
+    {attribute name: value} filters, in sheet and row order. Candidates are taken from the secondary index of
+    an indexed filter attribute, if any, or selected by the category code of a categorical one, and then
+    checked against the other filters. Only the matching rows are built. """
+    python_values = dict((attr_name, column_python_value(model, attr_name)) for attr_name in filters)
+    result = []
+    for sheet in sheets:
+        indexed = [attr_name for attr_name in filters if attr_name in sheet.indexes]
+        encoded = [attr_name for attr_name in filters if attr_name in sheet.categories]
+        if indexed:
+            positions = sheet.indexes[indexed[0]].get(filters[indexed[0]], ())
+            selected = indexed[0]
+        elif encoded:
+            positions = sheet.categories[encoded[0]].select(range(len(sheet)), filters[encoded[0]])
+            selected = encoded[0]
+        else:
+            positions = range(len(sheet))
+            selected = None
+        checks = [(sheet.column(attr_name), python_value, filters[attr_name])
+                  for attr_name, python_value in python_values.items() if attr_name != selected]
+        rows = sheet.values
+        matches = []
+        for position in positions:
+            values = rows[position]
+            for i, python_value, value in checks:
+                if python_value(values[i]) != value:
+                    break
+            else:
+                matches.append(position)
+        result += sheet.models(matches)
+    return result
+
+
+def group_sheets(model, sheets, attr_name):
+    """ Returns new models of the rows of the given `LoadedSheet`s grouped by attribute value: {value: [row]},
+    ordered by first occurrence. The secondary index (or the category codes) of an indexed (or categorical)
+    attribute is used. """
+    groups = OrderedDict()
+    get = attribute_getter(model, attr_name)
+    for sheet in sheets:
+        rows = sheet.models()
+        index = sheet.indexes.get(attr_name)
+        categories = sheet.categories.get(attr_name)
+        if index is not None:
+            items = ((value, [rows[i] for i in positions]) for value, positions in index.items())
+        elif categories is not None:
+            items = zip(categories.values, categories.groups(rows))
+        else:
+            items = ((get(row), (row,)) for row in rows)
+        for value, matches in items:
+            try:
+                groups[value].extend(matches)
+            except KeyError:
+                groups[value] = list(matches)
+    return groups
+
+
+def hash_join(rows, get, groups, outer=False):
+    """ Returns the (row, other row) pairs of the given rows and the other rows grouped by join value
+    ({value: [other row]}, see `group_sheets`) having the same value (`get(row)`). Rows with no match are
+    paired with None if `outer`. """
+    result = []
+    for row in rows:
+        matches = groups.get(get(row))
+        if matches:
+            for other in matches:
+                result.append((row, other))
+        elif outer:
+            result.append((row, None))
+    return result
@@ -0,0 +1,100 @@
+import multiprocessing
+import traceback
+
+
+class LoadError(Exception):
+    """ Error loading a file in `load_many`, with the (formatted) traceback of the worker. """
+
+    def __init__(self, filename, error_type, message, traceback_text=None):
+        super(LoadError, self).__init__('%s: %s: %s' % (filename, error_type, message))
+        self.filename = filename
+        self.error_type = error_type
+        self.message = message
+        self.traceback = traceback_text
+
+
+class LoadResult(object):
+    """ The rows (models or compact records) loaded from a file, or the `LoadError` if it failed. """
+
+    __slots__ = ('filename', 'rows', 'error')
+
+    def __init__(self, filename, rows=None, error=None):
+        self.filename = filename
+        self.rows = rows if rows is not None else []
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return '<LoadResult %s: %s>' % (self.filename, self.error or '%d rows' % len(self.rows))
+
+
+def _load_task(task):
+    """ Worker: reads the sheets of a file, returning compact rows (tuples of raw values, see
+    `XLSSheetModel._row_attrs`) instead of model instances: (filename, [(sheetname, [values])], error). """
+    model, filename, sheetnames = task
+    try:
+        params = {'filename': filename}
+        if sheetnames is not None:
+            params['sheetnames'] = sheetnames
+        filename, workbook, sheetnames = model._load_args(None, params)
+        sheets = []
+        with workbook:
+            for sheetname in sheetnames:
+                sheets.append((sheetname, list(model._dics_values(model._iter_sheet_dics(sheetname, workbook)))))
+        return filename, sheets, None
+    except Exception as e:
+        return filename, None, (e.__class__.__name__, str(e), traceback.format_exc())
+
+
+def _build_rows(model, filename, sheets, compact=False):
+    """ Returns the models (or compact records) of the rows read by the workers, built by the model (see
+    `XLSSheetModel.iter_from_dic_list`). """
+    result = []
+    for sheetname, rows in sheets:
+        result += model._models_from_values(filename, sheetname, rows, compact=compact)
+    return result
+
+
+def load_many(model, files, sheetnames=None, workers=None, compact=False):
+    """ Loads the given files (see `XLSSheetModel.load_many`), spreading the parsing over a pool of
+    `workers` processes (one per CPU by default). Returns a `LoadResult` per file, in the given order. """
+
+    files = list(files)
+    if sheetnames is None:
+        tasks = [(model, filename, None) for filename in files]
+    else:
+        # one task per sheet, so that a few big files are also spread
+        tasks = [(model, filename, [sheetname]) for filename in files for sheetname in sheetnames]
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    workers = min(workers, len(tasks))
+    if workers <= 1:
+        outputs = [_load_task(task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(workers)
+        try:
+            outputs = list(pool.imap(_load_task, tasks, chunksize=1))
+        finally:
+            pool.close()
+            pool.join()
+
+    # group the (ordered) task outputs per file: a file fails if any of its sheets fails
+    results = []
+    tasks_per_file = len(tasks) // len(files) if files else 0
+    for i, filename in enumerate(files):
+        sheets = []
+        error = None
+        for _, file_sheets, task_error in outputs[i * tasks_per_file:(i + 1) * tasks_per_file]:
+            if task_error is not None:
+                error = error or LoadError(filename, *task_error)
+            else:
+                sheets.extend(file_sheets)
+        if error is not None:
+            results.append(LoadResult(filename, error=error))
+        else:
+            results.append(LoadResult(filename, _build_rows(model, filename, sheets, compact=compact)))
+    return results
@@ -0,0 +1,266 @@
+import itertools
+import operator
+
+from .stats import PHASE__CONVERT, SKIP__FILTERED, SKIP__NO_DATA, timer
+from .util import iter_rows
+
+
+def _contains(value, arg):
+    return arg in value
+
+
+def _startswith(value, arg):
+    return value.startswith(arg)
+
+
+def _endswith(value, arg):
+    return value.endswith(arg)
+
+
+def _in(value, arg):
+    return value in arg
+
+
+LOOKUPS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'lt': operator.lt,
+    'lte': operator.le,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'in': _in,
+    'contains': _contains,
+    'startswith': _startswith,
+    'endswith': _endswith,
+}
+
+
+class Predicate(object):
+    """ A `<attr>__<lookup>=<arg>` filter, tested against the attribute value (see `Column.python_value`). """
+
+    __slots__ = ('attr_name', 'lookup', 'arg', 'test')
+
+    def __init__(self, attr_name, lookup, arg):
+        self.attr_name = attr_name
+        self.lookup = lookup
+        self.arg = arg
+        self.test = LOOKUPS.get(lookup)
+
+    def __call__(self, value):
+        if self.lookup == 'isnull':
+            return (value is None) == bool(self.arg)
+        if value is None and self.lookup != 'eq' and self.lookup != 'ne':
+            return False
+        try:
+            return self.test(value, self.arg)
+        except TypeError:  # not comparable (e.g. text and number)
+            return False
+
+    @classmethod
+    def parse(cls, key, arg, attr_names):
+        """ Returns the predicate for the given filter keyword (an attribute name, optionally followed by
+        `__<lookup>`). Raises AttributeError for unknown attributes. """
+        attr_name, lookup = key, 'eq'
+        if key not in attr_names and '__' in key:
+            attr_name, lookup = key.rsplit('__', 1)
+            if lookup not in LOOKUPS and lookup != 'isnull':
+                raise AttributeError('Unknown lookup "%s" in filter "%s"' % (lookup, key))
+        if attr_name not in attr_names:
+            raise AttributeError('Unknown column "%s" in filter "%s"' % (attr_name, key))
+        return cls(attr_name, lookup, arg)
+
+
+class QueryStep(object):
+    """ A column to be read by a `QueryPlan`: its `ColumnPlan`, the model column attribute conversion,
+    the predicates to be tested and whether the value is returned (projected). """
+
+    __slots__ = ('col', 'python_value', 'predicates', 'projected')
+
+    def __init__(self, col, python_value=None, predicates=(), projected=True):
+        self.col = col
+        self.python_value = python_value
+        self.predicates = tuple(predicates)
+        self.projected = projected
+
+
+class QueryPlan(object):
+    """ Read plan of a query: the predicate columns are read (and tested) first, then the other columns
+    filtering rows (not_null, excludes, values), so that rejected rows stop early. Of the remaining columns
+    only the projected ones are converted; the others are just checked for data (see `ReadPlan.read_row`). """
+
+    __slots__ = ('steps', 'presence', 'width', 'nfiltering', 'filtered_presence')
+
+    def __init__(self, read_plan, columns, predicates=(), fields=None):
+        by_attr = {}
+        for predicate in predicates:
+            by_attr.setdefault(predicate.attr_name, []).append(predicate)
+
+        def step(col):
+            column = columns.get(col.attr_name)
+            return QueryStep(col, column.python_value if column is not None else None,
+                             by_attr.get(col.attr_name, ()), fields is None or col.attr_name in fields)
+
+        filtering = [col for col in read_plan if col.attr_name in by_attr]
+        filtering += [col for col in read_plan if col.attr_name not in by_attr
+                      and (col.not_null or col.excludes or col.values is not None)]
+        projected = [col for col in read_plan if col not in filtering
+                     and (fields is None or col.attr_name in fields)]
+        self.steps = tuple(step(col) for col in filtering + projected)
+        self.nfiltering = len(filtering)
+        self.presence = tuple(col for col in read_plan
+                              if col not in filtering and col not in projected and not col.optional)
+        # rows not matching the predicates: only checked for data past the filtering columns (see `read_row`)
+        self.filtered_presence = tuple(col for col in projected if not col.optional) + self.presence
+        used = [step.col for step in self.steps] + list(self.presence)
+        self.width = max(col.column_index for col in used) + 1 if used else 0
+
+    def read_row(self, ctypes, values, datemode=None, sheetname=None, rowx=None, stats=None):
+        """ Returns the row dictionary (only the read columns) if the row is valid and matches the
+        predicates, False if it's valid (a row of `XLSSheetModel.all`) but doesn't match them, None otherwise
+        (see `ReadPlan.read_row`). """
+
+        dic = {}
+        flag = False  # controls if all non optional columns exist
+        filtered = False
+        for i, step in enumerate(self.steps):
+            if filtered and i >= self.nfiltering:
+                break
+            col = step.col
+            colx = col.column_index
+            try:
+                ctype = ctypes[colx]
+            except IndexError:
+                if col.optional:
+                    continue
+                raise
+            val, skip = col.read_cell(ctype, values[colx], datemode, sheetname, rowx, stats)
+            if skip is not None:
+                return None
+            if val is not None and not col.optional:
+                flag = True
+            if filtered:
+                continue
+            if step.predicates:
+                attr_value = step.python_value(val) if step.python_value is not None else val
+                for predicate in step.predicates:
+                    if not predicate(attr_value):
+                        filtered = True
+                        break
+            if step.projected:
+                dic[col.attr_name] = val
+        if not flag:
+            for col in self.filtered_presence if filtered else self.presence:
+                colx = col.column_index
+                if col.has_data(ctypes[colx], values[colx], datemode):
+                    flag = True
+                    break
+        if flag:
+            if filtered:
+                if stats is not None:
+                    stats.skip(SKIP__FILTERED)
+                return False
+            return dic
+        else:
+            if stats is not None:
+                stats.skip(SKIP__NO_DATA)
+            return None
+
+
+def iter_query_rows(sheet, plan, skip_header_rows=0, datemode=None, stats=None):
+    """ Yields the (row number, row dictionary) of the rows of the sheet matching the given `QueryPlan`
+    (see `util.iter_sheet_rows`). Rows are numbered as by `XLSSheetModel.all`: the valid rows, matching or not,
+    from `skip_header_rows + 1`. """
+    read_row, name = plan.read_row, sheet.name
+    row = skip_header_rows
+    rows = iter_rows(sheet, skip_header_rows, plan.width)
+    timed = stats is not None and stats.timed
+    if timed:
+        rows = stats.timed_rows(rows)
+        timings = stats.timings
+    for rx, ctypes, values in rows:
+        if timed:
+            start = timer()
+            dic = read_row(ctypes, values, datemode, name, rx, stats)
+            timings[PHASE__CONVERT] += timer() - start
+        else:
+            dic = read_row(ctypes, values, datemode, name, rx, stats)
+        if stats is not None:
+            stats.rows_scanned += 1
+        if dic is not None:
+            row += 1
+            if dic is not False:
+                if stats is not None:
+                    stats.rows_returned += 1
+                yield row, dic
+
+
+class Query(object):
+    """ Lazy selection of the rows of a model (see `XLSSheetModel.where`): the filters and the projection
+    are evaluated while reading the rows, before any model is built.
+    Returned models have only the projected attributes set (all if no projection) and their `row` is the
+    same as in `XLSSheetModel.all`. """
+
+    def __init__(self, model, predicates=(), fields=None):
+        self.model = model
+        self.predicates = tuple(predicates)
+        self.fields = fields
+        self._plan = None
+
+    def where(self, **filters):
+        """ Returns a new query also filtering by the given `<attr>[__<lookup>]=<value>` filters.
+        Lookups: eq (default), ne, lt, lte, gt, gte, in, contains, startswith, endswith and isnull. """
+        attr_names = self.model._columns()
+        predicates = [Predicate.parse(key, arg, attr_names) for key, arg in sorted(filters.items())]
+        return Query(self.model, self.predicates + tuple(predicates), self.fields)
+
+    def only(self, *fields):
+        """ Returns a new query converting (and setting in the returned models) only the given attributes. """
+        attr_names = self.model._columns()
+        for field in fields:
+            if field not in attr_names:
+                raise AttributeError('Unknown column "%s"' % (field))
+        return Query(self.model, self.predicates, frozenset(fields))
+
+    def plan(self):
+        if self._plan is None:
+            self._plan = QueryPlan(self.model.read_plan(), self.model._columns(), self.predicates, self.fields)
+        return self._plan
+
+    def iter(self, file_contents=None, **params):
+        """ Yields the matching models, reading the sheets given by the same parameters as `all` (the file
+        is opened on the first row read). """
+        model = self.model
+        filename, workbook, sheetnames = model._load_args(file_contents, params)
+        for obj in self._iter(model, filename, workbook, sheetnames, params.get('compact', False)):
+            yield obj
+
+    def _iter(self, model, filename, workbook, sheetnames, compact):
+        plan = self.plan()
+        build = model.iter_records_from_dic_list if compact else model.iter_from_dic_list
+        with workbook:
+            for sheetname in sheetnames:
+                stats = workbook.sheet_stats(sheetname)
+                sheet = workbook.sheet(sheetname, stats)
+                try:
+                    rows = iter_query_rows(sheet, plan, model.HEADER__NUM_ROWS_SKIP, workbook.book.datemode, stats)
+                    # built as by `all` (clean_on_load, categorical values), numbered by the read rows
+                    rows, numbered = itertools.tee(rows)
+                    for obj in build((dic for _, dic in rows), filename, sheetname, (row for row, _ in numbered)):
+                        yield obj
+                finally:
+                    workbook.release_sheet(sheetname)
+                    stats.finish()
+
+    def all(self, file_contents=None, **params):
+        return list(self.iter(file_contents=file_contents, **params))
+
+    def first(self, file_contents=None, **params):
+        """ Returns the first matching model (None if no match), reading no further rows. """
+        it = self.iter(file_contents=file_contents, **params)
+        try:
+            return next(it, None)
+        finally:
+            it.close()
+
+    def count(self, file_contents=None, **params):
+        return sum(1 for _ in self.iter(file_contents=file_contents, **params))
@@ -0,0 +1,121 @@
+from .util import text_type
+
+
+class SheetInfo(object):
+    """ Sheet level metadata shared by all the compact records read from the same sheet. """
+
+    __slots__ = ('filename', 'sheetname')
+
+    def __init__(self, filename, sheetname):
+        self.filename = filename
+        self.sheetname = sheetname
+
+
+class RecordField(object):
+    """ Compact record attribute: the raw cell value lives in a slot and is converted by the model `Column`
+    when read, exactly as for the model attribute. Cleaned text values are cached in a second slot. """
+
+    __slots__ = ('column', 'slot', 'cache_slot')
+
+    def __init__(self, column, slot, cache_slot=None):
+        self.column = column
+        self.slot = slot
+        self.cache_slot = cache_slot
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            raise AttributeError(u'Instance level access only')
+
+        cache_slot = self.cache_slot
+        if cache_slot is not None:
+            try:
+                return cache_slot.__get__(instance, owner)
+            except AttributeError:
+                value = self.column.python_value(self.slot.__get__(instance, owner))
+                cache_slot.__set__(instance, value)
+                return value
+        return self.column.python_value(self.slot.__get__(instance, owner))
+
+    def __set__(self, instance, value):
+        self.slot.__set__(instance, value)
+        if self.cache_slot is not None:
+            try:
+                self.cache_slot.__delete__(instance)
+            except AttributeError:
+                pass
+
+
+class CompactRecord(object):
+    """ Base class of the slotted record classes generated per model (see `XLSSheetModel.record_class`):
+    no instance `__dict__` and the file and sheet names stored once per sheet (`SheetInfo`). """
+
+    __slots__ = ('_sheet', 'row')
+
+    model = None  # the model class the record was generated for
+    _attrs = ()  # column attribute names, in the order of the `__init__` values
+    _slots = ()  # raw value slot descriptors, in the same order
+
+    def __init__(self, sheet, row, values):
+        self._sheet = sheet
+        self.row = row
+        for slot, value in zip(self._slots, values):
+            slot.__set__(self, value)
+
+    @classmethod
+    def from_dict(cls, sheet, row, dic):
+        return cls(sheet, row, [dic.get(attr) for attr in cls._attrs])
+
+    @property
+    def filename(self):
+        return self._sheet.filename
+
+    @property
+    def sheetname(self):
+        return self._sheet.sheetname
+
+    sheetname__ = sheetname
+
+    def raw_values(self):
+        """ Returns the raw (stored) cell values, in `_attrs` order. """
+        return [slot.__get__(self, self.__class__) for slot in self._slots]
+
+    def to_dict(self, include_none=False):
+        d = {}
+        for attr in self._attrs:
+            val = getattr(self, attr)
+            if include_none or val is not None:
+                d[attr] = val
+        return d
+
+    def to_model(self):
+        """ Returns the equivalent (full) model instance. """
+        obj = self.model(self.filename, self.sheetname, **dict(zip(self._attrs, self.raw_values())))
+        obj.row = self.row
+        return obj
+
+    def __str__(self):
+        s = '['
+        for attr_name, value in zip(self._attrs, self.raw_values()):
+            s += attr_name + ': ' + text_type(value) + '; '
+        s += ']'
+        return s
+
+
+def build_record_class(model):
+    """ Generates the compact, slotted, record class of the given model. """
+    columns = model._columns()
+    attrs = tuple(columns)
+    slot_names = ['_v_' + attr for attr in attrs]
+    cached = [attr for attr in attrs if getattr(columns[attr], 'cache', False)]
+    cache_slot_names = ['_c_' + attr for attr in cached]
+    record_class = type(model.__name__ + 'Record', (CompactRecord,), {
+        '__slots__': tuple(slot_names + cache_slot_names),
+        '__module__': model.__module__,
+        'model': model,
+        '_attrs': attrs,
+    })
+    record_class._slots = tuple(getattr(record_class, name) for name in slot_names)
+    for attr, slot in zip(attrs, record_class._slots):
+        cache_slot = getattr(record_class, '_c_' + attr) if attr in cached else None
+        setattr(record_class, attr, RecordField(columns[attr], slot, cache_slot))
+    return record_class
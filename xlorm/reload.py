@@ -0,0 +1,186 @@
+import hashlib
+from collections import OrderedDict
+
+from .util import iter_rows, iter_sheet_rows
+
+
+class HashedSheet(object):
+    """ Backend (or xlrd) sheet hashing the raw contents (cell types and values) of the rows as they are read
+    (see `iter_rows`), so that a sheet can be hashed and loaded in a single pass. """
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.hash = hashlib.sha1()
+
+    def __getattr__(self, name):
+        return getattr(self.sheet, name)
+
+    def iter_rows(self, start_rowx=0, width=None):
+        update = self.hash.update
+        for rx, ctypes, values in iter_rows(self.sheet, start_rowx, width):
+            update(repr((rx, list(ctypes), list(values))).encode('utf-8'))
+            yield rx, ctypes, values
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+
+def sheet_content_hash(sheet, skip_header_rows=0, width=None):
+    """ Returns a hash of the raw contents (cell types and values) of the data rows of the sheet, limited to
+    the first `width` columns (the mapped ones). """
+    hashed = HashedSheet(sheet)
+    for _ in hashed.iter_rows(skip_header_rows, width):
+        pass
+    return hashed.hexdigest()
+
+
+def read_sheet(model, sheetname, workbook):
+    """ Returns the content hash (see `sheet_content_hash`) and the row values (see
+    `XLSSheetModel._sheet_values`) of a sheet, read in a single pass. """
+    stats = workbook.sheet_stats(sheetname)
+    sheet = HashedSheet(workbook.sheet(sheetname, stats))
+    try:
+        dics = iter_sheet_rows(sheet, model.read_plan(), model.HEADER__NUM_ROWS_SKIP, workbook.book.datemode, stats)
+        values = model._sheet_values(model._dics_values(dics))
+    finally:
+        workbook.release_sheet(sheetname)
+        stats.finish()
+    return sheet.hexdigest(), values
+
+
+class RowDiff(object):
+    """ Row level differences between two loads: the `added` and `removed` models and the `changed`
+    (old model, new model) pairs. Rows are matched by primary key (raw value), if the model has one, and
+    otherwise by value (a changed row is then a removal and an addition). """
+
+    __slots__ = ('added', 'removed', 'changed')
+
+    def __init__(self, added=None, removed=None, changed=None):
+        self.added = added if added is not None else []
+        self.removed = removed if removed is not None else []
+        self.changed = changed if changed is not None else []
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    __nonzero__ = __bool__  # Python 2
+
+    def __repr__(self):
+        return '<RowDiff +%d -%d ~%d>' % (len(self.added), len(self.removed), len(self.changed))
+
+
+def diff_rows(old_rows, new_rows, attrs, primary_key=None):
+    """ Returns the `RowDiff` of the given models, compared on their `attrs` raw values. """
+    def values(row):
+        d = row.__dict__
+        return tuple([d[attr] for attr in attrs])
+
+    diff = RowDiff()
+    if primary_key is not None:
+        old = OrderedDict((row.__dict__[primary_key], row) for row in old_rows)
+        for row in new_rows:
+            old_row = old.pop(row.__dict__[primary_key], None)
+            if old_row is None:
+                diff.added.append(row)
+            elif values(old_row) != values(row):
+                diff.changed.append((old_row, row))
+        diff.removed.extend(old.values())
+    else:
+        old = OrderedDict()
+        for row in old_rows:
+            old.setdefault(values(row), []).append(row)
+        for row in new_rows:
+            matches = old.get(values(row))
+            if matches:
+                matches.pop(0)
+            else:
+                diff.added.append(row)
+        diff.removed.extend(row for matches in old.values() for row in matches)
+    return diff
+
+
+class SheetState(object):
+    """ A reloaded sheet: its `LoadedSheet` and the versions of its contents (see `XLSSheetModel.reload`). """
+
+    __slots__ = ('sheetname', 'version', 'content_hash', 'sheet')
+
+    def __init__(self, sheetname, version, content_hash, sheet):
+        self.sheetname = sheetname
+        self.version = version  # backend version (see `util.Workbook.sheet_version`), may be None
+        self.content_hash = content_hash  # see `sheet_content_hash`
+        self.sheet = sheet
+
+
+class Snapshot(object):
+    """ Result of an incremental reload (see `XLSSheetModel.reload`), to be given to the next one: the
+    `SheetState` of each sheet, the names of the sheets read again (`changed_sheets`, new ones included)
+    and removed, and the `RowDiff` with the previous snapshot. """
+
+    def __init__(self, model, plan_fingerprint, sheets, changed_sheets=(), removed_sheets=(), diff=None):
+        self.model = model
+        self.plan_fingerprint = plan_fingerprint
+        self.sheets = sheets  # {sheetname: SheetState}
+        self.changed_sheets = list(changed_sheets)
+        self.removed_sheets = list(removed_sheets)
+        self.diff = diff if diff is not None else RowDiff()
+
+    @property
+    def rows(self):
+        """ New models of all the rows. """
+        return [row for state in self.sheets.values() for row in state.sheet.models()]
+
+    def __repr__(self):
+        return '<Snapshot %s: %d sheet(s), %d changed, %r>' % (
+            self.model.__name__, len(self.sheets), len(self.changed_sheets), self.diff)
+
+
+def reload_sheets(model, filename, sheetnames, workbook, previous=None):
+    """ Returns the `Snapshot` of the given sheets (see `XLSSheetModel.reload`). """
+    plan = model.read_plan()
+    plan_fingerprint = plan.fingerprint()
+    if previous is not None and (previous.model is not model or previous.plan_fingerprint != plan_fingerprint):
+        previous = None  # not comparable
+    old_states = previous.sheets if previous is not None else {}
+    attrs = [col.attr_name for col in plan]
+    try:
+        primary_key = model.get_primary_key().attr_name
+    except AttributeError:
+        primary_key = None
+
+    states = OrderedDict()
+    changed = []
+    old_rows = []
+    new_rows = []
+    for sheetname in sheetnames:
+        if sheetname in states:
+            continue
+        old = old_states.get(sheetname)
+        key = (model, workbook.fingerprint, sheetname)
+        version = workbook.sheet_version(sheetname)
+        if old is not None and version is not None and version == old.version:
+            states[sheetname] = old
+        else:
+            # hashed while loaded: the (converted) rows of an unchanged sheet are dropped
+            content_hash, values = read_sheet(model, sheetname, workbook)
+            if old is not None and content_hash == old.content_hash:
+                states[sheetname] = SheetState(sheetname, version, content_hash, old.sheet)
+        if sheetname in states:
+            # unchanged: the same rows, served from the cache for this version of the file
+            model.rows_all_cache.put(key, old.sheet)
+            continue
+        sheet = model._loaded_sheet(filename, sheetname, values)
+        model.rows_all_cache.put(key, sheet)
+        states[sheetname] = SheetState(sheetname, version, content_hash, sheet)
+        changed.append(sheetname)
+        if old is not None:
+            old_rows.extend(old.sheet.models())
+        new_rows.extend(sheet.models())
+
+    removed = [sheetname for sheetname in old_states if sheetname not in states]
+    for sheetname in removed:
+        old_rows.extend(old_states[sheetname].sheet.models())
+    diff = diff_rows(old_rows, new_rows, attrs, primary_key) if previous is not None else RowDiff(added=new_rows)
+    return Snapshot(model, plan_fingerprint, states, changed, removed, diff)
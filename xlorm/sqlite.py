@@ -0,0 +1,144 @@
+import datetime
+
+from .columnar import KIND__BOOLEAN, KIND__DATE, KIND__INTEGER, KIND__NUMBER, KIND__TEXT, column_kind
+
+
+SQL_TYPES = {
+    KIND__TEXT: 'TEXT',
+    KIND__NUMBER: 'REAL',
+    KIND__INTEGER: 'INTEGER',
+    KIND__DATE: 'TEXT',  # ISO 8601, as understood by the SQLite date and time functions
+    KIND__BOOLEAN: 'INTEGER',
+}
+
+INSERT_BATCH_ROWS = 5000  # rows per `executemany` call
+
+# {table, source, sheetname: source file fingerprint and read plan fingerprint} of the synced sheets
+META_TABLE = 'xlorm_sources'
+
+# columns of the synced tables before the model ones
+SOURCE_COLUMNS = [('source', 'TEXT'), ('sheetname', 'TEXT'), ('row', 'INTEGER')]
+
+
+def quote(name):
+    """ Returns the given (table, column or index) name as an SQL identifier. """
+    return '"%s"' % name.replace('"', '""')
+
+
+def sql_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(' ')
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def table_columns(model):
+    """ Returns the (attribute name, SQL type, `Column.python_value` or None) of the mapped columns of the
+    model, in read plan order. """
+    model_columns = model._columns()
+    columns = []
+    for col in model.read_plan():
+        column = model_columns.get(col.attr_name)
+        python_value = column.python_value if column is not None else None
+        columns.append((col.attr_name, SQL_TYPES[column_kind(column, col.ctype)], python_value))
+    return columns
+
+
+def index_attrs(model):
+    """ Returns the names of the attributes indexed in the table: the primary key and `indexed` columns. """
+    return sorted(attr_name for attr_name, col in model._columns().items() if col.is_primary_key or col.indexed)
+
+
+def create_table(conn, table, columns, indexed):
+    conn.execute('CREATE TABLE %s (%s, %s)' % (
+        quote(table), ', '.join('%s %s NOT NULL' % (name, sql_type) for name, sql_type in SOURCE_COLUMNS),
+        ', '.join('%s %s' % (quote(attr_name), sql_type) for attr_name, sql_type, _ in columns)))
+    conn.execute('CREATE INDEX %s ON %s (source, sheetname, row)' % (quote(table + '__sheet_row'), quote(table)))
+    for attr_name in indexed:
+        conn.execute('CREATE INDEX %s ON %s (%s)' % (quote(table + '__' + attr_name), quote(table),
+                                                     quote(attr_name)))
+
+
+def _synced_sheets(conn, table, source, columns, plan_fingerprint):
+    """ Returns the {sheetname: source fingerprint} of the sheets of the given source file in the table, None
+    if the table doesn't exist. A table synced with another read plan (or columns) is dropped, along with its
+    sources. Raises ValueError if a table with other columns, not synced by `sync_sheets`, exists. """
+    conn.execute('CREATE TABLE IF NOT EXISTS %s (tablename TEXT NOT NULL, source TEXT NOT NULL, '
+                 'sheetname TEXT NOT NULL, fingerprint TEXT NOT NULL, plan TEXT NOT NULL, '
+                 'PRIMARY KEY (tablename, source, sheetname))' % META_TABLE)
+    schema = [(name, sql_type) for _, name, sql_type, _, _, _ in conn.execute('PRAGMA table_info(%s)' % quote(table))]
+    if not schema:
+        conn.execute('DELETE FROM %s WHERE tablename = ?' % META_TABLE, (table,))
+        return None
+    plans = set(plan for plan, in conn.execute('SELECT DISTINCT plan FROM %s WHERE tablename = ?' % META_TABLE,
+                                               (table,)))
+    if schema == SOURCE_COLUMNS + [(attr_name, sql_type) for attr_name, sql_type, _ in columns] and \
+            plans <= set([plan_fingerprint]):
+        return dict(conn.execute('SELECT sheetname, fingerprint FROM %s WHERE tablename = ? AND source = ?' %
+                                 META_TABLE, (table, source)))
+    if not plans:
+        raise ValueError('Table "%s" exists with other columns' % table)
+    conn.execute('DROP TABLE %s' % quote(table))
+    conn.execute('DELETE FROM %s WHERE tablename = ?' % META_TABLE, (table,))
+    return None
+
+
+def iter_sql_rows(model, columns, source, sheetname, workbook):
+    """ Yields the (source, sheetname, row, values...) tuples of a sheet, straight from the row dictionaries
+    (no model instances). """
+    first_row = model.HEADER__NUM_ROWS_SKIP + 1
+    converters = [(attr_name, python_value) for attr_name, _, python_value in columns]
+    for row, dic in enumerate(model._iter_sheet_dics(sheetname, workbook)):
+        values = [source, sheetname, row + first_row]
+        for attr_name, python_value in converters:
+            value = dic.get(attr_name)
+            values.append(sql_value(python_value(value) if python_value is not None else value))
+        yield values
+
+
+def insert_rows(conn, sql, rows, batch_size=INSERT_BATCH_ROWS):
+    """ Inserts the given rows, `batch_size` at a time. Returns the number of rows inserted. """
+    count = 0
+    batch = []
+    for values in rows:
+        batch.append(values)
+        if len(batch) >= batch_size:
+            conn.executemany(sql, batch)
+            count += len(batch)
+            del batch[:]
+    if batch:
+        conn.executemany(sql, batch)
+        count += len(batch)
+    return count
+
+
+def sync_sheets(model, conn, table, source, sheetnames, workbook, batch_size=INSERT_BATCH_ROWS):
+    """ Syncs the given sheets of the `source` file into the SQLite table (see `XLSSheetModel.to_sqlite`).
+    Returns the number of rows inserted. """
+    columns = table_columns(model)
+    plan_fingerprint = model.read_plan().fingerprint()
+    fingerprint = repr(workbook.fingerprint)
+    delete = 'DELETE FROM %s WHERE source = ? AND sheetname = ?' % quote(table)
+    with conn:
+        synced = _synced_sheets(conn, table, source, columns, plan_fingerprint)
+        if synced is None:
+            create_table(conn, table, columns, index_attrs(model))
+            synced = {}
+        for sheetname in set(synced) - set(sheetnames):
+            conn.execute(delete, (source, sheetname))
+            conn.execute('DELETE FROM %s WHERE tablename = ? AND source = ? AND sheetname = ?' % META_TABLE,
+                         (table, source, sheetname))
+
+    sql = 'INSERT INTO %s VALUES (%s)' % (quote(table), ', '.join(['?'] * (len(columns) + len(SOURCE_COLUMNS))))
+    count = 0
+    for sheetname in sheetnames:
+        if synced.get(sheetname) == fingerprint:
+            continue
+        with conn:  # a transaction per sheet: the table never holds a partially synced sheet
+            conn.execute(delete, (source, sheetname))
+            count += insert_rows(conn, sql, iter_sql_rows(model, columns, source, sheetname, workbook), batch_size)
+            conn.execute('INSERT OR REPLACE INTO %s VALUES (?, ?, ?, ?, ?)' % META_TABLE,
+                         (table, source, sheetname, fingerprint, plan_fingerprint))
+        synced[sheetname] = fingerprint
+    return count
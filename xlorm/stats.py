@@ -0,0 +1,160 @@
+import logging
+import time
+from collections import OrderedDict
+
+
+timer = getattr(time, 'perf_counter', time.time)
+
+PHASE__OPEN = 'open'  # opening the workbook and discovering the sheet names
+PHASE__PARSE = 'parse'  # parsing the sheet rows (backend)
+PHASE__CONVERT = 'convert'  # converting and validating the cell values (read plan)
+PHASE__BUILD = 'build'  # building the models
+
+PHASES = (PHASE__OPEN, PHASE__PARSE, PHASE__CONVERT, PHASE__BUILD)
+
+SKIP__EXCLUDED = 'excluded'  # a value in the column `excludes`
+SKIP__NOT_NULL = 'not_null'  # an empty `not_null` column
+SKIP__NO_DATA = 'no_data'  # no (non optional) data
+SKIP__FILTERED = 'filtered'  # not matching the query filters (see `query.Query`)
+
+SKIP_REASONS = (SKIP__EXCLUDED, SKIP__NOT_NULL, SKIP__NO_DATA, SKIP__FILTERED)
+
+
+class InvalidValues(object):
+    """ Invalid values (not in the column `values`) found in a column: count and the first locations. """
+
+    __slots__ = ('column_name', 'count', 'samples')
+
+    def __init__(self, column_name):
+        self.column_name = column_name
+        self.count = 0
+        self.samples = []  # [(sheetname, row number, column number, value)]
+
+    def __str__(self):
+        samples = ', '.join('!%s->%d->%d: %s' % sample for sample in self.samples)
+        return 'Column "%s" has %d invalid value(s) (%s%s)' % (
+            self.column_name, self.count, samples, ', ...' if self.count > len(self.samples) else '')
+
+
+class LoadStats(object):
+    """ Instrumentation of a load (see `XLSSheetModel.all` and `util.read_xls_sheet`):
+    - `timings`: seconds spent per phase (see `PHASES`), if `timed`
+    - rows scanned, returned and skipped per reason (see `SKIP_REASONS`), sheets read and served from cache
+    - invalid values per column (see `InvalidValues`), reported as a single warning per sheet if `log_invalid`
+    Callbacks: `on_sheet(sheet stats)` once a sheet has been read and `on_invalid(column name, sheetname,
+    row number, column number, value)` for each invalid value. """
+
+    def __init__(self, timed=True, log_invalid=True, max_samples=5, on_sheet=None, on_invalid=None):
+        self.timed = timed
+        self.log_invalid = log_invalid
+        self.max_samples = max_samples
+        self.on_sheet = on_sheet
+        self.on_invalid = on_invalid
+        self.sheetname = None
+        self.parent = None
+        self.timings = OrderedDict((phase, 0.0) for phase in PHASES)
+        self.sheets = 0
+        self.cached_sheets = 0
+        self.rows_scanned = 0
+        self.rows_returned = 0
+        self.rows_skipped = OrderedDict((reason, 0) for reason in SKIP_REASONS)
+        self.invalid = OrderedDict()  # {column name: InvalidValues}
+
+    def sheet(self, sheetname):
+        """ Returns the stats of a sheet read, added to these ones when finished (see `finish`). """
+        stats = LoadStats(self.timed, self.log_invalid, self.max_samples, on_invalid=self.on_invalid)
+        stats.sheetname = sheetname
+        stats.parent = self
+        return stats
+
+    def finish(self):
+        """ Ends a sheet read: logs the invalid values summary and adds the sheet stats to the parent ones. """
+        self.sheets = 1
+        if self.log_invalid and self.invalid:
+            logging.warning(self.invalid_summary())
+        parent = self.parent
+        if parent is not None:
+            parent.merge(self)
+            if parent.on_sheet is not None:
+                parent.on_sheet(self)
+
+    def merge(self, other):
+        for phase, seconds in other.timings.items():
+            self.timings[phase] += seconds
+        for reason, count in other.rows_skipped.items():
+            self.rows_skipped[reason] += count
+        self.sheets += other.sheets
+        self.cached_sheets += other.cached_sheets
+        self.rows_scanned += other.rows_scanned
+        self.rows_returned += other.rows_returned
+        for column_name, other_invalid in other.invalid.items():
+            invalid = self.invalid.get(column_name)
+            if invalid is None:
+                invalid = self.invalid[column_name] = InvalidValues(column_name)
+            invalid.count += other_invalid.count
+            invalid.samples.extend(other_invalid.samples[:self.max_samples - len(invalid.samples)])
+
+    def add_time(self, phase, seconds):
+        self.timings[phase] += seconds
+
+    def timed_rows(self, rows):
+        """ Yields the given (backend) rows, adding the time spent producing them to the parse phase. """
+        timings = self.timings
+        rows = iter(rows)
+        while True:
+            start = timer()
+            try:
+                row = next(rows)
+            except StopIteration:
+                timings[PHASE__PARSE] += timer() - start
+                return
+            timings[PHASE__PARSE] += timer() - start
+            yield row
+
+    def skip(self, reason):
+        self.rows_skipped[reason] += 1
+
+    def invalid_value(self, column_name, sheetname, rowx, colx, value):
+        invalid = self.invalid.get(column_name)
+        if invalid is None:
+            invalid = self.invalid[column_name] = InvalidValues(column_name)
+        invalid.count += 1
+        if len(invalid.samples) < self.max_samples:
+            invalid.samples.append((sheetname, rowx + 1, colx + 1, value))
+        if self.on_invalid is not None:
+            self.on_invalid(column_name, sheetname, rowx + 1, colx + 1, value)
+
+    @property
+    def invalid_count(self):
+        return sum(invalid.count for invalid in self.invalid.values())
+
+    @property
+    def total_time(self):
+        return sum(self.timings.values())
+
+    def invalid_summary(self):
+        where = ' in sheet "%s"' % self.sheetname if self.sheetname is not None else ''
+        return '%d invalid value(s)%s:\n%s' % (self.invalid_count, where,
+                                               '\n'.join(str(invalid) for invalid in self.invalid.values()))
+
+    def to_dict(self):
+        return {
+            'timings': dict(self.timings),
+            'sheets': self.sheets,
+            'cached_sheets': self.cached_sheets,
+            'rows_scanned': self.rows_scanned,
+            'rows_returned': self.rows_returned,
+            'rows_skipped': dict(self.rows_skipped),
+            'invalid': dict((name, {'count': invalid.count, 'samples': list(invalid.samples)})
+                            for name, invalid in self.invalid.items()),
+        }
+
+    def __str__(self):
+        timings = ', '.join('%s %.3fs' % item for item in self.timings.items()) if self.timed else 'not timed'
+        skipped = ', '.join('%s %d' % item for item in self.rows_skipped.items() if item[1])
+        s = '%d sheet(s) (%d cached); %d rows scanned, %d returned, %d skipped%s; %s' % (
+            self.sheets, self.cached_sheets, self.rows_scanned, self.rows_returned, sum(self.rows_skipped.values()),
+            ' (%s)' % skipped if skipped else '', timings)
+        if self.invalid:
+            s += '\n' + self.invalid_summary()
+        return s
@@ -1,5 +1,9 @@
 import datetime
+import hashlib
+import io
 import logging
+import mmap
+import os
 import re
 import sys
 import unicodedata
@@ -7,6 +11,9 @@ import unicodedata
 import xlrd
 import xlrd.xldate
 
+from .stats import LoadStats, PHASE__CONVERT, PHASE__OPEN, PHASE__PARSE, SKIP__EXCLUDED, SKIP__NOT_NULL
+from .stats import SKIP__NO_DATA, timer
+
 
 PY2 = sys.version_info[0] == 2
 PY3 = sys.version_info[0] == 3
@@ -20,11 +27,26 @@ if PY3:
     string_types = str,
     text_type = str
     integer_type = int
+    unichr = chr
 else:
     integer_types = (int, long)  # noqa: F821
     string_types = basestring,  # noqa: F821
     text_type = unicode  # noqa: F821
     integer_type = long  # noqa: F821
+    unichr = unichr  # noqa: F821
+
+
+class ControlCharsTable(dict):
+    """ `unicode.translate` table deleting the control characters (Unicode category C*), filled
+    on demand: the category of each distinct character is looked up only once. """
+
+    def __missing__(self, codepoint):
+        value = None if unicodedata.category(unichr(codepoint))[0] == 'C' else codepoint
+        self[codepoint] = value
+        return value
+
+
+CONTROL_CHARS_TABLE = ControlCharsTable()
 
 
 def remove_control_chars(s):
@@ -37,7 +59,10 @@ def remove_control_chars(s):
 
     if PY2 and isinstance(s, str):
         s = s.decode('utf-8')
-    return ''.join(ch for ch in s if unicodedata.category(ch)[0] != 'C')
+    # printable strings have no control characters (most of them)
+    if PY3 and s.isprintable():
+        return s
+    return s.translate(CONTROL_CHARS_TABLE)
 
 
 def clean_str_space(s, strip=False, clean_multi_spaces=False, clean_all_spaces=False, line_joiner=' '):
@@ -85,47 +110,309 @@ def str_clean_value(value, default=None, strip=False, clean_all_spaces=False,
     return value or default
 
 
-def get_cell_value(sheet, rowx, colx, datemode=None):
-    """ Returns a standard Python data type value for the specified xlrd cell.
-    XL_CELL_DATE: datetime
+DATE_CACHE__MAX_SIZE = 100000  # memoized date conversions per datemode (see `convert_date_value`)
+
+_date_caches = {}  # {datemode: {serial number: python value or DateError}}
+
+
+class DateError(object):
+    """ A memoized date conversion error (see `convert_date_values`). """
+
+    __slots__ = ('error_class', 'args')
+
+    def __init__(self, error):
+        self.error_class = error.__class__
+        self.args = error.args
+
+    def raise_error(self):
+        raise self.error_class(*self.args)
+
+
+# per datemode (1900, 1904): epoch, first unambiguous day and last day (as in `xlrd.xldate_as_tuple`)
+_XLDATE_EPOCH = (datetime.datetime(1899, 12, 30), datetime.datetime(1904, 1, 1))
+_XLDATE_FIRST_DAY = (61, 1)
+_XLDATE_LAST_DAY = (2958465, 2957003)
+
+
+def _xldate_value(value, datemode):
+    """ Returns the python value of a date cell serial number, raising `xlrd.xldate.XLDateError`. """
+
+    if datemode == 0 or datemode == 1:
+        # common dates computed directly, with the same rounding as `xlrd.xldate_as_tuple`
+        if _XLDATE_FIRST_DAY[datemode] <= value < _XLDATE_LAST_DAY[datemode]:
+            xldays = int(value)
+            seconds = int(round((value - xldays) * 86400.0))
+            return _XLDATE_EPOCH[datemode] + datetime.timedelta(xldays, seconds)
+    if value < 0 and datemode in (0, 1):
+        # TODO: workaround for the google spreadsheets to excel conversion bug
+        # real   export (windows)  correct (windows)   export (mac)  correct (mac)
+        # 9:30   -0,604166667      0,395833333
+        # 10:30  -0,5625           0,4375
+        # 14:30  -0,395833333      0,604166667
+        # 17:30  -0,270833333      0,729166667
+        #                         =(exp. win)+1                     =(exp. mac)+3
+        try:
+            dt_ = xlrd.xldate_as_tuple(value + float(3), datemode)
+        except xlrd.xldate.XLDateError:
+            try:
+                dt_ = xlrd.xldate_as_tuple(value + 1, datemode)
+            except xlrd.xldate.XLDateError:
+                return value
+    else:
+        dt_ = xlrd.xldate_as_tuple(value, datemode)
+    # time only no date component
+    if dt_[0] == 0 and dt_[1] == 0 and dt_[2] == 0:
+        return datetime.time(*dt_[3:])
+    else:
+        return datetime.datetime(*dt_)
+
+
+def _date_cache(datemode):
+    cache = _date_caches.get(datemode)
+    if cache is None:
+        cache = _date_caches[datemode] = {}
+    return cache
+
+
+def _memoize_date(cache, value, datemode):
+    """ Converts the serial number and stores the value (or `DateError`) in the datemode cache. """
+    try:
+        result = _xldate_value(value, datemode)
+    except xlrd.xldate.XLDateError as e:
+        result = DateError(e)
+    if len(cache) >= DATE_CACHE__MAX_SIZE:
+        cache.clear()
+    cache[value] = result
+    return result
+
+
+def convert_date_value(value, datemode=None):
+    """ Returns the python value (datetime, time only or, for negative dates that can't be fixed, the
+    serial number) of a date cell. Conversions are memoized per datemode: date columns repeat the same
+    values over and over. """
+
+    cache = _date_cache(datemode)
+    result = cache.get(value)
+    if result is None:
+        result = _memoize_date(cache, value, datemode)
+    if result.__class__ is DateError:
+        result.raise_error()
+    return result
+
+
+def convert_date_values(ctypes, values, datemode=None):
+    """ Batch `convert_cell_value` of a column cells (types and raw values), with memoized date conversions.
+    The date cells that can't be converted hold a `DateError` (see `DateError.raise_error`). """
+
+    cache = _date_cache(datemode)
+    date, empty = xlrd.XL_CELL_DATE, xlrd.XL_CELL_EMPTY
+    get = cache.get
+    result = []
+    append = result.append
+    for ctype, value in zip(ctypes, values):
+        if ctype == date:
+            converted = get(value)
+            append(converted if converted is not None else _memoize_date(cache, value, datemode))
+        elif ctype == empty:
+            append(None)
+        else:
+            append(value)
+    return result
+
+
+def convert_cell_value(ctype, value, datemode=None):
+    """ Returns a standard Python data type value for the given xlrd cell type and raw value.
+    XL_CELL_DATE: datetime (see `convert_date_value`)
     XL_CELL_NUMBER: float
     XL_CELL_EMPTY: None
     XL_CELL_TEXT: Unicode string
     XL_CELL_BOOLEAN: False or True
     """
 
-    ctype = sheet.cell_type(rowx, colx)
     if ctype == xlrd.XL_CELL_DATE:
+        return convert_date_value(value, datemode)
+    elif ctype == xlrd.XL_CELL_EMPTY:
+        return None
+    else:
+        return value
+
+
+def get_cell_value(sheet, rowx, colx, datemode=None):
+    """ Returns a standard Python data type value for the specified xlrd cell
+    (see `convert_cell_value`). """
+
+    return convert_cell_value(sheet.cell_type(rowx, colx), sheet.cell_value(rowx, colx), datemode)
+
+
+def _as_set(items):
+    """ Returns the given values as a frozenset for fast membership tests (a tuple if not hashable). """
+    try:
+        return frozenset(items)
+    except TypeError:
+        return tuple(items)
+
+
+class ColumnPlan(object):
+    """ Read instructions for a single mapped column, resolved once (see `ReadPlan`). """
+
+    __slots__ = ('attr_name', 'column_index', 'ctype', 'column_name', 'optional', 'not_null',
+                 'excludes', 'ignore_data_error', 'values', 'convert')
+
+    def __init__(self, attr_name, column_index, ctype=None, column_name=None, optional=False,
+                 not_null=False, excludes=(), ignore_data_error=False, values=None,
+                 convert=convert_cell_value):
+        self.attr_name = attr_name
+        self.column_index = column_index
+        self.ctype = ctype
+        self.column_name = column_name if column_name is not None else attr_name
+        self.optional = optional
+        self.not_null = not_null
+        self.excludes = _as_set(excludes or ())
+        self.ignore_data_error = ignore_data_error
+        # an empty list of allowed values means any value is allowed
+        self.values = _as_set(values) if values else None
+        self.convert = convert
+
+    @classmethod
+    def from_tuple(cls, attr_name, conf):
+        """ Builds the plan from a (legacy) positional header conf tuple:
+        (column_index, ctype, column_name, optional, not_null, excludes, ignore_data_error, values)
+        Only column_index is mandatory. """
+        return cls(attr_name, *conf)
+
+    def read_cell(self, ctype, raw, datemode=None, sheetname=None, rowx=None, stats=None):
+        """ Converts a cell value and checks it (see `check`). """
         try:
-            dt_ = xlrd.xldate_as_tuple(sheet.cell_value(rowx, colx), datemode)
-        except xlrd.xldate.XLDateNegative:
-            # TODO: workaround for the google spreadsheets to excel conversion bug
-            # real   export (windows)  correct (windows)   export (mac)  correct (mac)
-            # 9:30   -0,604166667      0,395833333
-            # 10:30  -0,5625           0,4375
-            # 14:30  -0,395833333      0,604166667
-            # 17:30  -0,270833333      0,729166667
-            #                         =(exp. win)+1                     =(exp. mac)+3
-            b = sheet.cell_value(rowx, colx)
-            a = b + float(3)
+            val = self.convert(ctype, raw, datemode)
+        except xlrd.xldate.XLDateError as e:
+            val = DateError(e)
+        return self.check(val, sheetname, rowx, stats)
+
+    def check(self, val, sheetname=None, rowx=None, stats=None):
+        """ Checks a converted cell value against the column rules. Returns the (value, skip reason) pair: the
+        reason (`stats.SKIP__*`) the row is skipped for, counted in the given `stats.LoadStats`, or None.
+        Values not allowed are read as None and reported (logged without `stats`); dates that can't be
+        converted (`DateError`) too if `ignore_data_error`, raised otherwise. """
+        if val.__class__ is DateError:
+            # TODO: .... negative date...
+            if not self.ignore_data_error:
+                val.raise_error()
+            val = None
+        if val in self.excludes:
+            if stats is not None:
+                stats.skip(SKIP__EXCLUDED)
+            return val, SKIP__EXCLUDED
+        if val is None:
+            if self.not_null:
+                if stats is not None:
+                    stats.skip(SKIP__NOT_NULL)
+                return val, SKIP__NOT_NULL
+        elif self.values is not None and val not in self.values:
+            if stats is not None:
+                stats.invalid_value(self.column_name, sheetname, rowx, self.column_index, val)
+            else:
+                logging.warn('Column "%s" has not a valid value in !%s->%d->%d: %s' % (
+                    self.column_name, sheetname, rowx + 1, self.column_index + 1, val))
+            val = None
+        return val, None
+
+    def has_data(self, ctype, raw, datemode=None):
+        """ Returns whether the cell has a value, not checked (see `check`): empty cells and dates that can't be
+        converted (if `ignore_data_error`) have none. """
+        if ctype == xlrd.XL_CELL_EMPTY:
+            return False
+        if ctype == xlrd.XL_CELL_DATE:
             try:
-                dt_ = xlrd.xldate_as_tuple(a, datemode)
+                return self.convert(ctype, raw, datemode) is not None
             except xlrd.xldate.XLDateError:
-                a = b + 1
-                try:
-                    dt_ = xlrd.xldate_as_tuple(a, datemode)
-                except xlrd.xldate.XLDateError:
-                    return b
-        # time only no date component
-        if dt_[0] == 0 and dt_[1] == 0 and dt_[2] == 0:
-            return datetime.time(*dt_[3:])
+                if self.ignore_data_error:
+                    return False
+                raise
+        return True
+
+
+class ReadPlan(object):
+    """ Compiled, per model, list of `ColumnPlan`s walked by `get_row_as_dict` with no per-cell lookups. """
+
+    __slots__ = ('columns', 'width')
+
+    def __init__(self, columns):
+        self.columns = tuple(sorted(columns, key=lambda col: col.column_index))
+        # number of leading row cells needed to read all the mapped columns
+        self.width = self.columns[-1].column_index + 1 if self.columns else 0
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+    def fingerprint(self):
+        """ Returns a hash of the plan (column positions, types and rules), stable across processes. """
+        def ordered(items):
+            return sorted(repr(item) for item in items) if items is not None else None
+
+        h = hashlib.sha1()
+        for col in self.columns:
+            h.update(repr((col.attr_name, col.column_index, col.ctype, col.column_name, col.optional, col.not_null,
+                           ordered(col.excludes), col.ignore_data_error, ordered(col.values),
+                           getattr(col.convert, '__name__', None))).encode('utf-8'))
+        return h.hexdigest()
+
+    def read_row(self, ctypes, values, datemode=None, sheetname=None, rowx=None, stats=None):
+        """ Returns the row dictionary for the given row cell types and raw values
+        (see `get_row_as_dict`). Skipped rows and invalid values are counted in the given `stats.LoadStats`
+        (invalid values are logged one by one without it). """
+
+        dic = {}
+        flag = False  # controls if all non optional columns exist
+        for col in self.columns:
+            colx = col.column_index
+            try:
+                ctype = ctypes[colx]
+            except IndexError:
+                if col.optional:
+                    continue
+                raise
+            val, skip = col.read_cell(ctype, values[colx], datemode, sheetname, rowx, stats)
+            if skip is not None:
+                return None
+            if val is not None and not col.optional:
+                flag = True
+            dic[col.attr_name] = val
+        if flag:
+            return dic
         else:
-            return datetime.datetime(*dt_)
-    elif ctype == xlrd.XL_CELL_EMPTY:
-        return None
-    else:
-        val = sheet.cell_value(rowx, colx)
-        return val
+            if stats is not None:
+                stats.skip(SKIP__NO_DATA)
+            return None
+
+
+def compile_read_plan(header_conf):
+    """ Returns a `ReadPlan` for the given header conf: either a plan (returned as is) or a
+    (legacy) dictionary in the format {col_header: (column_index, ctype, column_name, ...)}. """
+
+    if isinstance(header_conf, ReadPlan):
+        return header_conf
+    return ReadPlan([ColumnPlan.from_tuple(col_header, conf) for col_header, conf in header_conf.items()])
+
+
+def iter_xlrd_rows(sheet, start_rowx=0, width=None):
+    """ Yields the (row index, cell types, raw values) of the rows of an xlrd sheet, sliced to the
+    first `width` cells. """
+
+    row_types, row_values = sheet.row_types, sheet.row_values
+    for rx in range(start_rowx, sheet.nrows):
+        yield rx, row_types(rx, 0, width), row_values(rx, 0, width)
+
+
+def iter_rows(sheet, start_rowx=0, width=None):
+    """ Yields the (row index, cell types, raw values) of the rows of a backend sheet (see `backends`)
+    or of an xlrd sheet. """
+
+    if hasattr(sheet, 'iter_rows'):
+        return sheet.iter_rows(start_rowx, width)
+    return iter_xlrd_rows(sheet, start_rowx, width)
 
 
 def get_row_as_dict(sheet, rowx, header_conf, datemode=None):
@@ -133,84 +420,334 @@ def get_row_as_dict(sheet, rowx, header_conf, datemode=None):
         corresponding for the specified xlrd row. The row represents a bank transaction.
         Returns None if row has no data."""
 
-    dic = {}
-    flag = False  # controls if all non optional columns exist
-    for col_header in header_conf.keys():
-        colx = header_conf[col_header][0]
-        # ctype = header_conf[col_header][1]
-        col_name = header_conf[col_header][2]
-        optional = header_conf[col_header][3] if len(
-            header_conf[col_header]) > 3 else False
-        not_null = header_conf[col_header][4] if len(
-            header_conf[col_header]) > 4 else False
-        excludes = header_conf[col_header][5] if len(
-            header_conf[col_header]) > 5 else []
-        ignore_data_error = header_conf[col_header][
-            6] if len(header_conf[col_header]) > 6 else False
-        values = header_conf[col_header][7] if len(
-            header_conf[col_header]) > 7 else None
-
+    plan = compile_read_plan(header_conf)
+    return plan.read_row(sheet.row_types(rowx, 0, plan.width), sheet.row_values(rowx, 0, plan.width),
+                         datemode, sheet.name, rowx)
+
+
+def iter_sheet_rows(sheet, header_conf, skip_header_rows=0, datemode=None, stats=None):
+    """ Yields, one at a time, the row dictionaries (see `get_row_as_dict`) of an already opened sheet
+    (see `iter_rows`).
+    skip_header_rows: number of header (top) rows not to be included.
+    stats: `stats.LoadStats` counting the rows (and timing the parse and convert phases). """
+
+    plan = compile_read_plan(header_conf)
+    read_row, name = plan.read_row, sheet.name
+    rows = iter_rows(sheet, skip_header_rows, plan.width)
+    timed = stats is not None and stats.timed
+    if timed:
+        rows = stats.timed_rows(rows)
+        timings = stats.timings
+    for rx, ctypes, values in rows:
+        # TODO: skip header rows (by header strings)
         try:
-            val = get_cell_value(sheet, rowx, colx, datemode)
-        except IndexError as ie:
-            if optional:
-                continue
-            else:
-                raise ie
-        except xlrd.xldate.XLDateError as de:
-            # TODO: .... negative date...
-            if ignore_data_error:
-                val = None
+            if timed:
+                start = timer()
+                btrans_dic = read_row(ctypes, values, datemode, name, rx, stats)
+                timings[PHASE__CONVERT] += timer() - start
             else:
-                raise de
-        if val in excludes:
-            return None
-        if not_null and val is None:
-            return None
-        if (values is not None and len(values) > 0) and val is not None and (val not in values):
-            logging.warn('Column "%s" has not a valid value in !%s->%d->%d: %s' % (
-                col_name, sheet.name, rowx + 1, colx + 1, val))
-            val = None
-        if not optional and val is not None:
-            flag = True
-        dic[col_header] = val
-    if flag:
-        return dic
-    else:
-        return None
+                btrans_dic = read_row(ctypes, values, datemode, name, rx, stats)
+        except xlrd.xldate.XLDateNegative:
+            logging.error('Negative date in !%s->%d' % (sheet.name, rx + 1))
+            raise
+        if stats is not None:
+            stats.rows_scanned += 1
+        if btrans_dic:
+            if stats is not None:
+                stats.rows_returned += 1
+            yield btrans_dic
+
+
+def _iter_closing(workbook, rows):
+    with workbook:
+        for row in rows:
+            yield row
+
 
+def iter_xls_sheet(fname, sheetname, header_conf, skip_header_rows=0, file_contents=None, backend=None,
+                   stats=None):
+    """ Opens the workbook and returns an iterator over the row dictionaries of the given sheet.
+    Rows are read lazily so that only one row dictionary is alive at a time.
+    skip_header_rows: number of header (top) rows not to be included.
+    backend: reader backend name (see `backends.BACKENDS`), detected from the file by default.
+    stats: `stats.LoadStats` to fill (invalid values are reported in a single warning in any case). """
 
-def read_xls_sheet(fname, sheetname, header_conf, skip_header_rows=0, file_contents=None):
+    workbook = Workbook(fname, file_contents=file_contents, backend=backend, stats=stats)
+    workbook.sheet(sheetname)  # fail now if the file or sheet can't be opened
+    return _iter_closing(workbook, workbook.iter_sheet(sheetname, header_conf, skip_header_rows))
+
+
+def read_xls_sheet(fname, sheetname, header_conf, skip_header_rows=0, file_contents=None, backend=None,
+                   stats=None):
     """ skip_header_rows: number of header (top) rows not to be included. """
 
-    book = xlrd.open_workbook(filename=fname, file_contents=file_contents)
-    sh = book.sheet_by_name(sheetname)
+    return list(iter_xls_sheet(fname, sheetname, header_conf, skip_header_rows=skip_header_rows,
+                               file_contents=file_contents, backend=backend, stats=stats))
 
-    lines = []
-    for rx in range(0, sh.nrows):
-        # TODO: skip header rows (by header strings)
-        if rx < skip_header_rows:
-            continue
+
+def contents_buffer(file_contents):
+    """ Returns the given excel file contents as a buffer (`bytes`, `mmap` or `memoryview`) without copying
+    them whenever possible. `file_contents` can be bytes, any buffer protocol object (`bytearray`, `memoryview`,
+    `mmap`) or a binary file object, read whole: files on disk are memory-mapped and `io.BytesIO` viewed; only
+    the other streams are read into memory. """
+
+    if isinstance(file_contents, (bytes, mmap.mmap)):
+        return file_contents
+    if hasattr(file_contents, 'read'):
+        if hasattr(file_contents, 'getbuffer'):  # Python 3 `io.BytesIO`
+            return file_contents.getbuffer()
         try:
-            btrans_dic = get_row_as_dict(sh, rx, header_conf, book.datemode)
-        except xlrd.xldate.XLDateNegative:
-            logging.error(fname, sheetname, rx)
-            raise
-        if btrans_dic:
-            lines.append(btrans_dic)
-    return lines
+            return mmap.mmap(file_contents.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, EnvironmentError, ValueError):  # not a file on disk, or empty
+            try:
+                file_contents.seek(0)
+            except (AttributeError, EnvironmentError):  # not seekable: read from the current position
+                pass
+            return file_contents.read()
+    view = memoryview(file_contents)
+    if PY3 and (view.format != 'B' or view.ndim != 1):
+        view = view.cast('B')
+    return view
+
+
+def owns_buffer(file_contents, contents):
+    """ Returns whether `contents` is an mmap created by `contents_buffer(file_contents)`, to be closed by the
+    caller. """
+
+    return isinstance(contents, mmap.mmap) and contents is not file_contents
+
+
+def contents_bytes(contents):
+    """ Returns the given buffer (see `contents_buffer`) as `bytes` or `mmap`, for the readers taking nothing
+    else (xlrd): a view of a whole bytes or mmap object is unwrapped, any other view copied. """
+
+    if isinstance(contents, memoryview):
+        obj = getattr(contents, 'obj', None)
+        if isinstance(obj, (bytes, mmap.mmap)) and len(obj) == contents.nbytes:
+            return obj
+        return contents.tobytes()
+    return contents
+
+
+def buffer_bytes(buf):
+    """ Returns the given buffer (slice) as `bytes`: `bytes(view)` is the view repr on Python 2. """
+
+    if isinstance(buf, memoryview):
+        return buf.tobytes()
+    return bytes(buf)
+
+
+class BufferReader(io.RawIOBase):
+    """ Seekable binary file object reading a buffer (see `contents_buffer`) in place: only the bytes read
+    are copied. Each reader has its own position, so that a buffer can be read concurrently. """
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += len(self.buf)
+        if offset < 0:
+            raise ValueError('Negative seek position %d' % offset)
+        self.pos = offset
+        return offset
+
+    def tell(self):
+        return self.pos
+
+    def read(self, size=-1):
+        start = self.pos
+        end = len(self.buf) if size is None or size < 0 else min(start + size, len(self.buf))
+        if end <= start:
+            return b''
+        self.pos = end
+        return buffer_bytes(self.buf[start:end])
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+CONTENTS_FINGERPRINTS__MAX = 8
+# hashes of `bytes` file contents (immutable) by object identity, so that the loads of the same contents hash them
+# once; the contents are kept (a few) so that their ids aren't reused
+_contents_fingerprints = {}  # {id(contents): (contents, fingerprint)}
+
+
+def contents_fingerprint(contents):
+    """ Returns the fingerprint of the given file contents buffer (see `contents_buffer`): their sha1 hash and size,
+    computed once per `bytes` object. """
+
+    if type(contents) is not bytes:  # mutable (bytearray, mmap, views): hashed on every call
+        return ('sha1', hashlib.sha1(contents).hexdigest(), len(contents))
+    entry = _contents_fingerprints.get(id(contents))
+    if entry is not None and entry[0] is contents:
+        return entry[1]
+    fingerprint = ('sha1', hashlib.sha1(contents).hexdigest(), len(contents))
+    if len(_contents_fingerprints) >= CONTENTS_FINGERPRINTS__MAX:
+        _contents_fingerprints.clear()
+    _contents_fingerprints[id(contents)] = (contents, fingerprint)
+    return fingerprint
+
+
+def file_fingerprint(filename=None, file_contents=None):
+    """ Returns a hashable value identifying the current version of an excel file:
+    its path, modification time and size, or a hash of `file_contents` if given (see `contents_fingerprint`). """
+
+    if file_contents is not None:
+        contents = contents_buffer(file_contents)
+        try:
+            if contents:
+                return contents_fingerprint(contents)
+        finally:
+            if owns_buffer(file_contents, contents):
+                contents.close()
+    st = os.stat(filename)
+    return (os.path.abspath(filename), st.st_mtime, st.st_size)
+
+
+SHEET_NAMES_CACHE__MAX_FILES = 256
+_sheet_names_cache = {}  # {file fingerprint: [sheet name]}
+
+
+class Workbook(object):
+    """ Workbook handle shared by the sheet name discovery and all the sheet reads of a single load.
+    The file is opened (once) only when first needed, by the given reader `backend` (see `backends`):
+    .xlsx files are streamed and .xls files are read by xlrd with `on_demand`, so that only the
+    requested sheets are parsed; each sheet is released as soon as it has been read.
+    The sheet reads are instrumented by the given `stats.LoadStats` (see `sheet_stats`). """
+
+    def __init__(self, filename=None, file_contents=None, backend=None, disk_cache=None, stats=None):
+        self.filename = filename
+        self._file_contents = file_contents
+        self._buffer = None
+        self.backend = backend
+        self.disk_cache = disk_cache  # `cache.DiskCache` of the sheet names
+        self.stats = stats
+        self._book = None
+        self._fingerprint = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def file_contents(self):
+        """ The file contents buffer (see `contents_buffer`): file objects are mapped (until `close`) or viewed
+        once, not copied. """
+        if self._buffer is None and self._file_contents is not None:
+            self._buffer = contents_buffer(self._file_contents)
+        return self._buffer
+
+    @property
+    def fingerprint(self):
+        if self._fingerprint is None:
+            self._fingerprint = file_fingerprint(filename=self.filename, file_contents=self.file_contents)
+        return self._fingerprint
+
+    @property
+    def book(self):
+        if self._book is None:
+            from .backends import open_book
+            start = timer()
+            self._book = open_book(filename=self.filename, file_contents=self.file_contents, backend=self.backend)
+            if self.stats is not None and self.stats.timed:
+                self.stats.add_time(PHASE__OPEN, timer() - start)
+        return self._book
+
+    @property
+    def is_open(self):
+        return self._book is not None
+
+    def sheet_names(self):
+        fingerprint = self.fingerprint
+        names = _sheet_names_cache.get(fingerprint)
+        if names is None:
+            disk_cache = self.disk_cache
+            names = disk_cache.get_sheet_names(fingerprint) if disk_cache is not None else None
+            if names is None:
+                names = self.book.sheet_names()
+                if disk_cache is not None:
+                    disk_cache.put_sheet_names(fingerprint, names)
+            if len(_sheet_names_cache) >= SHEET_NAMES_CACHE__MAX_FILES:
+                _sheet_names_cache.clear()
+            _sheet_names_cache[fingerprint] = names
+        return list(names)
+
+    def sheet(self, sheetname, stats=None):
+        """ Returns the backend sheet. Its parse time (xlrd parses whole sheets) is added to the given
+        `stats.LoadStats` (the workbook ones by default). """
+        book = self.book
+        start = timer()
+        sheet = book.sheet_by_name(sheetname)
+        stats = stats if stats is not None else self.stats
+        if stats is not None and stats.timed:
+            stats.add_time(PHASE__PARSE, timer() - start)
+        return sheet
+
+    def sheet_version(self, sheetname):
+        """ Returns the backend version of the sheet contents known without reading them (see
+        `XlsxBook.sheet_version`), None if the backend can't tell. """
+        sheet_version = getattr(self.book, 'sheet_version', None)
+        return sheet_version(sheetname) if sheet_version is not None else None
+
+    def sheet_stats(self, sheetname):
+        """ Returns the `stats.LoadStats` of a sheet read, to be finished once read (see `LoadStats.finish`):
+        the workbook `stats` sheet stats or, with no `stats`, untimed ones only reporting the invalid values. """
+        if self.stats is not None:
+            return self.stats.sheet(sheetname)
+        return LoadStats(timed=False).sheet(sheetname)
+
+    def release_sheet(self, sheetname):
+        if self._book is not None:
+            self._book.release_sheet(sheetname)
+
+    def iter_sheet(self, sheetname, header_conf, skip_header_rows=0):
+        """ Yields the row dictionaries of the given sheet (see `iter_sheet_rows`), releasing the sheet
+        once all the rows have been read. """
+        stats = self.sheet_stats(sheetname)
+        sheet = self.sheet(sheetname, stats)
+        try:
+            for dic in iter_sheet_rows(sheet, header_conf, skip_header_rows, self.book.datemode, stats):
+                yield dic
+        finally:
+            self.release_sheet(sheetname)
+            stats.finish()
+
+    def close(self):
+        if self._book is not None:
+            self._book.release_resources()
+            self._book = None
+        if owns_buffer(self._file_contents, self._buffer):
+            self._buffer.close()
+            self._buffer = None  # mapped again if reused
 
 
 def get_xls_sheet_names(filename=None, pattern='.*', file_contents=None, **params):
     """
     params:
       file_contents: excel file contents
+      workbook: an already opened `Workbook` to (re)use
+    The workbook sheet names are cached per file fingerprint (see `file_fingerprint`).
     """
-    if file_contents:
-        book = xlrd.open_workbook(file_contents=file_contents)
+    workbook = params.get('workbook')
+    if workbook is not None:
+        names = workbook.sheet_names()
     else:
-        book = xlrd.open_workbook(filename)
-    names = book.sheet_names()
+        with Workbook(filename=filename, file_contents=file_contents) as workbook:
+            names = workbook.sheet_names()
     if pattern:
         nn = []
         for name in names:
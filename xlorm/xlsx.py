@@ -0,0 +1,334 @@
+import posixpath
+import re
+import zipfile
+from collections import OrderedDict
+
+import xlrd
+import xlrd.biffh
+import xlrd.formatting
+
+from .util import BufferReader, text_type, unichr
+
+try:
+    import xml.etree.cElementTree as ElementTree
+except ImportError:  # Python 3.9+
+    import xml.etree.ElementTree as ElementTree
+
+
+ZIP_MAGIC = b'PK\x03\x04'
+
+NS__RELATIONSHIPS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+XML_SPACE_ATTR = '{http://www.w3.org/XML/1998/namespace}space'
+XML_WHITESPACE = '\t\n \r'
+
+# built-in date number formats (the others are guessed from their format code)
+DATE_FORMAT_IDS = frozenset(list(range(14, 23)) + list(range(45, 48)))
+
+ERROR_CODE_FROM_TEXT = dict((text, code) for code, text in xlrd.biffh.error_text_from_code.items())
+
+RE__ESCAPED_CHAR = re.compile(r'_x[0-9A-Fa-f]{4}_')
+
+DIGITS = '0123456789'
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _namespace(tag):
+    return tag[:tag.index('}') + 1] if tag.startswith('{') else ''
+
+
+def _xsd_boolean(s):
+    if not s:
+        return 0
+    if s in ('1', 'true', 'on'):
+        return 1
+    if s in ('0', 'false', 'off'):
+        return 0
+    raise ValueError('unexpected xsd:boolean value: %r' % s)
+
+
+def _unescape(s):
+    """ Replaces the `_xHHHH_` escaped characters. """
+    if '_' in s:
+        return RE__ESCAPED_CHAR.sub(lambda m: unichr(int(m.group(0)[2:6], 16)), s)
+    return s
+
+
+def _cooked_text(elem):
+    t = elem.text
+    if t is None:
+        return u''
+    if elem.get(XML_SPACE_ATTR) != 'preserve':
+        t = t.strip(XML_WHITESPACE)
+    return text_type(_unescape(t))
+
+
+def _rich_text(elem, t_tag, r_tag):
+    """ Returns the text of a shared (`si`) or inline (`is`) string: plain or rich text runs. """
+    accum = []
+    for child in elem:
+        if child.tag == t_tag:
+            accum.append(_cooked_text(child))
+        elif child.tag == r_tag:
+            accum.extend(_cooked_text(t) for t in child if t.tag == t_tag)
+    return u''.join(accum)
+
+
+class _FormatBook(object):
+    """ The bare minimum of an xlrd book required by `xlrd.formatting.is_date_format_string`. """
+    verbosity = 0
+    logfile = None
+
+
+def is_date_format(format_code):
+    return bool(xlrd.formatting.is_date_format_string(_FormatBook, text_type(format_code)))
+
+
+class ColumnIndexes(dict):
+    """ {cell reference letters: column index}, filled on demand (e.g. 'AB' -> 27). """
+
+    def __missing__(self, letters):
+        colx = 0
+        for c in letters:
+            if c != '$':
+                colx = colx * 26 + ord(c.upper()) - 64
+        self[letters] = colx - 1
+        return colx - 1
+
+
+class XlsxSheet(object):
+    """ Worksheet of a `XlsxBook`: rows are parsed one at a time, straight from the (compressed) zip member,
+    so that the memory used does not depend on the sheet size and the first rows are available right away. """
+
+    def __init__(self, book, name, member):
+        self.book = book
+        self.name = name
+        self.member = member
+
+    def iter_rows(self, start_rowx=0, width=None):
+        """ Yields the (row index, xlrd cell types, raw values) of the rows, as xlrd would read them: cells are
+        padded with empty cells up to `width` (the sheet dimension by default) and missing rows are empty.
+        The `<dimension>` element is optional: without it, the width of a row can't be known before the
+        wider rows below it are read. """
+
+        book = self.book
+        sst = book.shared_strings()
+        date_xfs = book.date_xfs()
+        col_indexes = book.col_indexes
+        empty, text, number, date = xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_TEXT, xlrd.XL_CELL_NUMBER, xlrd.XL_CELL_DATE
+        ncols = 0
+        next_rowx = 0
+        stream = book.zip_file.open(self.member)
+        try:
+            ns = None
+            sheet_data = None
+            for event, elem in ElementTree.iterparse(stream, events=('start', 'end')):
+                if ns is None:
+                    ns = _namespace(elem.tag)
+                    row_tag, c_tag, v_tag, is_tag, t_tag, r_tag = [ns + t for t in ('row', 'c', 'v', 'is', 't', 'r')]
+                    dimension_tag, sheet_data_tag = ns + 'dimension', ns + 'sheetData'
+                tag = elem.tag
+                if event == 'start':
+                    if tag == sheet_data_tag:
+                        sheet_data = elem
+                    continue
+                if tag == dimension_tag:
+                    ref = elem.get('ref')
+                    if ref:
+                        ncols = col_indexes[ref.split(':')[-1].rstrip(DIGITS)] + 1
+                    continue
+                if tag != row_tag:
+                    continue
+
+                r = elem.get('r')
+                rowx = int(r) - 1 if r is not None else next_rowx
+                colx = -1
+                cells = []
+                for cell in elem:
+                    if cell.tag != c_tag:
+                        continue
+                    ref = cell.get('r')
+                    colx = col_indexes[ref.rstrip(DIGITS)] if ref is not None else colx + 1
+                    if colx >= ncols:
+                        ncols = colx + 1
+                    if width is not None and colx >= width:
+                        continue
+                    cell_type = cell.get('t', 'n')
+                    tvalue = None
+                    for child in cell:
+                        if child.tag == v_tag:
+                            tvalue = _cooked_text(child) if cell_type == 'str' else child.text
+                        elif child.tag == is_tag:
+                            tvalue = _rich_text(child, t_tag, r_tag)
+                    if cell_type == 'n':
+                        if tvalue:
+                            ctype = date if cell.get('s', '0') in date_xfs else number
+                            cells.append((colx, ctype, float(tvalue)))
+                    elif cell_type == 's':
+                        if tvalue:
+                            cells.append((colx, text, sst[int(tvalue)]))
+                    elif cell_type == 'str':
+                        cells.append((colx, text, tvalue))
+                    elif cell_type == 'b':
+                        cells.append((colx, xlrd.XL_CELL_BOOLEAN, _xsd_boolean(tvalue)))
+                    elif cell_type == 'e':
+                        cells.append((colx, xlrd.XL_CELL_ERROR, ERROR_CODE_FROM_TEXT[tvalue or '#N/A']))
+                    elif cell_type == 'inlineStr':
+                        if tvalue:
+                            cells.append((colx, text, tvalue))
+                    else:
+                        raise xlrd.XLRDError('Unknown cell type %r in rowx=%d colx=%d' % (cell_type, rowx, colx))
+                # done with the row: drop it from the (partially built) tree
+                elem.clear()
+                if sheet_data is not None:
+                    sheet_data.clear()
+
+                n = ncols if width is None else width
+                while next_rowx < rowx:
+                    if next_rowx >= start_rowx:
+                        yield next_rowx, [empty] * n, [u''] * n
+                    next_rowx += 1
+                next_rowx = rowx + 1
+                if rowx < start_rowx:
+                    continue
+                ctypes = [empty] * n
+                values = [u''] * n
+                for colx, ctype, value in cells:
+                    ctypes[colx] = ctype
+                    values[colx] = value
+                yield rowx, ctypes, values
+        finally:
+            stream.close()
+
+
+class XlsxBook(object):
+    """ Streaming .xlsx (Office Open XML) workbook reader, not depending on xlrd's (removed since xlrd 2)
+    .xlsx support. Only the workbook parts are read when opened; the shared strings (the only sheet data
+    kept in memory) and the date styles are read once, when the first sheet is read. """
+
+    on_demand = True
+
+    def __init__(self, filename=None, file_contents=None):
+        # the contents buffer is read in place (see `util.BufferReader`)
+        self.zip_file = zipfile.ZipFile(BufferReader(file_contents) if file_contents else filename)
+        # members are looked up case insensitively (as xlrd does)
+        self._members = dict((name.replace('\\', '/').lower(), name) for name in self.zip_file.namelist())
+        self.col_indexes = ColumnIndexes()
+        self._sst = None
+        self._date_xfs = None
+        self.datemode = 0
+        self._sheets = OrderedDict()  # {sheet name: zip member}
+        self._read_workbook()
+
+    def _member(self, path):
+        return self._members.get(path.lower())
+
+    def _parse(self, path):
+        member = self._member(path)
+        if member is None:
+            return None
+        stream = self.zip_file.open(member)
+        try:
+            return ElementTree.parse(stream).getroot()
+        finally:
+            stream.close()
+
+    def _read_workbook(self):
+        root = self._parse('xl/workbook.xml')
+        if root is None:
+            raise xlrd.XLRDError('Unsupported format, or corrupt file: no xl/workbook.xml')
+        targets = {}
+        rels = self._parse('xl/_rels/workbook.xml.rels')
+        for elem in (rels if rels is not None else ()):
+            if _local_name(elem.tag) == 'Relationship' and elem.get('Type', '').endswith('/worksheet'):
+                target = elem.get('Target').replace('\\', '/')
+                if target.startswith('/'):
+                    target = target[1:]
+                else:
+                    target = posixpath.normpath(posixpath.join('xl', target))
+                targets[elem.get('Id')] = target
+        for elem in root.iter():
+            name = _local_name(elem.tag)
+            if name == 'workbookPr':
+                self.datemode = _xsd_boolean(elem.get('date1904'))
+            elif name == 'sheet':
+                target = targets.get(elem.get(NS__RELATIONSHIPS + 'id'))
+                if target is not None:  # chart sheets are ignored
+                    self._sheets[text_type(_unescape(elem.get('name')))] = self._member(target)
+
+    def shared_strings(self):
+        if self._sst is None:
+            sst = []
+            member = self._member('xl/sharedStrings.xml')
+            if member is not None:
+                stream = self.zip_file.open(member)
+                try:
+                    tags = None
+                    for event, elem in ElementTree.iterparse(stream, events=('start', 'end')):
+                        if tags is None:
+                            ns = _namespace(elem.tag)
+                            tags = ns + 'si', ns + 't', ns + 'r'
+                        elif event == 'end' and elem.tag == tags[0]:
+                            sst.append(_rich_text(elem, tags[1], tags[2]))
+                            elem.clear()
+                finally:
+                    stream.close()
+            self._sst = sst
+        return self._sst
+
+    def date_xfs(self):
+        """ Returns the indexes (as in the cell `s` attribute) of the cell formats (`cellXfs`) with a date
+        number format. """
+        if self._date_xfs is None:
+            date_xfs = set()
+            root = self._parse('xl/styles.xml')
+            if root is not None:
+                date_formats = set(DATE_FORMAT_IDS)
+                for elem in root.iter():
+                    if _local_name(elem.tag) == 'numFmt':
+                        fmt_id = int(elem.get('numFmtId'))
+                        if is_date_format(elem.get('formatCode') or u''):
+                            date_formats.add(fmt_id)
+                        else:
+                            date_formats.discard(fmt_id)
+                for elem in root:
+                    if _local_name(elem.tag) == 'cellXfs':
+                        for xfx, xf in enumerate(elem):
+                            if int(xf.get('numFmtId', '0')) in date_formats:
+                                date_xfs.add(str(xfx))
+            self._date_xfs = frozenset(date_xfs)
+        return self._date_xfs
+
+    @property
+    def nsheets(self):
+        return len(self._sheets)
+
+    def sheet_names(self):
+        return list(self._sheets)
+
+    def sheet_by_name(self, sheetname):
+        try:
+            return XlsxSheet(self, sheetname, self._sheets[sheetname])
+        except KeyError:
+            raise xlrd.XLRDError('No sheet named <%r>' % sheetname)
+
+    def sheet_by_index(self, sheetx):
+        return self.sheet_by_name(self.sheet_names()[sheetx])
+
+    def sheet_version(self, sheetname):
+        """ Returns a version of the sheet contents known without reading them: the CRC and size of its zip
+        member and of the shared strings and styles it depends on (see `reload`). """
+        try:
+            members = [self._sheets[sheetname], self._member('xl/sharedStrings.xml'), self._member('xl/styles.xml')]
+        except KeyError:
+            raise xlrd.XLRDError('No sheet named <%r>' % sheetname)
+        infos = [self.zip_file.getinfo(member) if member is not None else None for member in members]
+        return tuple((info.CRC, info.file_size) if info is not None else None for info in infos) + (self.datemode,)
+
+    def release_sheet(self, sheetname):
+        pass  # nothing is kept
+
+    def release_resources(self):
+        self.zip_file.close()